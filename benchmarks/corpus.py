@@ -0,0 +1,161 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+"""
+Synthetic corpus of USBIF VIFs and matching DPAM Settings XML files.
+
+Used by the other benchmark scripts, or run directly to write a corpus to a
+directory for profiling:
+
+Usage:
+    poetry run python ./benchmarks/corpus.py OUTPUT_DIR [--ports 1 10 100 1000]
+"""
+import argparse
+import os
+
+VIF_NAMESPACES = (
+    'xmlns:vif="http://usb.org/VendorInfoFile.xsd" '
+    'xmlns:opt="http://usb.org/VendorInfoFileOptionalContent.xsd" '
+    'xmlns:vendor="urn:example:vendor"'
+)
+DEFAULT_PORTS = (1, 10, 100, 1000)
+DEFAULT_VENDOR_RECORDS = 5000
+
+
+def make_component(port: int, optional_content: bool) -> str:
+    optional = (
+        '    <opt:OptionalContent identifier="Vendor">\n'
+        "      <opt:Vendor_Field>{}</opt:Vendor_Field>\n"
+        "    </opt:OptionalContent>\n".format(port)
+        if optional_content
+        else ""
+    )
+    return (
+        "  <vif:Component>\n"
+        "    <vif:Port_Label>{0}</vif:Port_Label>\n"
+        '    <vif:Connector_Type value="2">Type-C®</vif:Connector_Type>\n'
+        '    <vif:USB4_Router_Index value="{0}">{0}</vif:USB4_Router_Index>\n'
+        '    <vif:PD_Port_Type value="4">DRP</vif:PD_Port_Type>\n'
+        "{1}"
+        "  </vif:Component>\n"
+    ).format(port, optional)
+
+
+def make_vendor_section(records: int) -> str:
+    """Large block of vendor specific content outside of any component"""
+    lines = ["  <vendor:Vendor_Data>\n"]
+    for record in range(records):
+        lines.append(
+            '    <vendor:Record id="{0}"><vendor:Name>Record {0}</vendor:Name>'
+            "<vendor:Value>{1}</vendor:Value></vendor:Record>\n".format(
+                record, record * 7
+            )
+        )
+    lines.append("  </vendor:Vendor_Data>\n")
+    return "".join(lines)
+
+
+def make_input_vif(
+    ports: int, optional_content_every: int = 0, vendor_records: int = 0
+) -> bytes:
+    """
+    USBIF VIF with the given number of ports. Every optional_content_every-th
+    port already has OptionalContent for DPAM content to merge into, 0 for
+    none. vendor_records adds a vendor section of that many records.
+    """
+    components = [
+        make_component(
+            port, optional_content_every and port % optional_content_every == 0
+        )
+        for port in range(ports)
+    ]
+    vendor = make_vendor_section(vendor_records) if vendor_records else ""
+    document = (
+        '<?xml version="1.0" encoding="utf-8"?>\n<vif:VIF {}>\n'
+        "  <vif:VIF_Specification>3.19</vif:VIF_Specification>\n{}{}</vif:VIF>\n"
+    ).format(VIF_NAMESPACES, vendor, "".join(components))
+    return document.encode("utf8")
+
+
+def make_settings(ports: int, variant: int = 0) -> bytes:
+    """DPAM settings for every port, with values that differ per variant"""
+    components = []
+    for port in range(ports):
+        components.append(
+            "  <vif:Component>\n"
+            "    <vif:Port_Label>{0}</vif:Port_Label>\n"
+            '    <opt:OptionalContent identifier="DPAM" xml:space="preserve">\n'
+            "      <!--;DisplayPort Alternate Mode-->\n"
+            "      <opt:DisplayPort_Capabilities>\n"
+            '        <opt:Port_Capability value="{1}">UFP_D</opt:Port_Capability>\n'
+            "        <opt:Signaling_Rate>&amp; {2}</opt:Signaling_Rate>\n"
+            '        <opt:Pin_Assignment_C value="true" />\n'
+            "      </opt:DisplayPort_Capabilities>\n"
+            "    </opt:OptionalContent>\n"
+            "  </vif:Component>\n".format(port, variant, port * variant)
+        )
+    document = '<?xml version="1.0" encoding="utf-8"?>\n<vif:VIF {}>\n{}</vif:VIF>\n'
+    return document.format(VIF_NAMESPACES, "".join(components)).encode("utf8")
+
+
+def get_cases(ports: tuple = DEFAULT_PORTS) -> list:
+    """
+    Corpus cases as dicts of make_input_vif arguments: each port count with
+    and without existing OptionalContent, and with a large vendor section
+    """
+    cases = []
+    for count in ports:
+        cases.append({"ports": count, "optional_content_every": 0})
+        cases.append({"ports": count, "optional_content_every": 1})
+        cases.append(
+            {
+                "ports": count,
+                "optional_content_every": 0,
+                "vendor_records": DEFAULT_VENDOR_RECORDS,
+            }
+        )
+    return cases
+
+
+def get_case_name(case: dict) -> str:
+    name = "ports{}".format(case["ports"])
+    if case.get("optional_content_every"):
+        name += "_optional"
+    if case.get("vendor_records"):
+        name += "_vendor{}".format(case["vendor_records"])
+    return name
+
+
+def write_corpus(out_dir: str, ports: tuple = DEFAULT_PORTS) -> list:
+    """Write every case's input VIF and settings, returning their paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for case in get_cases(ports):
+        in_vif = os.path.join(out_dir, get_case_name(case) + ".xml")
+        settings = os.path.join(out_dir, "settings_ports{}.xml".format(case["ports"]))
+        with open(in_vif, "wb") as f:
+            f.write(make_input_vif(**case))
+        with open(settings, "wb") as f:
+            f.write(make_settings(case["ports"]))
+        paths.append((in_vif, settings))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser("DPAM VIF Generator synthetic corpus")
+    parser.add_argument("out_dir", help="Directory to write the corpus to")
+    parser.add_argument(
+        "--ports", type=int, nargs="+", default=DEFAULT_PORTS, help="Port counts"
+    )
+    args = parser.parse_args()
+    for in_vif, settings in write_corpus(args.out_dir, tuple(args.ports)):
+        print(f"{in_vif}  {settings}")
+
+
+if __name__ == "__main__":
+    main()
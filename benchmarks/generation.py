@@ -0,0 +1,194 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+"""
+Time each stage of DPAM VIF generation over the synthetic corpus.
+
+For every corpus case, load_input_vif, generate_dpam_vif and write_output_vif
+are timed separately, followed by end to end generation in each mode. Results
+can be saved as JSON with --output, and compared against results saved from
+another version with --compare, which exits non-zero on any regression.
+
+The package is imported from the Python path, so another version, e.g. the
+baseline, can be timed by putting a checkout of it first on PYTHONPATH. Modes
+that version does not have are skipped.
+
+Usage:
+    poetry run python ./benchmarks/generation.py [--runs N] [--output FILE]
+        [--compare FILE] [--ports 1 10 100 1000]
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from corpus import (
+    DEFAULT_PORTS,
+    get_case_name,
+    get_cases,
+    make_input_vif,
+    make_settings,
+)
+
+from dpamvifgenerator import buildinfo, script
+
+Generator = script.DPAMVIFGenerator
+
+
+def time_stage(setup, stage, runs: int) -> list:
+    """Time stage(*setup()) runs times, excluding setup, in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        args = setup()
+        gc.collect()
+        start = time.perf_counter()
+        stage(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def get_stages(in_vif: str, settings: str) -> dict:
+    """Map stage name to (setup, stage) for one corpus case"""
+
+    def load_both():
+        return Generator.load_input_vif(in_vif), Generator.load_dpam_settings(settings)
+
+    def load_generated():
+        input_vif, dpam_settings = load_both()
+        Generator.generate_dpam_vif(input_vif, dpam_settings)
+        return input_vif, io.BytesIO()
+
+    def generate(**options):
+        if hasattr(script, "generate"):
+            return lambda: script.generate(in_vif, settings, **options)
+        # Versions before the in-memory generation API
+        return lambda: Generator(
+            in_vif=in_vif,
+            settings=settings,
+            out_vif=io.BytesIO(),
+            progress=lambda value: None,
+            **options,
+        ).generate_vif()
+
+    stages = {
+        "load_input_vif": (lambda: (in_vif,), Generator.load_input_vif),
+        "generate_dpam_vif": (load_both, Generator.generate_dpam_vif),
+        "write_output_vif": (load_generated, Generator.write_output_vif),
+        "generate": (tuple, generate()),
+    }
+    # Only time the modes the version being benchmarked has
+    if hasattr(script, "STREAMING_THRESHOLD"):
+        stages["generate_streaming"] = (tuple, generate(streaming_threshold=0))
+    if hasattr(Generator, "splice_dpam_vif"):
+        stages["generate_preserve_formatting"] = (
+            tuple,
+            generate(preserve_formatting=True),
+        )
+    return stages
+
+
+def run_benchmarks(ports: tuple, runs: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for case in get_cases(ports):
+            name = get_case_name(case)
+            in_vif = os.path.join(temp_dir, name + ".xml")
+            settings = os.path.join(temp_dir, name + "_settings.xml")
+            with open(in_vif, "wb") as f:
+                f.write(make_input_vif(**case))
+            with open(settings, "wb") as f:
+                f.write(make_settings(case["ports"]))
+            for stage, (setup, function) in get_stages(in_vif, settings).items():
+                timings = time_stage(setup, function, runs)
+                results.append(
+                    {
+                        "case": name,
+                        **case,
+                        "input_bytes": os.path.getsize(in_vif),
+                        "stage": stage,
+                        "runs": runs,
+                        "min_ms": min(timings),
+                        "median_ms": statistics.median(timings),
+                        "mean_ms": statistics.mean(timings),
+                    }
+                )
+                print(
+                    f"  {name:<24} {stage:<30} median {results[-1]['median_ms']:9.2f}"
+                    f"   min {results[-1]['min_ms']:9.2f}",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def compare_results(results: list, baseline: dict, threshold: float) -> int:
+    """Print median changes against baseline, returning the regression count"""
+    previous = {
+        (result["case"], result["stage"]): result for result in baseline["results"]
+    }
+    regressions = 0
+    print(f"Compared to {baseline['version']} ({baseline['timestamp']}):")
+    for result in results:
+        old = previous.get((result["case"], result["stage"]))
+        if not old or not old["median_ms"]:
+            continue
+        ratio = result["median_ms"] / old["median_ms"]
+        status = ""
+        if ratio > threshold:
+            status = "REGRESSION"
+            regressions += 1
+        print(
+            f"  {result['case']:<24} {result['stage']:<30} "
+            f"{old['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms "
+            f"({ratio:5.2f}x) {status}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser("DPAM VIF Generator generation benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per stage")
+    parser.add_argument(
+        "--ports", type=int, nargs="+", default=DEFAULT_PORTS, help="Port counts"
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Median slowdown ratio reported as a regression (default: 1.25)",
+    )
+    args = parser.parse_args()
+
+    print(f"Timing generation stages over {args.runs} runs (ms):", file=sys.stderr)
+    report = {
+        "version": buildinfo.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "results": run_benchmarks(tuple(args.ports), args.runs),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare, encoding="utf8") as f:
+            baseline = json.load(f)
+        if compare_results(report["results"], baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+"""
+Measure requests per second of the --serve generation server.
+
+Starts a server on a free localhost port unless --url is given, then sends
+generate requests from many client threads at once and reports throughput
+and latency. Every response is checked against a direct script.generate call.
+
+Usage:
+    poetry run python ./benchmarks/loadtest.py [--requests N] [--clients N]
+"""
+import argparse
+import base64
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus import make_input_vif, make_settings
+
+from dpamvifgenerator import script
+
+STARTUP_TIMEOUT = 10  # Seconds
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(url: str):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            with urllib.request.urlopen(url + "/health") as response:
+                return json.load(response)
+        except (urllib.error.URLError, ConnectionError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def post_generate(url: str, body: bytes) -> tuple[float, bytes]:
+    """Send one generate request, returning its latency in ms and response"""
+    request = urllib.request.Request(
+        url + "/generate", body, {"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        output = response.read()
+    return (time.perf_counter() - start) * 1000, output
+
+
+def main():
+    parser = argparse.ArgumentParser("DPAM VIF Generator server load test")
+    parser.add_argument("--url", help="Existing server URL, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--ports", type=int, default=8, help="Ports per VIF")
+    parser.add_argument(
+        "--variants", type=int, default=4, help="Distinct settings payloads"
+    )
+    parser.add_argument(
+        "--preserve-formatting", action="store_true", help="Splice into input VIFs"
+    )
+    args = parser.parse_args()
+
+    # Requests cycle through a few settings payloads to exercise the caches
+    in_vif = make_input_vif(args.ports, optional_content_every=2)
+    bodies, expected = [], []
+    for variant in range(args.variants):
+        settings = make_settings(args.ports, variant)
+        request = {
+            "in_vif": base64.b64encode(in_vif).decode("ascii"),
+            "settings": base64.b64encode(settings).decode("ascii"),
+            "preserve_formatting": args.preserve_formatting,
+        }
+        bodies.append(json.dumps(request).encode("utf8"))
+        expected.append(
+            script.generate(
+                in_vif, settings, preserve_formatting=args.preserve_formatting
+            )
+        )
+
+    server = None
+    url = args.url
+    if not url:
+        port = get_free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "dpamvifgenerator.main", "--serve"]
+            + ["--port", str(port)],
+            stderr=subprocess.DEVNULL,
+        )
+    try:
+        wait_for_server(url)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(
+                pool.map(
+                    lambda index: post_generate(url, bodies[index % len(bodies)]),
+                    range(args.requests),
+                )
+            )
+        duration = time.perf_counter() - start
+        stats = wait_for_server(url)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(latency for latency, _ in results)
+    mismatches = sum(
+        output != expected[index % len(expected)]
+        for index, (_, output) in enumerate(results)
+    )
+    print(
+        f"{args.requests} requests from {args.clients} clients in {duration:.2f}s: "
+        f"{args.requests / duration:.1f} requests/s"
+    )
+    print(
+        f"  latency ms  median {statistics.median(latencies):7.1f}"
+        f"   p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f}"
+        f"   max {latencies[-1]:7.1f}"
+    )
+    for cache in ["settings_cache", "skeleton_cache"]:
+        print(f"  {cache:<16} {stats[cache]}")
+    if mismatches:
+        print(f"{mismatches} responses differed from script.generate")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
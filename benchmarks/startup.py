@@ -0,0 +1,111 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+"""
+Measure cold start time of the command-line generator and the GUI.
+
+Each scenario is run in a fresh interpreter so that module imports are paid
+for every run, the same as a user invoking the tool once per VIF. GUI
+scenarios run under the offscreen Qt platform and time the main window up to
+its first shown frame, loading either the .ui files or the modules compiled
+from them by build_ui.py.
+
+Usage:
+    poetry run python ./benchmarks/startup.py [--runs N]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import make_input_vif, make_settings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Shows the main window with a datastore in a temporary directory. Passing
+# "ui" loads the .ui files even if compiled modules exist
+FIRST_WINDOW = """
+import os, sys, tempfile
+from PySide6.QtWidgets import QApplication
+from dpamvifgenerator import utility
+if sys.argv[1] == "ui":
+    utility.load_compiled_ui = lambda ui_file_path: None
+app = QApplication([])
+from dpamvifgenerator.controller.mainwindow import MainWindow
+from dpamvifgenerator.gui.datastore import DataStore
+with tempfile.TemporaryDirectory() as temp_dir:
+    ds = DataStore(os.path.join(temp_dir, "store.json"))
+    window = MainWindow(ds=ds, user_data_dir=temp_dir)
+    window.show()
+    app.processEvents()
+"""
+
+
+def time_command(command: list, runs: int, env: dict = None) -> list:
+    """Return the wall clock time in milliseconds of each run of command"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command,
+            cwd=ROOT,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser("DPAM VIF Generator startup benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        in_vif = os.path.join(temp_dir, "input.xml")
+        settings = os.path.join(temp_dir, "settings.xml")
+        out_vif = os.path.join(temp_dir, "output.xml")
+        with open(in_vif, "wb") as f:
+            f.write(make_input_vif(1))
+        with open(settings, "wb") as f:
+            f.write(make_settings(1))
+
+        python = [sys.executable]
+        scenarios = {
+            "python interpreter": python + ["-c", "pass"],
+            "--batch single VIF": python
+            + ["-m", "dpamvifgenerator.main"]
+            + ["--batch", "-i", in_vif, "-s", settings, "-o", out_vif],
+            "import Qt GUI stack": python + ["-c", "import dpamvifgenerator.gui"],
+            "GUI window, .ui files": python + ["-c", FIRST_WINDOW, "ui"],
+        }
+        if importlib.util.find_spec("dpamvifgenerator.uifiles.ui_mainwindow"):
+            scenarios["GUI window, compiled"] = python + ["-c", FIRST_WINDOW, "py"]
+        else:
+            print("UI files are not compiled, run build_ui.py to compare")
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        print(f"Cold start over {args.runs} runs (ms):")
+        for name, command in scenarios.items():
+            try:
+                timings = time_command(command, args.runs, env)
+            except subprocess.CalledProcessError:
+                print(f"  {name:<24} failed")
+                continue
+            print(
+                f"  {name:<24} median {statistics.median(timings):8.1f}"
+                f"   min {min(timings):8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ import os
 
 import PyInstaller.__main__
 
+from build_ui import compile_ui_files
 from dpamvifgenerator.utility import get_asset_file_path
 
 
@@ -22,6 +23,14 @@ def generate_pdf_args():
         yield pdf + os.pathsep + "assets"
 
 
+def generate_ui_args():
+    # Bundle compiled UI modules in place of .ui files, so the one-file build
+    # neither extracts nor parses .ui files, and leaves out QtUiTools
+    for module in compile_ui_files():
+        yield "--hidden-import=" + module
+    yield "--exclude-module=PySide6.QtUiTools"
+
+
 PyInstaller.__main__.run(
     [
         # Script Main
@@ -32,14 +41,7 @@ PyInstaller.__main__.run(
         "--windowed",
         "--noconfirm",
         # GUI UI Files
-        "--add-data",
-        os.path.join("dpamvifgenerator", "uifiles", "mainwindow.ui")
-        + os.pathsep
-        + os.path.join("dpamvifgenerator", "uifiles"),
-        "--add-data",
-        os.path.join("dpamvifgenerator", "uifiles", "about.ui")
-        + os.pathsep
-        + os.path.join("dpamvifgenerator", "uifiles"),
+        *list(generate_ui_args()),
         # GUI Splash and Icons
         "--add-data",
         os.path.join("assets", "vesa_logo_dark.png") + os.pathsep + "assets",
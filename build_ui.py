@@ -0,0 +1,63 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+"""
+Compile the Qt .ui files into Python modules with pyside6-uic.
+
+The app loads a compiled module in place of its .ui file when one exists and
+is newer than the .ui file, which saves parsing the .ui XML at startup.
+
+Usage:
+    poetry run python ./build_ui.py
+"""
+import glob
+import os
+import py_compile
+import subprocess
+from xml.etree import ElementTree as ET
+
+UI_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "dpamvifgenerator", "uifiles"
+)
+
+
+def compile_ui_file(ui_file_path: str) -> str:
+    """Compile one .ui file, returning the path of the compiled module"""
+    name = os.path.splitext(os.path.basename(ui_file_path))[0]
+    module_path = os.path.join(os.path.dirname(ui_file_path), f"ui_{name}.py")
+    subprocess.run(["pyside6-uic", ui_file_path, "-o", module_path], check=True)
+    # Record the form and widget classes, so the app can create the form
+    # without reading the .ui file
+    root = ET.parse(ui_file_path).getroot()
+    widget = root.find("widget")
+    form_class = root.findtext("class", widget.get("name"))
+    with open(module_path, "a", encoding="utf8") as module_file:
+        module_file.write(
+            f"\n\nUI_FORM_CLASS = Ui_{form_class}\n"
+            f"UI_WIDGET_CLASS = {widget.get('class')}\n"
+        )
+    # Byte-compile now, so the first launch does not parse the module either
+    py_compile.compile(module_path, doraise=True)
+    return module_path
+
+
+def compile_ui_files() -> list[str]:
+    """Compile every .ui file, returning the names of the compiled modules"""
+    modules = []
+    for ui_file_path in sorted(glob.glob(os.path.join(UI_DIR, "*.ui"))):
+        module_path = compile_ui_file(ui_file_path)
+        print(f"Compiled {ui_file_path} to {module_path}")
+        modules.append(
+            "dpamvifgenerator.uifiles."
+            + os.path.splitext(os.path.basename(module_path))[0]
+        )
+    return modules
+
+
+if __name__ == "__main__":
+    compile_ui_files()
@@ -0,0 +1,329 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import csv
+import glob
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from dpamvifgenerator import script
+from dpamvifgenerator.skeleton import VIFSkeleton
+from dpamvifgenerator.tracing import Tracer
+
+# Batch Consts
+MANIFEST_COMMENT = "#"
+
+
+# Exception Classes
+class InvalidBatchSource(Exception):
+    pass
+
+
+# Batch Job Classes
+@dataclass
+class BatchJob:
+    in_vif: str
+    settings: str
+    out_vif: str
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    success: bool
+    error: str = ""
+    duration: float = 0.0
+    cached: bool = None
+    spans: list = field(default_factory=list)
+
+
+def load_jobs(source: str, settings: str = None, out_dir: str = None) -> list:
+    """
+    Build the list of batch jobs from a source, which is one of:
+        directory   - every *.xml file in the directory is an input VIF
+        manifest    - CSV file with one "input,settings,output" row per job
+        glob        - pattern matching input VIF files
+    Directory and glob sources share a single settings file, and write each
+    output under out_dir with the same file name as its input VIF.
+    """
+    if os.path.isdir(source):
+        inputs = sorted(glob.glob(os.path.join(source, "*.xml")))
+    elif os.path.isfile(source):
+        return load_manifest(source)
+    else:
+        inputs = sorted(glob.glob(source))
+    if not inputs:
+        error = "Error: No input VIF files found for batch source: {}".format(source)
+        logging.error(error)
+        raise InvalidBatchSource(error)
+    # Directory and glob sources need shared settings and an output directory
+    if not settings or not out_dir:
+        error = (
+            "Error: Batch source {} requires a settings file (-s) and "
+            "an output directory (-o)".format(source)
+        )
+        logging.error(error)
+        raise script.MissingGeneratorArg(error)
+    out_dir = os.path.abspath(out_dir)
+    jobs = []
+    for in_vif in inputs:
+        in_vif = os.path.abspath(in_vif)
+        out_vif = os.path.join(out_dir, os.path.basename(in_vif))
+        if out_vif == in_vif:
+            error = (
+                "Error: Batch output directory must differ from the input "
+                "directory: {}".format(out_dir)
+            )
+            logging.error(error)
+            raise InvalidBatchSource(error)
+        jobs.append(BatchJob(in_vif, os.path.abspath(settings), out_vif))
+    return jobs
+
+
+def load_manifest(manifest: str) -> list:
+    """Load batch jobs from a CSV manifest, relative to the manifest's directory"""
+    root = os.path.dirname(os.path.abspath(manifest))
+    jobs = []
+    with open(manifest, newline="", encoding="utf8") as manifest_file:
+        for line, row in enumerate(csv.reader(manifest_file), start=1):
+            # Skip blank and comment rows
+            row = [column.strip() for column in row]
+            if not any(row) or row[0].startswith(MANIFEST_COMMENT):
+                continue
+            if len(row) != 3:
+                error = (
+                    "Error: Invalid batch manifest row {} in {}. Expected "
+                    '"input,settings,output" but got: {}'.format(line, manifest, row)
+                )
+                logging.error(error)
+                raise InvalidBatchSource(error)
+            jobs.append(
+                BatchJob(*(os.path.abspath(os.path.join(root, path)) for path in row))
+            )
+    if not jobs:
+        error = "Error: No batch jobs found in manifest: {}".format(manifest)
+        logging.error(error)
+        raise InvalidBatchSource(error)
+    return jobs
+
+
+def run_job(job: BatchJob, options: dict = None, trace: bool = False) -> BatchResult:
+    """
+    Run a single batch job, capturing any failure in its result. With trace,
+    the result includes the job's stage timing spans.
+    """
+    start = time.perf_counter()
+    generator = None
+    try:
+        os.makedirs(os.path.dirname(job.out_vif), exist_ok=True)
+        generator = script.DPAMVIFGenerator(
+            in_vif=job.in_vif,
+            out_vif=job.out_vif,
+            settings=job.settings,
+            progress=None,
+            **(options or {}),
+        )
+        generator.generate_vif()
+    except Exception as e:
+        spans = generator.tracer.spans if trace and generator else []
+        return BatchResult(job, False, str(e), time.perf_counter() - start, spans=spans)
+    return BatchResult(
+        job,
+        True,
+        duration=time.perf_counter() - start,
+        cached=generator.cache_hit,
+        spans=generator.tracer.spans if trace else [],
+    )
+
+
+def init_worker():
+    # Per-job output is reported by the batch summary, so keep workers quiet
+    logging.info = logging.getLogger().info
+    logging.disable(logging.CRITICAL)
+    # Ctrl-C is handled by the main process, which lets running jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_batch(
+    jobs: list, workers: int = None, tracer: Tracer = None, **options
+) -> list:
+    """
+    Run batch jobs across a process pool and return results in job order.
+    Any options are passed on to each job's DPAMVIFGenerator. Stage timings
+    from every job are collected into tracer, if given. On Ctrl-C, jobs that
+    have not started are cancelled and running jobs are left to finish, so no
+    partial outputs are written.
+    """
+    results: dict[int, BatchResult] = {}
+    trace = tracer is not None
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = {
+            pool.submit(run_job, job, options, trace): index
+            for index, job in enumerate(jobs)
+        }
+        try:
+            for count, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                results[futures[future]] = result
+                if trace:
+                    tracer.add_spans(result.spans)
+                status = "OK" if result.success else "FAILED"
+                logging.info(f"[{count}/{len(jobs)}] {status}: {result.job.in_vif}")
+        except KeyboardInterrupt:
+            logging.info("Cancelling batch, waiting for running jobs to finish...")
+            pool.shutdown(cancel_futures=True)
+            raise
+    return [results[index] for index in range(len(jobs))]
+
+
+def load_fan_out_jobs(in_vif: str, settings: list, out_dir: str) -> list:
+    """
+    Build one batch job per settings file for a single input VIF. Each output
+    is written under out_dir, named after the input VIF and its settings file.
+    """
+    if not in_vif or not settings or not out_dir:
+        error = (
+            "Error: Fan-out requires an input VIF (-i), settings files "
+            "(--fan-out) and an output directory (-o)"
+        )
+        logging.error(error)
+        raise script.MissingGeneratorArg(error)
+    in_vif = os.path.abspath(in_vif)
+    out_dir = os.path.abspath(out_dir)
+    in_name = os.path.splitext(os.path.basename(in_vif))[0]
+    jobs = []
+    for settings_file in settings:
+        settings_name = os.path.splitext(os.path.basename(settings_file))[0]
+        out_vif = os.path.join(out_dir, f"{in_name}_{settings_name}.xml")
+        jobs.append(BatchJob(in_vif, os.path.abspath(settings_file), out_vif))
+    if len({job.out_vif for job in jobs}) != len(jobs):
+        error = "Error: Fan-out settings files must have unique file names"
+        logging.error(error)
+        raise InvalidBatchSource(error)
+    return jobs
+
+
+def run_fan_out_job(
+    skeleton: VIFSkeleton,
+    job: BatchJob,
+    tracer: Tracer = None,
+    cancel_token: script.CancellationToken = None,
+) -> BatchResult:
+    """Generate a single fan-out output from the shared input VIF skeleton"""
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(job.out_vif), exist_ok=True)
+        progress = script.GenerationProgress(cancel_token=cancel_token)
+        skeleton.generate(job.settings, job.out_vif, tracer, progress)
+    except Exception as e:
+        return BatchResult(job, False, str(e), time.perf_counter() - start)
+    return BatchResult(job, True, duration=time.perf_counter() - start)
+
+
+def run_fan_out(
+    in_vif: str,
+    jobs: list,
+    workers: int = None,
+    preserve_formatting: bool = False,
+    tracer: Tracer = None,
+    streaming_threshold: int = script.STREAMING_THRESHOLD,
+) -> list:
+    """
+    Parse the input VIF once, then generate every job's output from the shared
+    skeleton across a thread pool. Input VIFs larger than streaming_threshold
+    are streamed into the skeleton instead of being parsed in full. Results
+    are returned in job order, and if the input VIF can't be loaded every job
+    fails with its error. On Ctrl-C, all jobs are cancelled and their partial
+    outputs removed.
+    """
+    start = time.perf_counter()
+    try:
+        streaming = os.path.getsize(in_vif) > streaming_threshold
+    except OSError:
+        # Let the skeleton report a missing input VIF
+        streaming = False
+    try:
+        skeleton = VIFSkeleton(in_vif, preserve_formatting, tracer, streaming=streaming)
+    except Exception as e:
+        duration = time.perf_counter() - start
+        return [BatchResult(job, False, str(e), duration) for job in jobs]
+    cancel_token = script.CancellationToken()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            return list(
+                pool.map(
+                    lambda job: run_fan_out_job(skeleton, job, tracer, cancel_token),
+                    jobs,
+                )
+            )
+        except KeyboardInterrupt:
+            cancel_token.cancel()
+            raise
+
+
+def print_summary(results: list, duration: float):
+    failed = [result for result in results if not result.success]
+    print("Batch Summary:")
+    for result in results:
+        if result.success:
+            cached = ", cached" if result.cached else ""
+            print(
+                f"  [ OK ] {result.job.in_vif} -> {result.job.out_vif} "
+                f"({result.duration:.2f}s{cached})"
+            )
+        else:
+            print(f"  [FAIL] {result.job.in_vif}: {result.error}")
+    print(
+        f"{len(results) - len(failed)} succeeded, {len(failed)} failed, "
+        f"{len(results)} total in {duration:.2f}s"
+    )
+    # Jobs that failed before reaching the cache have no cache result
+    cache_results = [result.cached for result in results if result.cached is not None]
+    if cache_results:
+        hits = sum(cache_results)
+        print(f"Cache: {hits} hits, {len(cache_results) - hits} misses")
+
+
+def main(
+    jobs: str,
+    settings: str = None,
+    out_vif: str = None,
+    workers: int = None,
+    tracer: Tracer = None,
+    **options,
+):
+    # Load and run all batch jobs, returning the process exit code
+    start = time.perf_counter()
+    batch_jobs = load_jobs(jobs, settings, out_vif)
+    logging.info(f"Running {len(batch_jobs)} batch jobs...")
+    results = run_batch(batch_jobs, workers, tracer, **options)
+    print_summary(results, time.perf_counter() - start)
+    if options.get("cache") is not None:
+        options["cache"].evict()
+    return 0 if all(result.success for result in results) else 1
+
+
+def fan_out_main(
+    in_vif: str,
+    settings: list,
+    out_vif: str = None,
+    workers: int = None,
+    preserve_formatting: bool = False,
+    tracer: Tracer = None,
+):
+    # Generate one output per settings file, returning the process exit code
+    start = time.perf_counter()
+    jobs = load_fan_out_jobs(in_vif, settings, out_vif)
+    logging.info(f"Generating {len(jobs)} outputs from {in_vif}...")
+    results = run_fan_out(in_vif, jobs, workers, preserve_formatting, tracer)
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(result.success for result in results) else 1
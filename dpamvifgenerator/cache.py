@@ -0,0 +1,211 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from dpamvifgenerator import buildinfo
+from dpamvifgenerator.utility.lrucache import LRUCache
+
+# Cache Consts
+CACHE_MAX_SIZE = 1024 * 1024 * 1024  # Bytes
+CACHE_MAX_AGE = 30 * 24 * 60 * 60  # Seconds
+CACHE_EXTENSION = ".xml"
+HASH_CHUNK_SIZE = 1024 * 1024
+DOCUMENT_CACHE_MAX_SIZE = 256 * 1024 * 1024  # Bytes of files loaded
+DOCUMENT_CACHE_ENTRIES = 64
+
+
+def get_default_cache_dir() -> str:
+    """Get the user's cache directory for generated outputs"""
+    import appdirs
+
+    directories = appdirs.AppDirs(buildinfo.__product__, buildinfo.__company__)
+    return os.path.join(directories.user_cache_dir, "outputs")
+
+
+# Output Cache Class
+class OutputCache:
+    """
+    On-disk cache of generated VIFs, keyed on a content hash of the input VIF
+    and settings bytes, the generation options, and the generator and spec
+    versions. Entries are evicted by age and then by total size, oldest first.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        max_size: int = CACHE_MAX_SIZE,
+        max_age: float = CACHE_MAX_AGE,
+    ):
+        self.cache_dir = os.path.abspath(cache_dir or get_default_cache_dir())
+        self.max_size = max_size
+        self.max_age = max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_source(digest, source):
+        # Hash a file path's contents, or in-memory bytes
+        if isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+            return
+        with open(source, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+
+    @staticmethod
+    def get_key(in_vif, settings, options: dict) -> str | None:
+        """
+        Get the cache key for a generation, or None if an input is not a file
+        path or bytes and so cannot be hashed
+        """
+        sources = (in_vif, settings)
+        if not all(isinstance(s, (str, os.PathLike, bytes)) for s in sources):
+            return None
+        digest = hashlib.sha256()
+        versions = (
+            buildinfo.__version__,
+            buildinfo.__dpam_vif_spec_version__,
+            buildinfo.__usbif_vif_spec_version__,
+        )
+        digest.update(repr((versions, sorted(options.items()))).encode("utf8"))
+        for source in sources:
+            # Length prefix keeps input and settings boundaries unambiguous
+            size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+            digest.update(size.to_bytes(8, "little"))
+            OutputCache.hash_source(digest, source)
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + CACHE_EXTENSION)
+
+    def fetch(self, key: str, out_vif: str) -> bool:
+        """Copy a cached output to out_vif, returning whether it was a hit"""
+        path = self.get_path(key)
+        try:
+            shutil.copyfile(path, out_vif)
+            # Refresh age so recently used entries are evicted last
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        except BaseException:
+            # Remove any partially copied output, e.g. when interrupted
+            if os.path.exists(out_vif):
+                os.remove(out_vif)
+            raise
+        logging.info(f"Using cached output {path}")
+        return True
+
+    def store(self, key: str, out_vif: str):
+        """Add a generated output to the cache"""
+        path = self.get_path(key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Copy to a temporary file first so readers never see partial data
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            os.close(handle)
+            shutil.copyfile(out_vif, temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # The output was still generated, so a cache failure is not fatal
+            logging.warning(f"Unable to cache output {out_vif}: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get_entries(self) -> list:
+        """Get (modified time, size, path) of every cache entry, oldest first"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(CACHE_EXTENSION):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self) -> int:
+        """Remove expired entries, then the oldest until under max_size"""
+        entries = self.get_entries()
+        expired = time.time() - self.max_age
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for modified, size, path in entries:
+            if modified >= expired and total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        if evicted:
+            logging.info(f"Evicted {evicted} cached outputs from {self.cache_dir}")
+        return evicted
+
+
+# Document Cache Class
+class DocumentCache:
+    """
+    In-memory cache of documents loaded from files during a session, e.g.
+    parsed input VIFs and settings, so files used again are not parsed again.
+    Documents are keyed by kind and absolute path, and are loaded again once
+    the file's size or modification time changes. The least recently used
+    documents are evicted once their sizes, by default the sizes of the
+    files they were loaded from, add up to more than max_size. Documents are
+    shared, so callers must not modify them.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DOCUMENT_CACHE_MAX_SIZE,
+        max_entries: int = DOCUMENT_CACHE_ENTRIES,
+    ):
+        self.documents = LRUCache(max_entries, max_size)
+        self.versions: dict[tuple, tuple] = {}
+        self.lock = threading.Lock()
+
+    def get(
+        self,
+        path: str | os.PathLike,
+        kind: str,
+        load: Callable[[str], object],
+        size: Callable[[object], int] = None,
+    ):
+        """Get the document of this kind for path, calling load(path) on a miss"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Let the loader report a missing or unreadable file
+            return load(path)
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            previous = self.versions.get((kind, path))
+            self.versions[(kind, path)] = version
+        if previous not in (None, version):
+            # Drop the document loaded before the file changed
+            self.documents.pop((kind, path) + previous)
+        return self.documents.get(
+            (kind, path) + version,
+            lambda: load(path),
+            size or (lambda document: stat.st_size),
+        )
+
+    def stats(self) -> dict:
+        return self.documents.stats()
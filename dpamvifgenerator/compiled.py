@@ -0,0 +1,153 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import json
+import logging
+import os
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator import buildinfo, script
+from dpamvifgenerator.utility.xmlwriter import escape_attrib, used_namespaces
+
+# Compiled Settings Consts
+COMPILED_SETTINGS_FORMAT = 1
+COMPILED_SETTINGS_EXTENSION = ".json"
+
+
+# Compiled Settings Class
+class CompiledSettings:
+    """
+    DPAM settings with each port's OptionalContent already serialized and
+    indexed by port label, saved as JSON so that repeated runs skip parsing
+    and serializing the Settings XML. Fragments are written at indent level 0
+    with "\n" newlines and the VIF prefixes, so splicing only needs to shift
+    their indentation.
+    """
+
+    def __init__(self, ports: dict[str, tuple[str, bool]], namespaces: dict[str, str]):
+        # Port label to (fragment, verbatim), where verbatim fragments can be
+        # re-indented by replacing their newlines
+        self.ports = ports
+        # Prefix to uri of every namespace used by the fragments
+        self.namespaces = namespaces
+
+    def __len__(self) -> int:
+        return len(self.ports)
+
+    def __contains__(self, port_label: str) -> bool:
+        return port_label in self.ports
+
+    @staticmethod
+    def compile(settings: script.XMLSource | ET.ElementTree | ET.Element):
+        dpam_settings = script.DPAMVIFGenerator.load_dpam_settings(settings)
+        port_settings = script.DPAMVIFGenerator.get_port_settings_from_vif(
+            dpam_settings
+        )
+        prefixes = script.DPAMVIFGenerator.get_uri_prefixes()
+        ports: dict[str, tuple[str, bool]] = {}
+        namespaces: dict[str, str] = {}
+        for port_label, opt_content in port_settings.items():
+            if opt_content is None:
+                error = (
+                    "Error: Missing opt:OptionalContent for port {} in DPAM "
+                    "Settings XML file".format(port_label)
+                )
+                logging.error(error)
+                raise script.InvalidSettingsXML(error)
+            fragment = script.DPAMVIFGenerator.serialize_dpam_content(
+                opt_content, "", "\n", prefixes
+            )
+            used = used_namespaces(opt_content)
+            namespaces.update({prefixes[uri]: uri for uri in used if uri in prefixes})
+            verbatim = used <= prefixes.keys() and CompiledSettings.is_reindentable(
+                opt_content
+            )
+            ports[port_label] = (fragment, verbatim)
+        return CompiledSettings(ports, namespaces)
+
+    @staticmethod
+    def is_reindentable(opt_content: ET.Element) -> bool:
+        # Newlines inside real text would be changed by re-indenting
+        for elem in opt_content.iter():
+            texts = [elem.text] if elem is opt_content else [elem.text, elem.tail]
+            if any(text and text.strip() and "\n" in text for text in texts):
+                return False
+        return True
+
+    @staticmethod
+    def load(settings: "script.XMLSource | CompiledSettings"):
+        if isinstance(settings, CompiledSettings):
+            return settings
+        try:
+            if script.DPAMVIFGenerator.is_path(settings):
+                with open(settings, "rb") as settings_file:
+                    data = json.load(settings_file)
+            elif isinstance(settings, (bytes, bytearray)):
+                data = json.loads(settings)
+            else:
+                data = json.load(settings)
+            if data.get("format") != COMPILED_SETTINGS_FORMAT:
+                raise ValueError(
+                    "Unsupported compiled settings format: {}".format(
+                        data.get("format")
+                    )
+                )
+            ports = {
+                label: (port["fragment"], port["verbatim"])
+                for label, port in data["ports"].items()
+            }
+            return CompiledSettings(ports, data["namespaces"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            error = (
+                "Error: Invalid compiled DPAM settings provided at path: {}. "
+                "{}".format(script.DPAMVIFGenerator.describe_source(settings), e)
+            )
+            logging.error(error)
+            raise script.InvalidSettingsXML(error)
+
+    def save(self, out_path: str | os.PathLike):
+        data = {
+            "format": COMPILED_SETTINGS_FORMAT,
+            "generator": buildinfo.__version__,
+            "namespaces": self.namespaces,
+            "ports": {
+                label: {"fragment": fragment, "verbatim": verbatim}
+                for label, (fragment, verbatim) in self.ports.items()
+            },
+        }
+        with open(out_path, "w", encoding="utf8") as out_file:
+            json.dump(data, out_file, indent=1)
+
+    def get_element(self, port_label: str) -> ET.Element:
+        # Parse a fragment with its namespace prefixes declared on a wrapper
+        declarations = "".join(
+            ' xmlns:{}="{}"'.format(prefix, escape_attrib(uri))
+            for prefix, uri in sorted(self.namespaces.items())
+        )
+        parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+        parser.feed("<root{}>".format(declarations))
+        parser.feed(self.ports[port_label][0])
+        parser.feed("</root>")
+        return parser.close()[0]
+
+    def get_port_settings(self) -> dict[str, ET.Element]:
+        # Elements are inserted into output trees, so build new ones every time
+        return {port_label: self.get_element(port_label) for port_label in self.ports}
+
+    def get_fragment(
+        self, port_label: str, indent: str, newline: str, prefixes: dict[str, str]
+    ) -> str:
+        """Get a port's fragment as serialize_dpam_content would produce it"""
+        fragment, verbatim = self.ports[port_label]
+        if verbatim and all(
+            prefixes.get(uri) == prefix for prefix, uri in self.namespaces.items()
+        ):
+            return fragment.replace("\n", newline + indent)
+        return script.DPAMVIFGenerator.serialize_dpam_content(
+            self.get_element(port_label), indent, newline, prefixes
+        )
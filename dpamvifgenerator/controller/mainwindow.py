@@ -9,10 +9,9 @@
 import glob
 import logging
 import os
-import shutil
 from xml.etree import ElementTree as ET
 
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QCheckBox,
@@ -20,20 +19,36 @@ from PySide6.QtWidgets import (
     QFileDialog,
     QGroupBox,
     QMainWindow,
+    QMessageBox,
     QProgressBar,
+    QTreeWidgetItem,
     QWidget,
 )
 
 from dpamvifgenerator import buildinfo, script
 from dpamvifgenerator.controller.about import AboutDialog
+from dpamvifgenerator.controller.profiles import ProfileDialog
+from dpamvifgenerator.profiles import (
+    InvalidProfileStore,
+    ProfileStore,
+    get_profile_store_path,
+)
+from dpamvifgenerator.tracing import Span, Tracer
 from dpamvifgenerator.utility import (
-    XML_INDENT,
     get_asset_file_path,
     get_data_file_path,
     load_ui_file,
     open_file_native,
 )
-from dpamvifgenerator.utility.worker import Worker
+from dpamvifgenerator.utility.jobqueue import (
+    JOB_CANCELLED,
+    JOB_COMPLETE,
+    JOB_FAILED,
+    JOB_FINISHED_STATES,
+    JOB_QUEUED,
+    Job,
+    JobQueue,
+)
 
 # Globals
 UI_TAB_SUFFIX = "_tab"
@@ -43,22 +58,58 @@ UI_GROUPBOX_SUFFIX = "_groupbox"
 UI_SUFFIXES = [UI_TAB_SUFFIX, UI_CBB_SUFFIX, UI_CHECKBOX_SUFFIX, UI_GROUPBOX_SUFFIX]
 
 
+# Field Class
+class Field:
+    """
+    A DPAM setting widget on a tab, with the qualified name of its settings
+    XML element. checkboxes are the bits of a groupbox value, in bit order.
+    """
+
+    __slots__ = ("widget", "name", "tag", "checkboxes")
+
+    def __init__(self, widget: QWidget, tag: str):
+        self.widget = widget
+        self.name = widget.objectName()
+        self.tag = tag
+        self.checkboxes: list[QCheckBox] = []
+        if isinstance(widget, QGroupBox):
+            self.checkboxes = widget.findChildren(QCheckBox)
+
+
+# MainWindow Class
 class MainWindow(QMainWindow):
     application_is_closing = Signal()
-
-    def __init__(self, ds, user_data_dir, splash_message=lambda x: None, **kwargs):
+    # Emitted from generation jobs as each generation stage ends
+    generation_span = Signal(int, Span)
+
+    def __init__(
+        self,
+        ds,
+        user_data_dir,
+        splash_message=lambda x: None,
+        ui=None,
+        port_labels=None,
+        **kwargs,
+    ):
         super().__init__()
         self.setWindowTitle(buildinfo.__product__)
         self.ds = ds
         self.user_data_dir = user_data_dir
-        self.ui = load_ui_file(get_data_file_path("uifiles", "mainwindow.ui"))
-        self.worker = None
-        self.action_thread = None
+        # The UI and input VIF port labels may already be loaded during startup
+        self.ui = ui or load_ui_file(get_data_file_path("uifiles", "mainwindow.ui"))
+        self.port_labels: dict[str, list[str] | None] = port_labels or {}
+        # Save As jobs, run on a thread pool
+        self.jobs = JobQueue()
+        self.job_items: dict[int, QTreeWidgetItem] = {}
+        self.job_progress: dict[int, int] = {}
+        self.profile_store: ProfileStore = None
         # Get tabs from UI
         self.tabs = [
             self.ui.tabWidget.widget(index)
             for index in range(self.ui.tabWidget.count())
         ]
+        # Find setting widgets once, since they do not change
+        self.register_fields()
         # Connect Signals and Slots
         self.connect_signals_and_slots()
         # Load user supplied settings from the command line if they exist
@@ -72,6 +123,10 @@ class MainWindow(QMainWindow):
         self.ui.show()
 
     def app_quitting(self):
+        # Stop any generations, removing their partial outputs
+        self.jobs.shutdown()
+        if self.profile_store is not None:
+            self.profile_store.close()
         self.quit()
 
     def quit(self):
@@ -83,12 +138,20 @@ class MainWindow(QMainWindow):
         self.ui.action_quit.triggered.connect(self.quit)
         self.ui.action_export_settings.triggered.connect(self.export_settings)
         self.ui.action_import_settings.triggered.connect(self.import_settings)
+        self.ui.action_save_profile.triggered.connect(self.save_profile)
+        self.ui.action_load_profile.triggered.connect(self.load_profile)
+        self.ui.action_import_profiles.triggered.connect(self.import_profiles)
         self.ui.action_about.triggered.connect(self.show_about)
         self.link_dpam_spec()
 
         # Connect buttons
         self.ui.browse_input_button.clicked.connect(self.browse_input_button)
         self.ui.save_as_button.clicked.connect(self.save_as_output)
+        self.ui.cancel_button.clicked.connect(self.cancel_generation)
+        self.ui.clear_jobs_button.clicked.connect(self.clear_finished_jobs)
+        self.generation_span.connect(self.show_generation_span)
+        self.jobs.job_progress.connect(self.show_job_progress)
+        self.jobs.job_state.connect(self.show_job_state)
 
         # Connect line edits
         self.ui.input_line_edit.textChanged.connect(
@@ -107,22 +170,45 @@ class MainWindow(QMainWindow):
             self.save_to_store(store_label, value)
 
         # Connect tab controls
-        for tab in self.tabs:
-            # Connect comboboxes
-            for cbb in tab.findChildren(QComboBox):
-                cbb.currentIndexChanged.connect(
-                    lambda x, cbb_name=cbb.objectName(): port_widget_changed(
+        for widget in self.port_widgets:
+            if isinstance(widget, QComboBox):
+                widget.currentIndexChanged.connect(
+                    lambda x, cbb_name=widget.objectName(): port_widget_changed(
                         cbb_name, x
                     )
                 )
-            # Connect checkboxes
-            for checkbox in tab.findChildren(QCheckBox):
-                checkbox.stateChanged.connect(
-                    lambda x, checkbox_name=checkbox.objectName(): port_widget_changed(
+            else:
+                widget.stateChanged.connect(
+                    lambda x, checkbox_name=widget.objectName(): port_widget_changed(
                         checkbox_name, x
                     )
                 )
 
+    def register_fields(self):
+        # Map each tab's settings XML element name to its fields
+        self.tab_fields: dict[str, list[Field]] = {}
+        # Widgets with a value stored per port, including groupbox checkboxes
+        self.port_widgets: list[QComboBox | QCheckBox] = []
+        for tab in self.tabs:
+            tab_tag = self.qualify_name(
+                "opt", self.sanitize_widget_name(tab.objectName().replace(" ", "_"))
+            )
+            self.tab_fields[tab_tag] = [
+                Field(
+                    widget,
+                    self.qualify_name(
+                        "opt", self.sanitize_widget_name(widget.objectName())
+                    ),
+                )
+                for widget in tab.findChildren(
+                    QWidget, options=Qt.FindChildOption.FindDirectChildrenOnly
+                )
+                # Skip labels
+                if isinstance(widget, (QComboBox, QCheckBox, QGroupBox))
+            ]
+            self.port_widgets.extend(tab.findChildren(QComboBox))
+            self.port_widgets.extend(tab.findChildren(QCheckBox))
+
     def load_user_args(self, **kwargs):
         # Log parameters
         logging.debug(f"Initializing GUI with the following parameters: {kwargs}")
@@ -171,25 +257,24 @@ class MainWindow(QMainWindow):
             self.populate_from_input_vif(ds_input_vif)
 
     def port_label_changed(self, port_value):
-        # Attempt to load port data from store
-        def get_port_widget_data(widget_name: str):
-            store_label = "{}_{}".format(widget_name, port_value)
-            return self.get_from_store(store_label)
-
-        # Update tab controls
-        for tab in self.tabs:
-            for cbb in tab.findChildren(QComboBox):
-                cbb_index = get_port_widget_data(cbb.objectName())
-                if cbb_index:
-                    cbb.setCurrentIndex(cbb_index)
-                else:
-                    cbb.setCurrentIndex(0)
-            for checkbox in tab.findChildren(QCheckBox):
-                checkbox_state = get_port_widget_data(checkbox.objectName())
-                if checkbox_state:
-                    checkbox.setCheckState(Qt.CheckState(checkbox_state))
+        # Update tab controls from port data in store, repainting once. Signals
+        # are blocked since the values shown are already stored
+        self.ui.tabWidget.setUpdatesEnabled(False)
+        try:
+            for widget in self.port_widgets:
+                value = self.get_from_store(
+                    "{}_{}".format(widget.objectName(), port_value)
+                )
+                widget.blockSignals(True)
+                if isinstance(widget, QComboBox):
+                    widget.setCurrentIndex(value if value else 0)
+                elif value:
+                    widget.setCheckState(Qt.CheckState(value))
                 else:
-                    checkbox.setCheckState(Qt.CheckState.Unchecked)
+                    widget.setCheckState(Qt.CheckState.Unchecked)
+                widget.blockSignals(False)
+        finally:
+            self.ui.tabWidget.setUpdatesEnabled(True)
 
     def browse_input_button(self):
         # Get user input filename
@@ -205,20 +290,29 @@ class MainWindow(QMainWindow):
         # User selected a file
         self.populate_from_input_vif(filename)
 
+    @staticmethod
+    def read_port_labels(input_vif_filename: str) -> list[str] | None:
+        """Get the port labels of an input VIF, or None if it fails to load"""
+        # Attempt to scan file as VIF. File may no longer exist
+        try:
+            return script.DPAMVIFGenerator.load_port_labels(input_vif_filename)
+        except script.InvalidInputVIF:
+            return None
+
     def populate_from_input_vif(self, input_vif_filename):
         filename = os.path.abspath(input_vif_filename)
         self.ui.input_line_edit.setText(filename)
-        # Attempt to load file as VIF. File may no longer exist
-        try:
-            input_vif = script.DPAMVIFGenerator.load_input_vif(filename)
-        except script.InvalidInputVIF:
+        # Use port labels read during startup once, as the file may change later
+        if filename in self.port_labels:
+            port_labels = self.port_labels.pop(filename)
+        else:
+            port_labels = self.read_port_labels(filename)
+        if port_labels is None:
             # Just return to allow user to try again
             return
         # Populate ports list
         self.ui.port_label_cbb.clear()
-        prefix_map = {"vif": "http://usb.org/VendorInfoFile.xsd"}
-        for port in input_vif.getroot().findall(".//vif:Component", prefix_map):
-            self.ui.port_label_cbb.addItem(port.find("vif:Port_Label", prefix_map).text)
+        self.ui.port_label_cbb.addItems(port_labels)
         # Activate UI elements
         self.ui.port_label_cbb.setEnabled(True)
         for tab in self.tabs:
@@ -240,58 +334,106 @@ class MainWindow(QMainWindow):
         filename = os.path.abspath(filename)
         self.save_to_store("user_path_to_output", filename)
 
-        # Define action thread
-        def generate_output_vif_xml(progress: QProgressBar):
-            try:
-                # Set status text and progress
-                progress.setValue(0)
-                self.ui.save_status_label.setText(
-                    """<p>
-                        <span style=" font-weight:700;">
-                            Status
-                        </span>: Generating DPAM VIF Settings
-                    </p>"""
-                )
+        # Generate DPAM Settings XML from the UI before leaving the UI thread,
+        # so later changes in the UI do not affect queued jobs
+        settings = self.generate_settings()
+        in_vif = self.ui.input_line_edit.text()
+
+        # Define job, which updates the UI only through signals
+        def generate_output_vif_xml(job: Job):
+            script.main(
+                **{
+                    "in_vif": in_vif,
+                    "out_vif": filename,
+                    "settings": settings,
+                    "progress": job.set_progress,
+                    "tracer": Tracer(
+                        listener=lambda span: self.generation_span.emit(job.id, span)
+                    ),
+                    "cancel_token": job.cancel_token,
+                    # Skip parsing the input VIF again on later Save As
+                    "document_cache": script.DOCUMENT_CACHE,
+                }
+            )
 
-                # Generate DPAM Settings XML file
-                settings = self.generate_settings()
-                progress.setValue(100)
-
-                # Generate output VIF XML file
-                self.ui.save_status_label.setText(
-                    """<p>
-                        <span style=" font-weight:700;">
-                            Status
-                        </span>: Generating DPAM VIF XML
-                    </p>"""
-                )
-                script.main(
-                    **{
-                        "in_vif": self.ui.input_line_edit.text(),
-                        "out_vif": filename,
-                        "settings": settings,
-                        "progress": progress.setValue,
-                    }
+        # Add job to the queue, replacing any unfinished job for the same file
+        item = QTreeWidgetItem([os.path.basename(filename), "", JOB_QUEUED])
+        item.setToolTip(0, filename)
+        self.ui.job_queue_tree.addTopLevelItem(item)
+        progress_bar = QProgressBar()
+        progress_bar.setValue(0)
+        self.ui.job_queue_tree.setItemWidget(item, 1, progress_bar)
+        if not self.jobs.get_active():
+            # Overall progress covers the jobs queued since the queue was idle
+            self.job_progress = {}
+        job = self.jobs.submit(generate_output_vif_xml, key=filename)
+        self.job_items[job.id] = item
+        self.job_progress[job.id] = 0
+        self.update_generation_status()
+
+    def cancel_generation(self):
+        # Cancel the selected jobs, or every unfinished job if none are selected
+        selected = [
+            job_id
+            for job_id, item in self.job_items.items()
+            if item.isSelected() and job_id in self.jobs.jobs
+        ]
+        if not any(not self.jobs.jobs[job_id].is_finished() for job_id in selected):
+            selected = [job.id for job in self.jobs.get_active()]
+        for job_id in selected:
+            self.jobs.cancel(job_id)
+
+    def clear_finished_jobs(self):
+        self.jobs.remove_finished()
+        for job_id in list(self.job_items):
+            if job_id not in self.jobs.jobs:
+                item = self.job_items.pop(job_id)
+                self.ui.job_queue_tree.takeTopLevelItem(
+                    self.ui.job_queue_tree.indexOfTopLevelItem(item)
                 )
+        self.update_generation_status()
 
-                # Clean up settings file
-                os.remove(settings)
-            except Exception as e:
-                # Block thread finished since generation errored
-                self.action_thread.blockSignals(True)
-                logging.error("Error: Generation Failed. {}".format(e))
-                self.ui.save_status_label.setText(
-                    """<p>
-                        <span style=" font-weight:700;">
-                            Error
-                        </span>: Generation Failed. {}
-                    </p>""".format(
-                        e
-                    )
-                )
+    def show_job_progress(self, job_id: int, value: int):
+        item = self.job_items.get(job_id)
+        if item is None:
+            return
+        self.ui.job_queue_tree.itemWidget(item, 1).setValue(value)
+        if job_id in self.job_progress:
+            self.job_progress[job_id] = value
+            self.ui.save_progress_bar.setValue(
+                sum(self.job_progress.values()) // len(self.job_progress)
+            )
 
-        def generation_complete():
-            # Set status text
+    def show_job_state(self, job_id: int, state: str, message: str):
+        item = self.job_items.get(job_id)
+        if item is None:
+            return
+        item.setText(2, "{}. {}".format(state, message) if message else state)
+        item.setToolTip(2, message)
+        if state == JOB_COMPLETE:
+            self.show_job_progress(job_id, 100)
+        elif state in JOB_FINISHED_STATES and job_id in self.job_progress:
+            # Stopped jobs count as done towards overall progress
+            self.job_progress[job_id] = 100
+        self.update_generation_status(job_id, state, message)
+
+    def update_generation_status(
+        self, job_id: int = None, state: str = None, message: str = ""
+    ):
+        active = len(self.jobs.get_active())
+        self.ui.cancel_button.setEnabled(active > 0)
+        self.ui.clear_jobs_button.setEnabled(len(self.jobs.jobs) > active)
+        if active:
+            self.ui.save_status_label.setText(
+                """<p>
+                    <span style=" font-weight:700;">
+                        Status
+                    </span>: Generating {} DPAM VIF XML File{}
+                </p>""".format(
+                    active, "s" if active > 1 else ""
+                )
+            )
+        elif state == JOB_COMPLETE:
             self.ui.save_status_label.setText(
                 """<p>
                     <span style=" font-weight:700;">
@@ -299,61 +441,53 @@ class MainWindow(QMainWindow):
                     </span>: Generation Complete
                 </p>"""
             )
+        elif state == JOB_CANCELLED:
+            self.ui.save_progress_bar.setValue(0)
+            self.ui.save_status_label.setText(
+                """<p>
+                    <span style=" font-weight:700;">
+                        Status
+                    </span>: Generation Cancelled
+                </p>"""
+            )
+        elif state == JOB_FAILED:
+            self.ui.save_status_label.setText(
+                """<p>
+                    <span style=" font-weight:700;">
+                        Error
+                    </span>: Generation Failed. {}
+                </p>""".format(
+                    message
+                )
+            )
 
-        # Setup thread to generate VIF
-        self.worker = Worker()
-        self.action_thread = QThread()
-        self.worker.moveToThread(self.action_thread)
-        # Connect worker signals and slots
-        self.worker.action.connect(generate_output_vif_xml)
-        self.worker.finished.connect(self.action_thread.quit)
-        # Connect thread signals and slots
-        self.action_thread.started.connect(
-            lambda: self.worker.run(self.ui.save_progress_bar)
+    def show_generation_span(self, job_id: int, span: Span):
+        logging.debug("Generation stage {}".format(span.describe()))
+        item = self.job_items.get(job_id)
+        if item is None:
+            return
+        tooltip = item.toolTip(1)
+        item.setToolTip(
+            1, "{}\n{}".format(tooltip, span.describe()) if tooltip else span.describe()
         )
-        self.action_thread.finished.connect(generation_complete)
-        # Start thread
-        self.action_thread.start()
 
     def save_to_store(self, name: str, value):
+        # The datastore is in memory and saves changes to disk in batches
         self.ds[name] = value
-        logging.debug("Stored {} with value {}".format(name, value))
+        logging.debug("Stored %s with value %s", name, value)
 
     def get_from_store(self, name: str):
         try:
             value = self.ds.get(name, "")
         except Exception:
             value = ""
-        logging.debug("Retrieved {} with value {}".format(name, value))
+        logging.debug("Retrieved %s with value %s", name, value)
         return value
 
-    def generate_settings(self):
-        # Get default DP XML
-        default_xml_string = """<?xml version="1.0" encoding="utf-8"?>
-<vif:VIF xmlns:vif="http://usb.org/VendorInfoFile.xsd">
-  <vif:VIF_Specification>{vif_spec}</vif:VIF_Specification>
-  <vif:VIF_App>
-    <vif:Vendor>{vif_vendor}</vif:Vendor>
-    <vif:Name>{vif_name}</vif:Name>
-    <vif:Version>{vif_version}</vif:Version>
-  </vif:VIF_App>
-</vif:VIF>
-        """.format(
-            vif_spec="3.25",
-            vif_vendor=str(buildinfo.__company__),
-            vif_name=str(buildinfo.__product__),
-            vif_version=str(buildinfo.__version__),
-        )  # noqa: E501
-
-        # Create ElementTree from xml string
-        settings_tree = ET.ElementTree(ET.fromstring(default_xml_string))
+    def generate_settings(self) -> ET.ElementTree:
+        # Get empty DPAM Settings XML
+        settings_tree = script.DPAMVIFGenerator.create_dpam_settings()
         vif_root = settings_tree.getroot()
-        # Register namespaces and add to root
-        prefix_map = script.DPAMVIFGenerator.get_prefix_map()
-        for name, namespace in prefix_map.items():
-            ET.register_namespace(name, namespace)
-            if name != "vif":  # xmlns:vif included in default xml string
-                vif_root.attrib["xmlns:" + name] = namespace
 
         # Update based on user provided arguments
         ports = [
@@ -364,14 +498,17 @@ class MainWindow(QMainWindow):
         # Get current values for each port from datastore
         for port_value, port_label in enumerate(ports):
             # Add Component and Port_Label elements
-            component_root = ET.Element("vif:Component")
+            component_root = ET.Element(self.qualify_name("vif", "Component"))
             vif_root.append(component_root)
-            port_label_element = ET.Element("vif:Port_Label")
+            port_label_element = ET.Element(self.qualify_name("vif", "Port_Label"))
             port_label_element.text = str(port_label)
             component_root.append(port_label_element)
 
             # Create optional content root
-            opt_content_root = ET.Element("opt:OptionalContent", identifier="DPAM")
+            opt_content_root = ET.Element(
+                self.qualify_name("opt", "OptionalContent"),
+                identifier=script.DPAM_IDENTIFIER,
+            )
             opt_content_root.set(
                 "{http://www.w3.org/XML/1998/namespace}space", "preserve"
             )
@@ -383,83 +520,57 @@ class MainWindow(QMainWindow):
             opt_content_root.append(ET.Comment(comment_line))
 
             # Add in tab and field elements
-            for tab in self.tabs:
-                tab_root = ET.Element(
-                    "opt:{}".format(
-                        tab.objectName().replace(" ", "_").removesuffix(UI_TAB_SUFFIX)
-                    )
-                )
-                opt_content_root.append(tab_root)
-                for field in tab.findChildren(
-                    QWidget, options=Qt.FindChildOption.FindDirectChildrenOnly
-                ):
+            for tab_tag, fields in self.tab_fields.items():
+                tab_root = ET.SubElement(opt_content_root, tab_tag)
+                for field in fields:
                     # Generate XML elements for each field
-                    element = self.generate_element(field, port_value)
-                    if element is not None:
-                        tab_root.append(element)
-
-        # Write to local file
-        settings = os.path.join(self.user_data_dir, "settings_new.xml")
-        ET.indent(settings_tree, space=XML_INDENT, level=0)
-        settings_tree.write(settings, encoding="utf8", method="xml")
-        # Return settings file path
-        return settings
-
-    def generate_element(self, field, port_value: int) -> ET.Element | None:
-        if isinstance(field, QComboBox):
+                    tab_root.append(self.generate_element(field, port_value))
+
+        # Return settings tree to be used in memory or exported
+        return settings_tree
+
+    def generate_element(self, field: Field, port_value: int) -> ET.Element:
+        if isinstance(field.widget, QComboBox):
             return self.generate_cbb_element(field, port_value)
-        elif isinstance(field, QCheckBox):
+        elif isinstance(field.widget, QCheckBox):
             return self.generate_checkbox_element(field, port_value)
-        elif isinstance(field, QGroupBox):
-            return self.generate_groupbox_element(field, port_value)
         else:
-            # Skip labels
-            return None
+            return self.generate_groupbox_element(field, port_value)
 
-    def generate_cbb_element(self, field: QComboBox, port_value: int) -> ET.Element:
-        # Get field name, current index value, and text from ComboBox
-        field_name = field.objectName()
+    def generate_cbb_element(self, field: Field, port_value: int) -> ET.Element:
+        # Get current index value and text from ComboBox
         try:
             index_value = int(
-                self.get_from_store("{}_{}".format(field_name, port_value))
+                self.get_from_store("{}_{}".format(field.name, port_value))
             )
         except ValueError:
             index_value = 0
-        text = field.itemText(index_value)
+        text = field.widget.itemText(index_value)
         # Build element
-        element_name = "opt:{}".format(self.sanitize_widget_name(field_name))
-        element = ET.Element(element_name, value=str(index_value))
+        element = ET.Element(field.tag, value=str(index_value))
         element.text = str(text)
         # Return built element
         return element
 
-    def generate_checkbox_element(
-        self, field: QCheckBox, port_value: int
-    ) -> ET.Element:
-        # Get field name and checked state
-        field_name = field.objectName()
+    def generate_checkbox_element(self, field: Field, port_value: int) -> ET.Element:
+        # Get checked state
         try:
             checkbox_state = Qt.CheckState(
-                self.get_from_store("{}_{}".format(field_name, port_value))
+                self.get_from_store("{}_{}".format(field.name, port_value))
             )
         except ValueError:
             checkbox_state = Qt.CheckState.Unchecked
         # Build element
-        element_name = "opt:{}".format(self.sanitize_widget_name(field_name))
         value_string = "true" if checkbox_state == Qt.CheckState.Checked else "false"
-        element = ET.Element(element_name, value=value_string)
+        element = ET.Element(field.tag, value=value_string)
         # Return built element
         return element
 
-    def generate_groupbox_element(
-        self, field: QGroupBox, port_value: int
-    ) -> ET.Element:
-        # Get field name
-        field_name = field.objectName()
+    def generate_groupbox_element(self, field: Field, port_value: int) -> ET.Element:
         # Calculate the bit group value from groupbox checkbox fields
         group_value = 0x0
         text_list = []
-        for index, checkbox in enumerate(field.findChildren(QCheckBox)):
+        for index, checkbox in enumerate(field.checkboxes):
             checkbox_name = checkbox.objectName()
             try:
                 checkbox_state = Qt.CheckState(
@@ -471,12 +582,16 @@ class MainWindow(QMainWindow):
                 group_value |= 1 << index
                 text_list.append(self.sanitize_widget_name(checkbox_name))
         # Build element
-        element_name = "opt:{}".format(self.sanitize_widget_name(field_name))
-        element = ET.Element(element_name, value=str(group_value))
+        element = ET.Element(field.tag, value=str(group_value))
         element.text = ", ".join(text_list)
         # Return built element
         return element
 
+    def qualify_name(self, prefix: str, name: str) -> str:
+        """Get the namespace qualified ElementTree name for a prefixed name"""
+        namespace = script.DPAMVIFGenerator.get_prefix_map()[prefix]
+        return "{{{}}}{}".format(namespace, name)
+
     def sanitize_widget_name(self, widget_name: str) -> str:
         """Remove UI suffixes from widget name"""
         for suffix in UI_SUFFIXES:
@@ -499,11 +614,9 @@ class MainWindow(QMainWindow):
         filename = os.path.abspath(filename)
         self.save_to_store("export_settings_file_path", filename)
 
-        # Generate settings
-        settings = self.generate_settings()
-
-        # Move settings to filename path
-        shutil.move(settings, filename)
+        # Generate settings and write to filename path
+        settings_tree = self.generate_settings()
+        script.DPAMVIFGenerator.write_output_vif(settings_tree, filename)
 
     def import_settings(self):
         # Get user input settings XML
@@ -524,85 +637,188 @@ class MainWindow(QMainWindow):
         # Load settings from input XML
         self.populate_settings_from_input_xml(filename)
 
+    def get_profile_store(self) -> ProfileStore | None:
+        # Open the profile store on first use, keeping startup fast
+        if self.profile_store is None:
+            try:
+                self.profile_store = ProfileStore(
+                    get_profile_store_path(self.user_data_dir)
+                )
+            except InvalidProfileStore:
+                return None
+        return self.profile_store
+
+    def save_profile(self):
+        store = self.get_profile_store()
+        if store is None:
+            return
+        # Get product and profile name, defaulting to the last ones saved
+        input_vif = os.path.basename(self.ui.input_line_edit.text())
+        names = ProfileDialog(
+            store,
+            self,
+            save=True,
+            product=self.get_from_store("profile_product")
+            or os.path.splitext(input_vif)[0],
+            name=self.get_from_store("profile_name") or "",
+        ).get_names()
+        # Return if no names were provided
+        if names is None:
+            return
+        product, name = names
+        self.save_to_store("profile_product", product)
+        self.save_to_store("profile_name", name)
+
+        # Save settings of every port from the UI
+        store.save_profile(product, name, self.generate_settings())
+
+    def load_profile(self):
+        store = self.get_profile_store()
+        if store is None:
+            return
+        profile = ProfileDialog(store, self).get_profile()
+        # Return if no profile was picked
+        if profile is None:
+            return
+        self.save_to_store("profile_product", profile.product)
+        self.save_to_store("profile_name", profile.name)
+
+        # Load settings from profile
+        self.apply_port_settings(store.load_profile(profile.id))
+
+    def import_profiles(self):
+        store = self.get_profile_store()
+        if store is None:
+            return
+        # Get user folder of Settings XML files
+        directory = QFileDialog.getExistingDirectory(
+            parent=self,
+            caption="Select Settings Folder",
+            dir=self.get_from_store("import_profiles_directory"),
+        )
+        # Return if no folder was selected
+        if directory == "":
+            return
+
+        # User selected a folder
+        directory = os.path.abspath(directory)
+        self.save_to_store("import_profiles_directory", directory)
+
+        # Import each Settings XML in the folder as a profile
+        profiles, skipped = store.import_directory(directory)
+        QMessageBox.information(
+            self,
+            "Import Profiles",
+            "Imported {} profiles from {}.{}".format(
+                len(profiles),
+                directory,
+                " Skipped {} files without DPAM settings.".format(len(skipped))
+                if skipped
+                else "",
+            ),
+        )
+
+    @staticmethod
+    def load_settings_file(filename: str) -> dict[str, ET.Element]:
+        # Get port DPAM settings from DPAM Settings XML
+        dpam_settings = script.DPAMVIFGenerator.load_input_vif(filename)
+        return script.DPAMVIFGenerator.get_port_settings_from_vif(dpam_settings)
+
     def populate_settings_from_input_xml(self, filename):
-        # Attempt to load file as VIF. File may no longer exist
+        # Attempt to load file as VIF, reusing it if imported before unchanged.
+        # File may no longer exist
         try:
-            dpam_settings = script.DPAMVIFGenerator.load_input_vif(filename)
-        except script.InvalidInputVIF:
+            port_settings = script.DOCUMENT_CACHE.get(
+                filename, "imported_settings", self.load_settings_file
+            )
+        except (script.InvalidInputVIF, script.InvalidSettingsXML):
             # Just return to allow user to try again
             return
 
-        # Get port DPAM settings from DPAM Settings XML
-        prefix_map = script.DPAMVIFGenerator.get_prefix_map()
-        port_settings = script.DPAMVIFGenerator.get_port_settings_from_vif(
-            dpam_settings
-        )
+        self.apply_port_settings(port_settings)
 
-        # Apply settings for each port
-        current_port = self.ui.port_label_cbb.currentIndex()
-        ports = [
-            self.ui.port_label_cbb.itemText(i)
-            for i in range(self.ui.port_label_cbb.count())
-        ]
-        for port_value, port_label in enumerate(ports):
-            self.ui.port_label_cbb.setCurrentIndex(port_value)
+    def apply_port_settings(self, port_settings: dict[str, ET.Element]):
+        # Store settings for each port directly, without switching ports in the UI
+        for port_value in range(self.ui.port_label_cbb.count()):
+            port_label = self.ui.port_label_cbb.itemText(port_value)
             # Skip if port does not exist in port settings
-            if port_label not in port_settings:
+            if port_settings.get(port_label) is None:
                 continue
-            # Apply all fields from port settings that exist in UI
-            for tab in self.tabs:
-                tab_name = self.sanitize_widget_name(tab.objectName())
-                for field in tab.findChildren(
-                    QWidget, options=Qt.FindChildOption.FindDirectChildrenOnly
-                ):
-                    # Grab setting from port settings for field
-                    field_name = self.sanitize_widget_name(field.objectName())
-                    field_setting = port_settings[port_label].find(
-                        f".//opt:{tab_name}/opt:{field_name}", prefix_map
-                    )
-                    # Apply field setting to UI
-                    self.apply_field_setting(field, field_setting)
-        # Restore current port selection
-        self.ui.port_label_cbb.setCurrentIndex(current_port)
-
-    def apply_field_setting(self, field: QWidget | None, field_setting: ET.Element):
-        if isinstance(field, QComboBox):
-            self.apply_cbb_setting(field, field_setting)
-        elif isinstance(field, QCheckBox):
-            self.apply_checkbox_setting(field, field_setting)
-        elif isinstance(field, QGroupBox):
-            self.apply_groupbox_setting(field, field_setting)
-
-    def apply_cbb_setting(self, field: QComboBox, field_setting: ET.Element):
+            field_settings = self.get_field_settings(port_settings[port_label])
+            # Store all fields from port settings that exist in UI
+            for tab_tag, fields in self.tab_fields.items():
+                for field in fields:
+                    field_setting = field_settings.get((tab_tag, field.tag))
+                    if field_setting is not None:
+                        self.store_field_setting(field, field_setting, port_value)
+
+        # Refresh widgets once for the current port
+        if self.ui.port_label_cbb.count():
+            self.port_label_changed(self.ui.port_label_cbb.currentIndex())
+
+    def get_field_settings(
+        self, port_setting: ET.Element
+    ) -> dict[tuple[str, str], ET.Element]:
+        """Index port setting fields by (tab element name, field element name)"""
+        field_settings: dict[tuple[str, str], ET.Element] = {}
+        # Elements are visited in document order, so the first match is kept
+        for tab_setting in port_setting.iter():
+            for field_setting in tab_setting:
+                field_settings.setdefault(
+                    (tab_setting.tag, field_setting.tag), field_setting
+                )
+        return field_settings
+
+    def store_field_setting(
+        self, field: Field, field_setting: ET.Element, port_value: int
+    ):
+        if isinstance(field.widget, QComboBox):
+            self.store_cbb_setting(field, field_setting, port_value)
+        elif isinstance(field.widget, QCheckBox):
+            self.store_checkbox_setting(field, field_setting, port_value)
+        else:
+            self.store_groupbox_setting(field, field_setting, port_value)
+
+    def store_cbb_setting(
+        self, field: Field, field_setting: ET.Element, port_value: int
+    ):
         try:
-            value = field_setting.attrib["value"]
-            field.setCurrentIndex(int(value))
+            value = int(field_setting.attrib["value"])
         except Exception:
             # Skip any malformed settings and keep trying to load
             return
-
-    def apply_checkbox_setting(self, field: QCheckBox, field_setting: ET.Element):
-        try:
-            if field_setting.attrib["value"] == "false":
-                field.setCheckState(Qt.CheckState.Unchecked)
-            elif field_setting.attrib["value"] == "true":
-                field.setCheckState(Qt.CheckState.Checked)
-        except Exception:
+        if 0 <= value < field.widget.count():
+            self.save_to_store("{}_{}".format(field.name, port_value), value)
+
+    def store_checkbox_setting(
+        self, field: Field, field_setting: ET.Element, port_value: int
+    ):
+        value = field_setting.attrib.get("value")
+        if value == "false":
+            checkbox_state = Qt.CheckState.Unchecked
+        elif value == "true":
+            checkbox_state = Qt.CheckState.Checked
+        else:
             # Skip any malformed settings and keep trying to load
             return
+        self.save_to_store("{}_{}".format(field.name, port_value), checkbox_state.value)
 
-    def apply_groupbox_setting(self, field: QGroupBox, field_setting: ET.Element):
+    def store_groupbox_setting(
+        self, field: Field, field_setting: ET.Element, port_value: int
+    ):
         try:
             value = int(field_setting.attrib["value"])
-            for index, checkbox in enumerate(field.findChildren(QCheckBox)):
-                checkbox_value = value & (1 << index)
-                if checkbox_value:
-                    checkbox.setCheckState(Qt.CheckState.Checked)
-                else:
-                    checkbox.setCheckState(Qt.CheckState.Unchecked)
         except Exception:
             # Skip any malformed settings and keep trying to load
             return
+        for index, checkbox in enumerate(field.checkboxes):
+            if value & (1 << index):
+                checkbox_state = Qt.CheckState.Checked
+            else:
+                checkbox_state = Qt.CheckState.Unchecked
+            self.save_to_store(
+                "{}_{}".format(checkbox.objectName(), port_value), checkbox_state.value
+            )
 
     def show_about(self):
         about_dialog = AboutDialog(self)
@@ -0,0 +1,125 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import datetime
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QDialog, QDialogButtonBox, QTreeWidgetItem
+
+from dpamvifgenerator.profiles import Profile, ProfileStore
+from dpamvifgenerator.utility import get_data_file_path, load_ui_file
+
+
+class ProfileDialog(QDialog):
+    """
+    Pick a profile from the store, searching by product or profile name. In
+    save mode, product and profile name are entered instead, and picking a
+    profile fills them in to replace it.
+    """
+
+    def __init__(
+        self,
+        store: ProfileStore,
+        parent=None,
+        save: bool = False,
+        product: str = "",
+        name: str = "",
+    ):
+        super().__init__(parent)
+        self.store = store
+        self.save = save
+        self.ui = load_ui_file(get_data_file_path("uifiles", "profiles.ui"))
+        # Connect Signals and Slots
+        self.connect_signals_and_slots()
+        # Initialize UI
+        self.initialize_ui(product, name)
+
+    def connect_signals_and_slots(self):
+        self.ui.button_box.accepted.connect(self.ui.accept)
+        self.ui.button_box.rejected.connect(self.ui.reject)
+        self.ui.search_line_edit.textChanged.connect(self.refresh)
+        self.ui.profiles_tree.itemSelectionChanged.connect(self.profile_selected)
+        self.ui.profiles_tree.itemDoubleClicked.connect(self.ui.accept)
+        self.ui.delete_button.clicked.connect(self.delete_profile)
+        self.ui.product_line_edit.textChanged.connect(self.update_ok_button)
+        self.ui.name_line_edit.textChanged.connect(self.update_ok_button)
+
+    def initialize_ui(self, product: str, name: str):
+        self.ui.setWindowTitle("Save Profile" if self.save else "Load Profile")
+        for widget in (
+            self.ui.product_label,
+            self.ui.product_line_edit,
+            self.ui.name_label,
+            self.ui.name_line_edit,
+        ):
+            widget.setVisible(self.save)
+        self.ui.product_line_edit.setText(product)
+        self.ui.name_line_edit.setText(name)
+        self.refresh()
+
+    def refresh(self):
+        tree = self.ui.profiles_tree
+        tree.setSortingEnabled(False)
+        tree.clear()
+        for profile in self.store.search(self.ui.search_line_edit.text()):
+            modified = datetime.datetime.fromtimestamp(profile.modified)
+            item = QTreeWidgetItem(
+                [
+                    profile.product,
+                    profile.name,
+                    str(profile.ports),
+                    modified.strftime("%Y-%m-%d %H:%M"),
+                ]
+            )
+            item.setData(0, Qt.UserRole, profile)
+            tree.addTopLevelItem(item)
+        tree.setSortingEnabled(True)
+        self.profile_selected()
+
+    def get_selected(self) -> Profile | None:
+        items = self.ui.profiles_tree.selectedItems()
+        return items[0].data(0, Qt.UserRole) if items else None
+
+    def profile_selected(self):
+        profile = self.get_selected()
+        self.ui.delete_button.setEnabled(profile is not None)
+        if self.save and profile is not None:
+            self.ui.product_line_edit.setText(profile.product)
+            self.ui.name_line_edit.setText(profile.name)
+        self.update_ok_button()
+
+    def update_ok_button(self):
+        if self.save:
+            enabled = bool(
+                self.ui.product_line_edit.text().strip()
+                and self.ui.name_line_edit.text().strip()
+            )
+        else:
+            enabled = self.get_selected() is not None
+        self.ui.button_box.button(QDialogButtonBox.Ok).setEnabled(enabled)
+
+    def delete_profile(self):
+        profile = self.get_selected()
+        if profile is not None:
+            self.store.delete_profile(profile.id)
+            self.refresh()
+
+    def get_profile(self) -> Profile | None:
+        """Show the dialog, returning the picked profile when loading"""
+        if self.ui.exec() != QDialog.Accepted:
+            return None
+        return self.get_selected()
+
+    def get_names(self) -> tuple[str, str] | None:
+        """Show the dialog, returning the product and name entered when saving"""
+        if self.ui.exec() != QDialog.Accepted:
+            return None
+        return (
+            self.ui.product_line_edit.text().strip(),
+            self.ui.name_line_edit.text().strip(),
+        )
@@ -0,0 +1,228 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import codecs
+import glob
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator import script
+from dpamvifgenerator.batch import InvalidBatchSource, init_worker
+
+# Extract Consts
+XML_ENCODING_DECLARATION = re.compile(
+    rb"""^\s*<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z][\w.-]*)["']"""
+)
+
+
+# Extract Job Classes
+@dataclass
+class ExtractJob:
+    in_vif: str
+    out_settings: str
+
+
+@dataclass
+class ExtractResult:
+    job: ExtractJob
+    success: bool
+    ports: int = 0
+    error: str = ""
+    duration: float = 0.0
+
+
+def load_extract_jobs(source: str, out_dir: str) -> list:
+    """
+    Build one extraction job per VIF in source, which is a directory searched
+    recursively for *.xml files, or a glob pattern. Each Settings XML is
+    written under out_dir with the same file name as its VIF, in the same
+    sub-folder for directory sources.
+    """
+    if not source or not out_dir:
+        error = (
+            "Error: Extraction requires VIFs (--extract) and an output directory (-o)"
+        )
+        logging.error(error)
+        raise script.MissingGeneratorArg(error)
+    if os.path.isdir(source):
+        root = source
+        inputs = glob.glob(
+            os.path.join(glob.escape(source), "**", "*.xml"), recursive=True
+        )
+    else:
+        root = None
+        inputs = glob.glob(source)
+    if not inputs:
+        error = "Error: No VIF files found to extract from: {}".format(source)
+        logging.error(error)
+        raise InvalidBatchSource(error)
+    out_dir = os.path.abspath(out_dir)
+    jobs = []
+    for in_vif in sorted(inputs):
+        name = os.path.relpath(in_vif, root) if root else os.path.basename(in_vif)
+        in_vif = os.path.abspath(in_vif)
+        if os.path.commonpath((in_vif, out_dir)) == out_dir:
+            # Skip Settings XML written by an earlier extraction
+            continue
+        out_settings = os.path.join(out_dir, name)
+        if out_settings == in_vif:
+            error = (
+                "Error: Extraction output directory must differ from the VIF "
+                "directory: {}".format(out_dir)
+            )
+            logging.error(error)
+            raise InvalidBatchSource(error)
+        jobs.append(ExtractJob(in_vif, out_settings))
+    if len({job.out_settings for job in jobs}) != len(jobs):
+        error = "Error: VIFs to extract from must have unique file names"
+        logging.error(error)
+        raise InvalidBatchSource(error)
+    return jobs
+
+
+def get_parser_encoding(head: bytes) -> str | None:
+    """
+    Get the encoding to override a document's declared encoding with, for
+    UTF-8 declared by an alias expat does not know, e.g. "utf8" as written by
+    earlier versions of this tool
+    """
+    match = XML_ENCODING_DECLARATION.match(head)
+    if match is None:
+        return None
+    try:
+        if codecs.lookup(match.group(1).decode("ascii")).name == "utf-8":
+            return "utf-8"
+    except LookupError:
+        pass
+    return None
+
+
+def extract_port_settings(in_vif: str) -> dict[str, ET.Element]:
+    """
+    Stream through a generated VIF, collecting the DPAM opt:OptionalContent
+    of each port by port label. Only one vif:Component is held in memory at
+    a time. Ports without DPAM content, including ports with only their own
+    optional content, are left out.
+    """
+    prefix_map = script.DPAMVIFGenerator.get_prefix_map()
+    component_tag = "{{{}}}Component".format(prefix_map["vif"])
+    port_settings: dict[str, ET.Element] = {}
+    try:
+        with open(in_vif, "rb") as in_file:
+            parser = ET.XMLParser(
+                target=ET.TreeBuilder(insert_comments=True),
+                encoding=get_parser_encoding(in_file.peek(1024)),
+            )
+            root = None
+            depth = 0
+            for event, elem in ET.iterparse(in_file, ("start", "end"), parser):
+                if event == "start":
+                    root = elem if root is None else root
+                    depth += 1
+                    continue
+                depth -= 1
+                if elem.tag == component_tag:
+                    port_label = elem.find("vif:Port_Label", prefix_map)
+                    if port_label is None or not port_label.text:
+                        raise ValueError("Missing vif:Port_Label from vif:Component")
+                    dpam_content = script.DPAMVIFGenerator.get_dpam_content(elem)
+                    if dpam_content is not None:
+                        port_settings[port_label.text] = dpam_content
+                    # Free the rest of the component
+                    elem.clear()
+                if depth == 1:
+                    # Drop each top level element from the root once read
+                    root.remove(elem)
+    except Exception as e:
+        error = (
+            "Error: Invalid Input USBIF VIF XML file "
+            "provided at path: {}. {}".format(in_vif, e)
+        )
+        logging.error(error)
+        raise script.InvalidInputVIF(error)
+    return port_settings
+
+
+def extract_settings(job: ExtractJob) -> ExtractResult:
+    """
+    Write the DPAM settings of a single VIF as a Settings XML, capturing any
+    failure in its result. VIFs without DPAM content are not written.
+    """
+    start = time.perf_counter()
+    try:
+        port_settings = extract_port_settings(job.in_vif)
+        if port_settings:
+            os.makedirs(os.path.dirname(job.out_settings), exist_ok=True)
+            script.DPAMVIFGenerator.write_output_vif(
+                script.DPAMVIFGenerator.create_dpam_settings(port_settings),
+                job.out_settings,
+            )
+    except Exception as e:
+        return ExtractResult(
+            job, False, error=str(e), duration=time.perf_counter() - start
+        )
+    return ExtractResult(
+        job, True, len(port_settings), duration=time.perf_counter() - start
+    )
+
+
+def run_extract(jobs: list, workers: int = None) -> list:
+    """
+    Extract settings from every job's VIF across a process pool and return
+    results in job order. On Ctrl-C, jobs that have not started are
+    cancelled and running jobs are left to finish.
+    """
+    results: dict[int, ExtractResult] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = {
+            pool.submit(extract_settings, job): index for index, job in enumerate(jobs)
+        }
+        try:
+            for count, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                results[futures[future]] = result
+                if not result.success:
+                    status = "FAILED"
+                elif result.ports:
+                    status = "OK"
+                else:
+                    status = "NO DPAM"
+                logging.info(f"[{count}/{len(jobs)}] {status}: {result.job.in_vif}")
+        except KeyboardInterrupt:
+            logging.info("Cancelling extraction, waiting for running jobs to finish...")
+            pool.shutdown(cancel_futures=True)
+            raise
+    return [results[index] for index in range(len(jobs))]
+
+
+def print_summary(results: list, duration: float):
+    extracted = [result for result in results if result.success and result.ports]
+    failed = [result for result in results if not result.success]
+    print("Extraction Summary:")
+    for result in failed:
+        print(f"  [FAIL] {result.job.in_vif}: {result.error}")
+    print(
+        f"{len(extracted)} extracted, "
+        f"{len(results) - len(extracted) - len(failed)} without DPAM content, "
+        f"{len(failed)} failed, {len(results)} total in {duration:.2f}s"
+    )
+
+
+def main(source: str, out_dir: str = None, workers: int = None):
+    # Extract settings from all VIFs, returning the process exit code
+    start = time.perf_counter()
+    jobs = load_extract_jobs(source, out_dir)
+    logging.info(f"Extracting DPAM settings from {len(jobs)} VIFs...")
+    results = run_extract(jobs, workers)
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(result.success for result in results) else 1
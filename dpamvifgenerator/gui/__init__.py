@@ -9,7 +9,7 @@
 import logging
 import os
 import platform
-import shelve
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import darkdetect
 import qdarktheme
@@ -19,8 +19,14 @@ from PySide6.QtWidgets import QApplication
 
 from dpamvifgenerator import LOG_LEVEL_MAP, LOGGING_FORMAT, buildinfo
 from dpamvifgenerator.controller.mainwindow import MainWindow
+from dpamvifgenerator.gui.datastore import DataStore
 from dpamvifgenerator.gui.splashscreen import SplashScreen
-from dpamvifgenerator.utility import get_asset_file_path, setup_storage
+from dpamvifgenerator.utility import (
+    get_asset_file_path,
+    get_data_file_path,
+    load_ui_file,
+    setup_storage,
+)
 
 
 def detect_system_theme(default_theme: str) -> str:
@@ -42,6 +48,31 @@ def get_app_icon_path():
     return get_asset_file_path("assets", "displayport_icon.ico")
 
 
+def get_datastore_paths(user_data_dir: str) -> tuple[str, str]:
+    """Get the datastore path, and that of the shelve database it replaced"""
+    return (
+        os.path.join(user_data_dir, "{}.json".format(buildinfo.__bundle__)),
+        os.path.join(user_data_dir, "{}.db".format(buildinfo.__bundle__)),
+    )
+
+
+def load_startup_data(in_vif: str = None) -> tuple[str, dict, dict[str, list[str]]]:
+    """
+    Read everything the main window needs from disk, without creating any Qt
+    objects so it can run off the main thread. Returns the user data dir, the
+    datastore contents, and the port labels of the input VIF the main window
+    opens first keyed by its path, or None if it failed to load.
+    """
+    user_data_dir = setup_storage()
+    data = DataStore.load(*get_datastore_paths(user_data_dir))
+    # A command line input VIF replaces the last input VIF used
+    in_vif = os.path.abspath(in_vif) if in_vif else data.get("user_path_to_input")
+    port_labels = {}
+    if in_vif:
+        port_labels[in_vif] = MainWindow.read_port_labels(in_vif)
+    return user_data_dir, data, port_labels
+
+
 def setup_os():
     system = platform.system()
     if system == "win":
@@ -68,24 +99,36 @@ class DPAMVIFGeneratorApp(QApplication):
         self.ds = None
         self.widget = None
 
-    def setup(self, kwargs):
-        # Setup local storage for app
-        self.user_data_dir = setup_storage()
-        # Create datastore
-        self.ds = shelve.open(
-            os.path.join(self.user_data_dir, "{}.db".format(buildinfo.__bundle__))
-        )
+    def setup(self, kwargs, startup_data: Future = None):
         # Perform OS specific setup
         setup_os()
+        # Load the UI, while startup data may still be loading in the background
+        self.splash_message.emit("Loading Interface...")
+        ui = load_ui_file(get_data_file_path("uifiles", "mainwindow.ui"))
+        # Wait for local storage and the input VIF
+        self.splash_message.emit("Loading Settings...")
+        if startup_data is None:
+            self.user_data_dir, data, port_labels = load_startup_data(
+                kwargs.get("in_vif")
+            )
+        else:
+            self.user_data_dir, data, port_labels = startup_data.result()
+        # Create datastore, migrating from the shelve database of earlier versions
+        store_path, legacy_path = get_datastore_paths(self.user_data_dir)
+        self.ds = DataStore(store_path, legacy_path, data=data)
         # Create main window to start app
         self.widget = MainWindow(
             ds=self.ds,
             user_data_dir=self.user_data_dir,
             splash_message=self.splash_message.emit,
+            ui=ui,
+            port_labels=port_labels,
             **kwargs,
         )
         # Connect signals with MainWindow
         self.aboutToQuit.connect(self.widget.app_quitting)
+        # Save any datastore changes not yet written to disk
+        self.aboutToQuit.connect(self.ds.close)
 
     def start(self):
         self.widget.show()
@@ -96,12 +139,13 @@ class DPAMVIFGeneratorApp(QApplication):
         self.ds.close()
 
     def setup_theme(self) -> str:
-        # Setup theme based on OS settings
-        qdarktheme.setup_theme("auto")
+        # Setup theme based on OS settings, styling the app once
         theme = detect_system_theme("dark")
         # Set tool tips based on detected theme
         if theme == "dark":
             qdarktheme.setup_theme(additional_qss="QToolTip { border: 0px; }")
+        else:
+            qdarktheme.setup_theme("auto")
         return theme
 
 
@@ -111,17 +155,21 @@ def main(**kwargs):
         level=LOG_LEVEL_MAP["info"], format=LOGGING_FORMAT, datefmt="%H:%M:%S"
     )
 
-    # Create application and splash screen
-    app = DPAMVIFGeneratorApp()
-    # Set theme
-    theme = app.setup_theme()
-    splash_screen = SplashScreen(
-        splash_image_path=get_splash_screen_path(theme),
-        timeout=0.1,
-        theme=theme,
-    )
-    app.splash_message.connect(splash_screen.update_message)
+    # Read local storage and the input VIF in the background, while the app,
+    # splash screen and UI are created on the main thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        startup_data = pool.submit(load_startup_data, kwargs.get("in_vif"))
+
+        # Create application and splash screen
+        app = DPAMVIFGeneratorApp()
+        # Set theme
+        theme = app.setup_theme()
+        splash_screen = SplashScreen(
+            splash_image_path=get_splash_screen_path(theme),
+            theme=theme,
+        )
+        app.splash_message.connect(splash_screen.update_message)
 
-    # Setup and launch
-    app.setup(kwargs)
+        # Setup and launch
+        app.setup(kwargs, startup_data)
     splash_screen.launch(app.widget.ui, on_finish=app.start)
@@ -0,0 +1,106 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import json
+import logging
+import os
+import shelve
+import tempfile
+
+from PySide6.QtCore import QObject, QTimer
+
+# DataStore Consts
+FLUSH_DELAY = 500  # Milliseconds without changes before saving to disk
+
+
+class DataStore(QObject):
+    """
+    In-memory GUI settings, used in place of a shelve database. Changes are
+    saved to a JSON file in a single batch once none have been made for
+    flush_delay milliseconds, and on close. Each save replaces the file
+    atomically, so an interrupted save never leaves a partial file behind.
+    Settings from a legacy shelve database are loaded if no file exists yet.
+    data, if given, is used in place of loading the file, e.g. when it was
+    already loaded by DataStore.load on another thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        legacy_path: str = None,
+        flush_delay: int = FLUSH_DELAY,
+        data: dict = None,
+    ):
+        super().__init__()
+        self.path = path
+        self.data = DataStore.load(path, legacy_path) if data is None else data
+        self.dirty = False
+        # Restarted by every change, so bursts of changes are saved once
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(flush_delay)
+        self.timer.timeout.connect(self.flush)
+
+    @staticmethod
+    def load(path: str, legacy_path: str = None) -> dict:
+        try:
+            with open(path, encoding="utf8") as store_file:
+                data = json.load(store_file)
+            if isinstance(data, dict):
+                return data
+            logging.warning(f"Ignoring invalid datastore {path}")
+            return {}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable datastore {path}. {e}")
+            return {}
+        # Migrate settings saved by earlier versions
+        if legacy_path:
+            try:
+                with shelve.open(legacy_path, flag="r") as legacy:
+                    return dict(legacy)
+            except Exception:
+                pass
+        return {}
+
+    def get(self, name: str, default=None):
+        return self.data.get(name, default)
+
+    def __getitem__(self, name: str):
+        return self.data[name]
+
+    def __setitem__(self, name: str, value):
+        if name in self.data and self.data[name] == value:
+            return
+        self.data[name] = value
+        self.dirty = True
+        self.timer.start()
+
+    def flush(self):
+        """Save all changes to disk now"""
+        self.timer.stop()
+        if not self.dirty:
+            return
+        temp_path = None
+        try:
+            handle, temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.path), suffix=".tmp"
+            )
+            with os.fdopen(handle, "w", encoding="utf8") as store_file:
+                json.dump(self.data, store_file)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+        except (OSError, TypeError, ValueError) as e:
+            # Keep changes in memory and try again on the next save
+            logging.warning(f"Failed to save datastore {self.path}. {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def close(self):
+        self.flush()
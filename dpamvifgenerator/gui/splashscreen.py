@@ -6,26 +6,20 @@
 # IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
 # PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
 ######################################################
-import threading
-import time
-
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QSplashScreen
 
 
 class SplashScreen:
-    def __init__(self, splash_image_path, timeout, theme):
+    def __init__(self, splash_image_path, theme):
         # Setup splash screen image
         self.theme = theme
         splash_image = QPixmap(splash_image_path)
         self.splash = QSplashScreen(splash_image, Qt.WindowStaysOnTopHint)
         self.splash.setMask(splash_image.mask())
         self.update_message("Initializing...")
-        # Setup splash screen timer thread
-        self.timer = threading.Thread(target=lambda: time.sleep(timeout))
         # Run
-        self.timer.start()
         self.splash.show()
 
     def update_message(self, message: str):
@@ -33,6 +27,7 @@ class SplashScreen:
         self.splash.showMessage(message, Qt.AlignHCenter | Qt.AlignBottom, color)
 
     def launch(self, app_ui, on_finish):
-        self.timer.join()
+        # finish waits up to a second for app_ui to be exposed, so show it first
+        app_ui.show()
         self.splash.finish(app_ui)
         on_finish()
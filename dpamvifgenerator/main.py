@@ -8,8 +8,9 @@
 ######################################################
 import argparse
 import logging
+import sys
 
-from dpamvifgenerator import buildinfo, gui, script
+from dpamvifgenerator import buildinfo, script
 
 
 def main():
@@ -34,13 +35,243 @@ def main():
         action="store_true",
         help="Run tool in batch mode without launching GUI",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        help=(
+            "Directory, glob pattern, or CSV manifest (input,settings,output) "
+            "of VIFs to generate. Implies --batch"
+        ),
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        dest="workers",
+        type=int,
+        help="Number of worker processes for batch jobs (default: CPU count)",
+    )
+    parser.add_argument(
+        "-f",
+        "--fan-out",
+        dest="fan_out",
+        nargs="+",
+        metavar="SETTINGS",
+        help=(
+            "Settings files to generate from the single input VIF, one output "
+            "per settings file. Implies --batch"
+        ),
+    )
+    parser.add_argument(
+        "-p",
+        "--preserve-formatting",
+        dest="preserve_formatting",
+        action="store_true",
+        help="Insert DPAM content without reformatting the rest of the input VIF",
+    )
+    parser.add_argument(
+        "--extract",
+        dest="extract",
+        metavar="VIFS",
+        help=(
+            "Extract the DPAM settings of each generated VIF in a directory or "
+            "glob pattern into a Settings XML under the output directory (-o). "
+            "Implies --batch"
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        help=(
+            "Keep a manifest next to each output, and on later runs only rewrite "
+            "the DPAM content of ports whose settings changed"
+        ),
+    )
+    parser.add_argument(
+        "--compile-settings",
+        dest="compile_settings",
+        metavar="OUTPUT",
+        help=(
+            "Compile the settings file (-s) into a .json artifact that can be "
+            "used in place of it for faster repeated runs. Implies --batch"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        dest="watch",
+        action="store_true",
+        help=(
+            "Regenerate outputs whenever their input VIF or settings file "
+            "changes, until stopped with Ctrl-C. Implies --batch"
+        ),
+    )
+    parser.add_argument(
+        "--debounce",
+        dest="debounce",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="Wait for changes to settle this long before regenerating in --watch",
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Reuse previously generated outputs for unchanged inputs in batch mode",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        help="Directory for cached outputs (default: user cache directory)",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        dest="cache_max_size",
+        type=int,
+        default=1024,
+        metavar="MB",
+        help="Evict the oldest cached outputs beyond this total size",
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        dest="cache_max_age",
+        type=float,
+        default=30,
+        metavar="DAYS",
+        help="Evict cached outputs not used within this many days",
+    )
+    parser.add_argument(
+        "--serve",
+        dest="serve",
+        action="store_true",
+        help="Run a local HTTP generation server instead of launching GUI",
+    )
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        default=8765,
+        help="Localhost port for --serve (default: 8765)",
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        dest="max_concurrent",
+        type=int,
+        help="Maximum concurrent generations for --serve (default: CPU count)",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store_true",
+        help="Print time spent in each generation stage in batch mode",
+    )
+    parser.add_argument(
+        "--trace-json",
+        dest="trace_json",
+        metavar="FILE",
+        help=(
+            "Write generation stage timings as a Chrome trace event file, "
+            "viewable in chrome://tracing or Perfetto"
+        ),
+    )
     # Parse args if they exist
     args = parser.parse_args()
-    if args.batch:
+    if args.serve:
+        # Only load the server when it is needed
+        from dpamvifgenerator import server
+
+        server.main(args.port, args.max_concurrent)
+    elif (
+        args.batch
+        or args.watch
+        or args.extract
+        or args.jobs
+        or args.fan_out
+        or args.compile_settings
+    ):
         # Redirect all logging to print since script is running as batch
         logging.info = print
-        script.main(**vars(args))
+        if args.cache:
+            from dpamvifgenerator.cache import OutputCache
+
+            args.cache = OutputCache(
+                args.cache_dir,
+                max_size=args.cache_max_size * 1024 * 1024,
+                max_age=args.cache_max_age * 24 * 60 * 60,
+            )
+        else:
+            args.cache = None
+        if args.compile_settings:
+            script.compile_settings(args.settings, args.compile_settings)
+            sys.exit(0)
+        args.tracer = None
+        if args.profile or args.trace_json:
+            from dpamvifgenerator.tracing import Tracer
+
+            args.tracer = Tracer()
+        if args.extract:
+            # Only load the multi-file batch runners when they are needed
+            from dpamvifgenerator import extract
+        elif args.watch:
+            from dpamvifgenerator import watch
+        elif args.fan_out or args.jobs:
+            from dpamvifgenerator import batch
+        exit_code = 0
+        try:
+            if args.extract:
+                exit_code = extract.main(args.extract, args.out_vif, args.workers)
+            elif args.watch:
+                exit_code = watch.main(
+                    args.in_vif,
+                    args.settings,
+                    args.out_vif,
+                    args.jobs,
+                    args.fan_out,
+                    args.debounce,
+                    tracer=args.tracer,
+                    preserve_formatting=args.preserve_formatting,
+                    cache=args.cache,
+                    incremental=args.incremental,
+                )
+            elif args.fan_out:
+                exit_code = batch.fan_out_main(
+                    args.in_vif,
+                    args.fan_out,
+                    args.out_vif,
+                    args.workers,
+                    preserve_formatting=args.preserve_formatting,
+                    tracer=args.tracer,
+                )
+            elif args.jobs:
+                exit_code = batch.main(
+                    args.jobs,
+                    args.settings,
+                    args.out_vif,
+                    args.workers,
+                    tracer=args.tracer,
+                    preserve_formatting=args.preserve_formatting,
+                    cache=args.cache,
+                    incremental=args.incremental,
+                )
+            else:
+                script.main(**vars(args))
+        except KeyboardInterrupt:
+            # Partially written outputs are removed as generation unwinds
+            print()
+            logging.info("Generation Cancelled")
+            sys.exit(130)
+        # Report stage timings
+        if args.profile:
+            print(args.tracer.get_summary())
+        if args.trace_json:
+            args.tracer.write_trace_json(args.trace_json)
+        sys.exit(exit_code)
     else:
+        # Only load the Qt GUI stack when it is needed
+        from dpamvifgenerator import gui
+
         gui.main(**vars(args))
 
 
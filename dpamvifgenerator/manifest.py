@@ -0,0 +1,225 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import json
+import logging
+import os
+from typing import NamedTuple
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator import buildinfo, script
+from dpamvifgenerator.compiled import CompiledSettings
+from dpamvifgenerator.splice import Insertion, VIFComponentScanner, get_dpam_fragment
+
+# Manifest Consts
+OUTPUT_MANIFEST_FORMAT = 1
+OUTPUT_MANIFEST_SUFFIX = ".dpam.json"
+
+
+def get_file_signature(path: str | os.PathLike) -> list[int] | None:
+    # Size and modification time of a file, or None if it is missing
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# Output Block Class
+class OutputBlock(NamedTuple):
+    # Insertion with its offset in the output, rather than the input VIF
+    insertion: Insertion
+    length: int
+    digest: str
+
+
+# Output Manifest Class
+class OutputManifest:
+    """
+    Sidecar of an incrementally generated output, saved next to it as JSON.
+    Records hashes of the input VIF and settings the output was generated
+    from, and where each port's DPAM content block was written with a hash of
+    its bytes. Generating again from the same input VIF then only rewrites
+    the blocks whose content changed, without parsing the input VIF, and
+    skips writing entirely when nothing changed. The output's size and
+    modification time are recorded too, so an output changed since is
+    generated again in full.
+    """
+
+    def __init__(
+        self,
+        input_digest: str,
+        options: dict,
+        prefixes: dict[str, str],
+        blocks: list[OutputBlock],
+        settings_digest: str = None,
+        output: list[int] = None,
+    ):
+        self.input_digest = input_digest
+        self.settings_digest = settings_digest
+        self.options = options
+        # Namespace uri to prefix used to serialize DPAM content
+        self.prefixes = prefixes
+        self.blocks = blocks
+        self.output = output
+
+    @staticmethod
+    def get_path(out_vif: str | os.PathLike) -> str:
+        return os.fspath(out_vif) + OUTPUT_MANIFEST_SUFFIX
+
+    @staticmethod
+    def create(
+        input_digest: str,
+        options: dict,
+        scanner: VIFComponentScanner,
+        splices: list,
+    ):
+        """Create the manifest of an output written with splices"""
+        blocks = []
+        shift = 0
+        for insertion, (_, fragment) in zip(scanner.get_insertions(), splices):
+            offset = insertion.offset + shift
+            blocks.append(
+                OutputBlock(
+                    insertion._replace(offset=offset),
+                    len(fragment),
+                    script.hash_source(fragment),
+                )
+            )
+            shift += len(fragment)
+        return OutputManifest(input_digest, options, dict(scanner.namespaces), blocks)
+
+    @staticmethod
+    def load(out_vif: str | os.PathLike):
+        """Load the manifest of out_vif, or None if it has none or it is invalid"""
+        path = OutputManifest.get_path(out_vif)
+        try:
+            with open(path, "rb") as manifest_file:
+                data = json.load(manifest_file)
+            if data.get("format") != OUTPUT_MANIFEST_FORMAT:
+                raise ValueError(
+                    "Unsupported output manifest format: {}".format(data.get("format"))
+                )
+            if data["generator"] != buildinfo.__version__:
+                # Outputs of other versions may differ, so generate again
+                return None
+            blocks = [
+                OutputBlock(
+                    Insertion(
+                        block["port_label"],
+                        block["offset"],
+                        block["merge"],
+                        block["indent"],
+                        block["newline"],
+                        block["suffix"],
+                    ),
+                    block["length"],
+                    block["digest"],
+                )
+                for block in data["blocks"]
+            ]
+            return OutputManifest(
+                data["input"],
+                data["options"],
+                data["prefixes"],
+                blocks,
+                data["settings"],
+                data["output"],
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"Ignoring invalid output manifest {path}: {e}")
+            return None
+
+    def save(self, out_vif: str | os.PathLike):
+        data = {
+            "format": OUTPUT_MANIFEST_FORMAT,
+            "generator": buildinfo.__version__,
+            "input": self.input_digest,
+            "settings": self.settings_digest,
+            "options": self.options,
+            "output": get_file_signature(out_vif),
+            "prefixes": self.prefixes,
+            "blocks": [
+                dict(
+                    block.insertion._asdict(), length=block.length, digest=block.digest
+                )
+                for block in self.blocks
+            ],
+        }
+        with open(OutputManifest.get_path(out_vif), "w", encoding="utf8") as f:
+            json.dump(data, f, indent=1)
+
+    def is_current(
+        self, out_vif: str | os.PathLike, input_digest: str, options: dict
+    ) -> bool:
+        """Check out_vif is as generated from the same input VIF and options"""
+        return (
+            self.input_digest == input_digest
+            and self.options == options
+            and self.output is not None
+            and self.output == get_file_signature(out_vif)
+        )
+
+    def patch(
+        self,
+        out_vif: str | os.PathLike,
+        port_settings: dict[str, ET.Element] | CompiledSettings,
+        progress: script.GenerationProgress = None,
+    ) -> int:
+        """
+        Rewrite the DPAM content blocks of out_vif whose content differs with
+        port_settings, returning the number of ports rewritten
+        """
+        progress = progress or script.GenerationProgress()
+        progress.set_total(len(self.blocks))
+        patches: dict[int, tuple[bytes, str]] = {}
+        for index, block in enumerate(self.blocks):
+            fragment = get_dpam_fragment(port_settings, block.insertion, self.prefixes)
+            digest = script.hash_source(fragment)
+            if digest != block.digest:
+                patches[index] = (fragment, digest)
+            if not (index + 1) % script.PROGRESS_BATCH_SIZE:
+                progress.advance(script.PROGRESS_BATCH_SIZE)
+        if not patches:
+            return 0
+        if all(
+            len(fragment) == self.blocks[index].length
+            for index, (fragment, _) in patches.items()
+        ):
+            # Blocks keep their size, so overwrite them in place
+            with open(out_vif, "r+b") as out_file:
+                for index, (fragment, _) in patches.items():
+                    out_file.seek(self.blocks[index].insertion.offset)
+                    out_file.write(fragment)
+        else:
+            with open(out_vif, "rb") as in_file:
+                data = in_file.read()
+            with script.open_output_vif(out_vif) as out_file, memoryview(data) as view:
+                position = 0
+                for index, (fragment, _) in patches.items():
+                    block = self.blocks[index]
+                    out_file.write(view[position : block.insertion.offset])
+                    out_file.write(fragment)
+                    position = block.insertion.offset + block.length
+                out_file.write(view[position:])
+        # Move blocks after any that changed size
+        shift = 0
+        for index, block in enumerate(self.blocks):
+            block = block._replace(
+                insertion=block.insertion._replace(
+                    offset=block.insertion.offset + shift
+                )
+            )
+            if index in patches:
+                fragment, digest = patches[index]
+                shift += len(fragment) - block.length
+                block = OutputBlock(block.insertion, len(fragment), digest)
+            self.blocks[index] = block
+        return len(patches)
@@ -0,0 +1,127 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import codecs
+import re
+from xml.parsers import expat
+
+from dpamvifgenerator import script
+
+
+# Port Label Scanner Class
+class PortLabelScanner:
+    """
+    Read the vif:Port_Label of each vif:Component from input VIF bytes with
+    expat, without building a tree. The bytes are searched for the next tag
+    the scan needs: a component start tag, the port label end tag of the
+    current component, or its end tag. Everything before it, e.g. vendor
+    sections and the rest of each component after its port label, is parsed
+    without handlers, so expat still checks it but makes no Python calls.
+    A component ends at the next vif:Component end tag, since components are
+    not nested in valid VIFs.
+    """
+
+    COMPONENT_START_TAG = re.compile(rb"<(?:[^\s<>/!?:]+:)?Component[\s/>]")
+    PORT_LABEL_END_TAG = re.compile(rb"</(?:[^\s<>/!?:]+:)?Port_Label[\s>]")
+    COMPONENT_END_TAG = re.compile(rb"</(?:[^\s<>/!?:]+:)?Component[\s>]")
+
+    def __init__(self, data: bytes, chunk_size: int = script.STREAMING_CHUNK_SIZE):
+        prefix_map = script.DPAMVIFGenerator.get_prefix_map()
+        self.component_tag = prefix_map["vif"] + "}Component"
+        self.port_label_tag = prefix_map["vif"] + "}Port_Label"
+        self.data = data
+        self.chunk_size = chunk_size
+        self.port_labels: list[str] = []
+        # Current component state
+        self.depth = 0
+        self.port_label = None
+        # Scan
+        self.parser = expat.ParserCreate(namespace_separator="}")
+        self.parser.buffer_text = True
+        self.find_component()
+        # Tags can only be searched for in ASCII compatible encodings
+        head = bytes(data[:4])
+        searchable = b"\x00" not in head and not head.startswith(
+            (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+        )
+        position = 0
+        while position < len(data):
+            pattern, quiet = self.search
+            match = pattern.search(data, position) if searchable else None
+            if match is None:
+                self.feed(position, len(data), quiet and searchable)
+                break
+            # Feed up to the tag, then the tag itself with handlers, stopping
+            # before the next tag so that no tag is left part parsed
+            self.feed(position, match.start(), quiet)
+            position = data.find(b"<", match.end())
+            if position < 0:
+                position = len(data)
+            self.feed(match.start(), position, False)
+        self.parser.Parse(b"", True)
+        self.parser = None
+
+    def feed(self, start: int, end: int, quiet: bool):
+        if quiet:
+            handlers = (
+                self.parser.StartElementHandler,
+                self.parser.EndElementHandler,
+                self.parser.CharacterDataHandler,
+            )
+            self.parser.StartElementHandler = None
+            self.parser.EndElementHandler = None
+            self.parser.CharacterDataHandler = None
+        for offset in range(start, end, self.chunk_size):
+            self.parser.Parse(self.data[offset : min(offset + self.chunk_size, end)])
+        if quiet:
+            (
+                self.parser.StartElementHandler,
+                self.parser.EndElementHandler,
+                self.parser.CharacterDataHandler,
+            ) = handlers
+
+    def find_component(self):
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = None
+        self.parser.CharacterDataHandler = None
+        self.search = (self.COMPONENT_START_TAG, True)
+
+    def start(self, name: str, attrs: dict[str, str]):
+        if name == self.component_tag:
+            self.depth = 0
+            self.port_label = None
+            self.parser.StartElementHandler = self.start_component
+            self.parser.EndElementHandler = self.end_component
+            self.search = (self.PORT_LABEL_END_TAG, False)
+
+    def start_component(self, name: str, attrs: dict[str, str]):
+        self.depth += 1
+        if self.depth == 1 and name == self.port_label_tag:
+            self.port_label = []
+            self.parser.CharacterDataHandler = self.port_label.append
+
+    def end_component(self, name: str):
+        if self.depth == 0:
+            raise script.InvalidInputVIF("Missing vif:Port_Label from vif:Component")
+        self.depth -= 1
+        if self.depth == 0 and self.port_label is not None:
+            # Skip the rest of the component
+            self.port_labels.append("".join(self.port_label))
+            self.parser.StartElementHandler = None
+            self.parser.EndElementHandler = self.skip_component
+            self.parser.CharacterDataHandler = None
+            self.search = (self.COMPONENT_END_TAG, True)
+
+    def skip_component(self, name: str):
+        if name == self.component_tag:
+            self.find_component()
+
+
+def scan_port_labels(in_vif: script.XMLSource) -> list[str]:
+    with script.open_input_bytes(in_vif) as data:
+        return PortLabelScanner(data).port_labels
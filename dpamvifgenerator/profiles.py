@@ -0,0 +1,232 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import glob
+import io
+import logging
+import os
+import sqlite3
+import time
+from typing import NamedTuple
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator import buildinfo, script
+
+# Profile Store Consts
+PROFILE_STORE_VERSION = 1
+PROFILE_SEARCH_LIMIT = 1000
+PROFILE_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    product TEXT NOT NULL COLLATE NOCASE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    ports INTEGER NOT NULL,
+    modified REAL NOT NULL,
+    UNIQUE (product, name)
+);
+CREATE TABLE IF NOT EXISTS settings (
+    profile_id INTEGER PRIMARY KEY REFERENCES profiles (id) ON DELETE CASCADE,
+    data BLOB NOT NULL
+);
+"""
+
+
+def get_profile_store_path(user_data_dir: str) -> str:
+    # Named without the version, unlike the GUI datastore, so profiles are kept
+    # across updates
+    product = buildinfo.__product__.lower().replace(" ", "-")
+    return os.path.join(user_data_dir, "{}_profiles.db".format(product))
+
+
+class InvalidProfileStore(Exception):
+    pass
+
+
+# Profile Class
+class Profile(NamedTuple):
+    id: int
+    product: str
+    name: str
+    ports: int
+    modified: float
+
+
+# Profile Store Class
+class ProfileStore:
+    """
+    Named DPAM settings profiles for many devices in a SQLite database. Each
+    profile is identified by product and name, and holds a Settings XML with
+    each port's DPAM content. Settings are kept apart from the profile list,
+    so searches only read the small profile rows. The database runs in WAL
+    mode, so reads are never blocked by a save, and every change is one
+    transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+            self.connection.execute("PRAGMA foreign_keys = ON")
+            (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+            if version > PROFILE_STORE_VERSION:
+                raise sqlite3.DatabaseError(
+                    "Unsupported profile store version: {}".format(version)
+                )
+            with self.connection:
+                self.connection.executescript(PROFILE_STORE_SCHEMA)
+                self.connection.execute(
+                    "PRAGMA user_version = {}".format(PROFILE_STORE_VERSION)
+                )
+        except sqlite3.Error as e:
+            error = "Error: Unable to open profile store at path: {}. {}".format(
+                path, e
+            )
+            logging.error(error)
+            raise InvalidProfileStore(error)
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def read_port_settings(settings: script.XMLSource) -> dict[str, ET.Element]:
+        """Get port DPAM settings from a Settings XML, see load_input_vif"""
+        dpam_settings = script.DPAMVIFGenerator.load_input_vif(settings)
+        return script.DPAMVIFGenerator.get_port_settings_from_vif(dpam_settings)
+
+    @staticmethod
+    def count_ports(port_settings: dict[str, ET.Element]) -> int:
+        return sum(opt_content is not None for opt_content in port_settings.values())
+
+    def save_profiles(self, profiles: list[tuple[str, str, bytes, int]]):
+        """
+        Save (product, name, Settings XML bytes, port count) profiles in one
+        transaction, replacing any profile with the same product and name
+        """
+        modified = time.time()
+        with self.connection:
+            for product, name, data, ports in profiles:
+                self.connection.execute(
+                    "INSERT INTO profiles (product, name, ports, modified) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (product, name) DO UPDATE "
+                    "SET ports = excluded.ports, modified = excluded.modified",
+                    (product, name, ports, modified),
+                )
+                (profile_id,) = self.connection.execute(
+                    "SELECT id FROM profiles WHERE product = ? AND name = ?",
+                    (product, name),
+                ).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO settings VALUES (?, ?)", (profile_id, data)
+                )
+
+    def save_profile(
+        self, product: str, name: str, settings: ET.ElementTree
+    ) -> Profile:
+        """Save a Settings XML tree, e.g. from the GUI, as a profile"""
+        data = io.BytesIO()
+        script.DPAMVIFGenerator.write_output_vif(settings, data)
+        ports = ProfileStore.count_ports(
+            script.DPAMVIFGenerator.get_port_settings_from_vif(settings)
+        )
+        self.save_profiles([(product, name, data.getvalue(), ports)])
+        return self.find_profile(product, name)
+
+    def find_profile(self, product: str, name: str) -> Profile | None:
+        row = self.connection.execute(
+            "SELECT id FROM profiles WHERE product = ? AND name = ?", (product, name)
+        ).fetchone()
+        return self.get_profile(row[0]) if row else None
+
+    def get_profile(self, profile_id: int) -> Profile | None:
+        profiles = self.query("WHERE id = ?", (profile_id,))
+        return profiles[0] if profiles else None
+
+    def search(
+        self, text: str = "", limit: int = PROFILE_SEARCH_LIMIT
+    ) -> list[Profile]:
+        """
+        Find profiles whose product or name contains text, ignoring case,
+        ordered by product and name
+        """
+        pattern = "%{}%".format(
+            text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        return self.query(
+            "WHERE product LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\' "
+            "ORDER BY product, name LIMIT ?",
+            (pattern, pattern, limit),
+        )
+
+    def query(self, clauses: str, parameters: tuple) -> list[Profile]:
+        rows = self.connection.execute(
+            "SELECT id, product, name, ports, modified FROM profiles " + clauses,
+            parameters,
+        )
+        return [Profile(*row) for row in rows]
+
+    def get_settings(self, profile_id: int) -> bytes | None:
+        """Get a profile's Settings XML, e.g. to generate a VIF with"""
+        row = self.connection.execute(
+            "SELECT data FROM settings WHERE profile_id = ?", (profile_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load_profile(self, profile_id: int) -> dict[str, ET.Element]:
+        """Get a profile's DPAM opt:OptionalContent by port label"""
+        return ProfileStore.read_port_settings(self.get_settings(profile_id))
+
+    def delete_profile(self, profile_id: int):
+        with self.connection:
+            self.connection.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+
+    @staticmethod
+    def get_import_names(directory: str, path: str) -> tuple[str, str]:
+        """
+        Name a profile imported from a Settings XML under directory by its
+        file name, for the product named by its folder. Files directly in
+        directory are their own product.
+        """
+        name = os.path.splitext(os.path.basename(path))[0]
+        folder = os.path.relpath(os.path.dirname(path), directory)
+        return (name if folder == os.curdir else folder.replace(os.sep, "/")), name
+
+    def import_directory(self, directory: str) -> tuple[list[Profile], list[str]]:
+        """
+        Import every Settings XML under directory as a profile, see
+        get_import_names, in one transaction. Returns the imported profiles,
+        and the paths of files that are not Settings XML or have no DPAM
+        content.
+        """
+        profiles, failed = [], []
+        for path in sorted(
+            glob.glob(
+                os.path.join(glob.escape(directory), "**", "*.xml"), recursive=True
+            )
+        ):
+            try:
+                port_settings = ProfileStore.read_port_settings(path)
+                with open(path, "rb") as settings_file:
+                    data = settings_file.read()
+            except (OSError, script.InvalidInputVIF, script.InvalidSettingsXML):
+                failed.append(path)
+                continue
+            ports = ProfileStore.count_ports(port_settings)
+            if not ports:
+                logging.warning(f"Skipping {path} without DPAM settings")
+                failed.append(path)
+                continue
+            profiles.append(
+                ProfileStore.get_import_names(directory, path) + (data, ports)
+            )
+        self.save_profiles(profiles)
+        logging.info(f"Imported {len(profiles)} profiles from {directory}")
+        return [
+            self.find_profile(product, name) for product, name, *_ in profiles
+        ], failed
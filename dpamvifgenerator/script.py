@@ -6,10 +6,38 @@
 # IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
 # PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
 ######################################################
+import copy
+import hashlib
+import io
 import logging
+import mmap
+import os
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO, Callable
 from xml.etree import ElementTree as ET
+from xml.parsers import expat
 
-from dpamvifgenerator.utility import XML_INDENT
+from dpamvifgenerator import buildinfo
+from dpamvifgenerator.cache import DocumentCache, OutputCache
+from dpamvifgenerator.tracing import Tracer
+from dpamvifgenerator.utility import VIF_PREFIX_MAP, XML_INDENT
+from dpamvifgenerator.utility.xmlwriter import element_to_string, write_document
+
+# Modules built on this one import it, so they are imported where used
+if TYPE_CHECKING:
+    from dpamvifgenerator.compiled import CompiledSettings
+    from dpamvifgenerator.skeleton import VIFSkeleton
+
+# Script Consts
+STREAMING_THRESHOLD = 32 * 1024 * 1024  # Input VIF size in bytes
+STREAMING_CHUNK_SIZE = 64 * 1024
+PROGRESS_BATCH_SIZE = 64  # Ports processed between progress updates
+SETTINGS_VIF_SPECIFICATION = "3.25"
+DPAM_IDENTIFIER = "DPAM"
+
+# XML sources and destinations may be file paths, bytes or binary file objects
+XMLSource = str | os.PathLike | bytes | BinaryIO
+XMLDestination = str | os.PathLike | BinaryIO
 
 
 # Exception Classes
@@ -25,6 +53,10 @@ class InvalidSettingsXML(Exception):
     pass
 
 
+class GenerationCancelled(Exception):
+    pass
+
+
 # Progress Emitter Class
 class Progress:
     def __init__(
@@ -73,12 +105,121 @@ class Progress:
             print()
 
 
+# Cancellation Token Class
+class CancellationToken:
+    """Cancel from any thread to stop the generations given this token"""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise GenerationCancelled("Error: Generation cancelled")
+
+
+# Generation Progress Class
+class GenerationProgress:
+    """
+    Drive a 0-100 progress callback from the bytes or items processed by each
+    generation stage, only calling it when the whole percentage changes.
+    Checks the cancellation token, if any, on every update. Stages advance it
+    per chunk of bytes or batch of ports, and without a callback or token it
+    is inactive and does nothing.
+    """
+
+    def __init__(
+        self,
+        progress: Callable[[int], object] = None,
+        cancel_token: CancellationToken = None,
+    ):
+        self.progress = progress
+        self.cancel_token = cancel_token
+        self.active = progress is not None or cancel_token is not None
+        self.value = None
+        self.start = self.end = 0
+        self.total = None
+        self.done = 0
+
+    def set(self, value: int):
+        if not self.active:
+            return
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+        if value != self.value:
+            self.value = value
+            if self.progress is not None:
+                self.progress(value)
+
+    def stage(self, start: int, end: int, total: int = None):
+        """Begin a stage covering start to end percent over total bytes or items"""
+        self.set(start)
+        self.start, self.end = start, end
+        self.set_total(total)
+
+    def set_total(self, total: int | None):
+        self.total = total
+        self.done = 0
+
+    def advance(self, amount: int):
+        if not self.active:
+            return
+        self.done += amount
+        if self.total:
+            done = min(self.done, self.total)
+            self.set(self.start + (self.end - self.start) * done // self.total)
+        elif self.cancel_token is not None:
+            self.cancel_token.check()
+
+
+# Progress Reader Class
+class ProgressReader:
+    """Binary input file that advances progress by the bytes read from it"""
+
+    def __init__(self, source: BinaryIO, progress: GenerationProgress):
+        self.source = source
+        self.progress = progress
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.progress.advance(len(data))
+        return data
+
+
+# Progress Writer Class
+class ProgressWriter(io.BufferedIOBase):
+    """Binary output file that advances progress by the bytes written to it"""
+
+    def __init__(self, target: BinaryIO, progress: GenerationProgress):
+        super().__init__()
+        self.target = target
+        self.progress = progress
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.progress.advance(len(data))
+        return self.target.write(data)
+
+    def flush(self):
+        if not self.target.closed:
+            self.target.flush()
+
+
 # DPAM VIF Generator Class
 class DPAMVIFGenerator:
     def __init__(self, **kwargs):
-        # Log parameters
+        # Log parameters, summarizing any in-memory documents
+        parameters = {
+            key: DPAMVIFGenerator.describe_source(value)
+            for key, value in kwargs.items()
+        }
         logging.info(
-            f"Initializing DPAM VIF Generator with the following parameters: {kwargs}"
+            "Initializing DPAM VIF Generator with the following parameters: "
+            f"{parameters}"
         )
         # Load arguments from user
         for key, value in kwargs.items():
@@ -88,94 +229,481 @@ class DPAMVIFGenerator:
             error = "Error: Missing DPAMVIFGenerator argument: {}".format(key)
             logging.error(error)
             raise MissingGeneratorArg(error)
-        # Check for passed in progress emitter
+        # Check for passed in progress emitter, where None disables progress
         if not hasattr(self, "progress"):
             # Create script's own progress emitter
             self.progress_object = Progress(100)
             self.progress = self.progress_object.setValue
+        # Stream input VIFs larger than the threshold instead of parsing in full
+        if not hasattr(self, "streaming_threshold"):
+            self.streaming_threshold = STREAMING_THRESHOLD
+        # Splice DPAM content into the input VIF bytes instead of reformatting it
+        if not hasattr(self, "preserve_formatting"):
+            self.preserve_formatting = False
+        # Reuse outputs from an OutputCache for inputs that have not changed
+        if not hasattr(self, "cache"):
+            self.cache = None
+        self.cache_hit = None
+        # Reuse input VIFs and settings files parsed by earlier generations
+        if not hasattr(self, "document_cache"):
+            self.document_cache = None
+        # Patch only changed ports of an output generated by an earlier run
+        if not hasattr(self, "incremental"):
+            self.incremental = False
+        # Record timed spans of each generation stage
+        if getattr(self, "tracer", None) is None:
+            self.tracer = Tracer()
+        # Stop generation early once a CancellationToken is cancelled
+        if not hasattr(self, "cancel_token"):
+            self.cancel_token = None
+        self.generation_progress = GenerationProgress(self.progress, self.cancel_token)
 
     def generate_vif(self):
         # Set progress
         logging.info("Generating DPAM VIF XML File...")
-        self.progress(0)
+        progress = self.generation_progress
+        progress.set(0)
+
+        with self.tracer.span("generate_vif") as generation:
+            # Copy a previously generated output for identical inputs
+            cache_key = self.get_cache_key()
+            if cache_key:
+                with self.tracer.span("cache_fetch") as span:
+                    self.cache_hit = self.cache.fetch(cache_key, self.out_vif)
+                    span.attributes["hit"] = self.cache_hit
+                if self.cache_hit:
+                    generation.attributes["mode"] = "cache"
+                    progress.set(100)
+                    logging.info("Generation Complete")
+                    return
 
-        # Register namespaces
-        for name, namespace in DPAMVIFGenerator.get_prefix_map().items():
-            ET.register_namespace(name, namespace)
-        self.progress(10)
+            try:
+                progress.set(10)
+                if self.use_incremental():
+                    # Update the previous output, tracked by its manifest
+                    generation.attributes["mode"] = "incremental"
+                    self.generate_vif_incremental()
+                elif self.use_document_cache():
+                    # Reuse the input VIF as parsed by an earlier generation
+                    generation.attributes["mode"] = "skeleton"
+                    self.generate_vif_skeleton()
+                elif self.preserve_formatting:
+                    # Keep the input VIF's original formatting
+                    generation.attributes["mode"] = "splice"
+                    self.generate_vif_splicing()
+                elif self.use_streaming():
+                    # Stream large input VIFs to keep memory use flat
+                    generation.attributes["mode"] = "streaming"
+                    self.generate_vif_streaming()
+                else:
+                    generation.attributes["mode"] = "tree"
+                    self.generate_vif_tree()
+            except GenerationCancelled:
+                # Partially written output files have already been removed
+                logging.info("Generation Cancelled")
+                raise
 
+            # Store generated output for the next run with the same inputs
+            if cache_key:
+                with self.tracer.span("cache_store"):
+                    self.cache.store(cache_key, self.out_vif)
+
+    def generate_vif_tree(self):
+        progress = self.generation_progress
         # Load input USBIF VIF XML
-        input_vif = DPAMVIFGenerator.load_input_vif(self.in_vif)
-        self.progress(30)
+        in_size = get_size(self.in_vif)
+        with self.tracer.span("parse_input", bytes=in_size):
+            progress.stage(10, 40, in_size)
+            input_vif = DPAMVIFGenerator.load_input_vif(self.in_vif, progress)
 
         # Load DPAM Settings XML
-        dpam_settings = DPAMVIFGenerator.load_dpam_settings(self.settings)
-        self.progress(50)
+        progress.stage(40, 50)
+        port_settings = self.load_traced_port_settings()
 
         # Generate DPAM VIF XML file
-        DPAMVIFGenerator.generate_dpam_vif(input_vif, dpam_settings)
-        self.progress(80)
+        with self.tracer.span("merge") as span:
+            progress.stage(50, 60)
+            ports, merged = DPAMVIFGenerator.insert_port_settings(
+                input_vif, port_settings, progress
+            )
+            span.attributes.update(ports=ports, merged=merged)
 
-        # Write out generated XML file
-        DPAMVIFGenerator.write_output_vif(input_vif, self.out_vif)
-        self.progress(100)
+        # Write out generated XML file, estimating its size as the input VIF's
+        with self.tracer.span("write") as span:
+            progress.stage(60, 100, in_size)
+            DPAMVIFGenerator.write_output_vif(input_vif, self.out_vif, progress)
+            span.attributes["bytes"] = get_size(self.out_vif)
+        progress.set(100)
+        logging.info("Generation Complete")
+
+    def load_traced_port_settings(self, fragments: bool = False):
+        with self.tracer.span("parse_settings", bytes=get_size(self.settings)) as span:
+            if (
+                fragments
+                and self.document_cache is not None
+                and DPAMVIFGenerator.is_path(self.settings)
+            ):
+                # Settings loaded as fragments are only read, so can be shared
+                port_settings = self.document_cache.get(
+                    self.settings,
+                    "port_settings",
+                    lambda path: DPAMVIFGenerator.load_port_settings(path, True),
+                )
+            else:
+                port_settings = DPAMVIFGenerator.load_port_settings(
+                    self.settings, fragments
+                )
+            span.attributes["ports"] = len(port_settings)
+        return port_settings
+
+    def get_cache_key(self) -> str | None:
+        # Only file and bytes inputs written to an output file can be cached
+        if self.cache is None or not DPAMVIFGenerator.is_path(self.out_vif):
+            return None
+        options = {
+            "preserve_formatting": self.preserve_formatting,
+            "streaming": self.use_streaming(),
+        }
+        try:
+            return self.cache.get_key(self.in_vif, self.settings, options)
+        except OSError:
+            # Let the regular loaders report missing or unreadable inputs
+            return None
+
+    def use_streaming(self) -> bool:
+        if not DPAMVIFGenerator.is_path(self.in_vif):
+            return False
+        try:
+            return os.path.getsize(self.in_vif) > self.streaming_threshold
+        except OSError:
+            # Let the regular loader report a missing or invalid input VIF
+            return False
+
+    def use_document_cache(self) -> bool:
+        # Large input VIFs are streamed instead of being kept in memory
+        return (
+            self.document_cache is not None
+            and DPAMVIFGenerator.is_path(self.in_vif)
+            and not self.use_streaming()
+        )
+
+    def use_incremental(self) -> bool:
+        # Outputs are patched in place, so both need to be files
+        return (
+            self.incremental
+            and DPAMVIFGenerator.is_path(self.in_vif)
+            and DPAMVIFGenerator.is_path(self.out_vif)
+        )
+
+    def load_skeleton(self) -> "VIFSkeleton":
+        # Load input USBIF VIF XML skeleton, unless already cached
+        from dpamvifgenerator.skeleton import VIFSkeleton
+
+        progress = self.generation_progress
+        progress.stage(10, 15, get_size(self.in_vif))
+        if not self.use_document_cache():
+            # Large input VIFs are streamed instead of being parsed in full
+            return VIFSkeleton(
+                self.in_vif,
+                self.preserve_formatting,
+                self.tracer,
+                progress,
+                streaming=self.use_streaming(),
+            )
+        return self.document_cache.get(
+            self.in_vif,
+            "formatted_skeleton" if self.preserve_formatting else "skeleton",
+            lambda path: VIFSkeleton(
+                path, self.preserve_formatting, self.tracer, progress
+            ),
+        )
+
+    def generate_vif_skeleton(self):
+        progress = self.generation_progress
+        skeleton = self.load_skeleton()
+
+        # Load DPAM Settings XML, keeping compiled settings pre-serialized
+        progress.stage(15, 20)
+        port_settings = self.load_traced_port_settings(fragments=True)
+
+        # Write skeleton with DPAM content spliced in
+        skeleton.write(port_settings, self.out_vif, self.tracer, progress)
+        logging.info("Generation Complete")
+
+    def generate_vif_incremental(self):
+        from dpamvifgenerator.manifest import OutputManifest
+
+        progress = self.generation_progress
+        with self.tracer.span("hash_inputs", bytes=get_size(self.in_vif)):
+            input_digest = hash_source(self.in_vif)
+            settings_digest = hash_source(self.settings)
+        options = {"preserve_formatting": self.preserve_formatting}
+        manifest = OutputManifest.load(self.out_vif)
+        if manifest is None or not manifest.is_current(
+            self.out_vif, input_digest, options
+        ):
+            # Generate in full, recording where each port's DPAM content is
+            skeleton = self.load_skeleton()
+            progress.stage(15, 20)
+            port_settings = self.load_traced_port_settings(fragments=True)
+            splices = skeleton.write(port_settings, self.out_vif, self.tracer, progress)
+            manifest = OutputManifest.create(
+                input_digest, options, skeleton.scanner, splices
+            )
+            logging.info("Generation Complete")
+        elif (
+            settings_digest is not None and settings_digest == manifest.settings_digest
+        ):
+            # Neither the input VIF nor settings changed, so keep the output
+            with self.tracer.span("patch", ports=0):
+                logging.info("Output is up to date")
+            progress.set(100)
+            return
+        else:
+            # Load DPAM Settings XML, keeping compiled settings pre-serialized
+            progress.stage(10, 20)
+            port_settings = self.load_traced_port_settings(fragments=True)
+
+            # Replace the DPAM content of changed ports in the output
+            with self.tracer.span("patch") as span:
+                progress.stage(20, 100)
+                span.attributes["ports"] = manifest.patch(
+                    self.out_vif, port_settings, progress
+                )
+            logging.info("Generation Complete")
+        manifest.settings_digest = settings_digest
+        manifest.save(self.out_vif)
+        progress.set(100)
+
+    def generate_vif_streaming(self):
+        logging.info("Streaming large input VIF XML...")
+        progress = self.generation_progress
+        # Load DPAM Settings XML
+        progress.stage(10, 20)
+        port_settings = self.load_traced_port_settings()
+
+        # Generate and write DPAM VIF XML file one component at a time
+        in_size = get_size(self.in_vif)
+        with self.tracer.span("stream", bytes=in_size) as span:
+            progress.stage(20, 100, in_size)
+            ports, merged = DPAMVIFGenerator.stream_dpam_vif(
+                self.in_vif, port_settings, self.out_vif, progress=progress
+            )
+            span.attributes.update(
+                ports=ports, merged=merged, output_bytes=get_size(self.out_vif)
+            )
+        progress.set(100)
+        logging.info("Generation Complete")
+
+    def generate_vif_splicing(self):
+        logging.info("Splicing DPAM content into input VIF XML...")
+        progress = self.generation_progress
+        # Load DPAM Settings XML, keeping compiled settings pre-serialized
+        progress.stage(10, 20)
+        port_settings = self.load_traced_port_settings(fragments=True)
+
+        # Copy input VIF to output, inserting DPAM content on each port
+        DPAMVIFGenerator.splice_dpam_vif(
+            self.in_vif, port_settings, self.out_vif, self.tracer, progress
+        )
+        progress.set(100)
         logging.info("Generation Complete")
 
     @staticmethod
     def get_prefix_map() -> dict:
-        return {
-            "vif": "http://usb.org/VendorInfoFile.xsd",
-            "xsi": "http://www.w3.org/2001/XMLSchema-instance",
-            "opt": "http://usb.org/VendorInfoFileOptionalContent.xsd",
-        }
+        return dict(VIF_PREFIX_MAP)
+
+    @staticmethod
+    def get_uri_prefixes() -> dict:
+        # Namespace uri to prefix map used when writing XML
+        return {uri: name for name, uri in VIF_PREFIX_MAP.items()}
+
+    @staticmethod
+    def is_path(source) -> bool:
+        return isinstance(source, (str, os.PathLike))
 
     @staticmethod
-    def load_input_vif(in_vif: str) -> ET:
+    def describe_source(source) -> str:
+        if isinstance(source, (bytes, bytearray)):
+            return "<{} bytes>".format(len(source))
+        if isinstance(source, (io.IOBase, ET.ElementTree, ET.Element)):
+            return "<{}>".format(type(source).__name__)
+        return str(source)
+
+    @staticmethod
+    def get_xml_source(source: XMLSource) -> str | os.PathLike | BinaryIO:
+        # Wrap in-memory documents so they can be parsed like a file
+        if isinstance(source, (bytes, bytearray)):
+            return io.BytesIO(source)
+        return source
+
+    @staticmethod
+    def load_input_vif(in_vif: XMLSource, progress: GenerationProgress = None) -> ET:
+        parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
         try:
-            return ET.parse(
-                in_vif, parser=ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+            if progress is None or not progress.active:
+                return ET.parse(DPAMVIFGenerator.get_xml_source(in_vif), parser=parser)
+            # Read in chunks, advancing progress by the bytes parsed
+            with open_input_file(in_vif) as in_file:
+                return ET.parse(ProgressReader(in_file, progress), parser=parser)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            error = (
+                "Error: Invalid Input USBIF VIF XML file "
+                "provided at path: {}. {}".format(
+                    DPAMVIFGenerator.describe_source(in_vif), e
+                )
             )
+            logging.error(error)
+            raise InvalidInputVIF(error)
+
+    @staticmethod
+    def load_port_labels(in_vif: XMLSource) -> list[str]:
+        """
+        Get the port label of each vif:Component in the input VIF, without
+        loading the whole VIF. Port labels of input files are kept in
+        DOCUMENT_CACHE.
+        """
+        from dpamvifgenerator.portlabels import scan_port_labels
+
+        try:
+            if DPAMVIFGenerator.is_path(in_vif):
+                port_labels = DOCUMENT_CACHE.get(
+                    in_vif,
+                    "port_labels",
+                    lambda path: tuple(scan_port_labels(path)),
+                    size=lambda port_labels: 0,
+                )
+                return list(port_labels)
+            return scan_port_labels(in_vif)
         except Exception as e:
             error = (
                 "Error: Invalid Input USBIF VIF XML file "
-                "provided at path: {}. {}".format(in_vif, e)
+                "provided at path: {}. {}".format(
+                    DPAMVIFGenerator.describe_source(in_vif), e
+                )
             )
             logging.error(error)
             raise InvalidInputVIF(error)
 
     @staticmethod
-    def load_dpam_settings(settings: str) -> ET:
+    def load_dpam_settings(settings: XMLSource | ET.ElementTree | ET.Element) -> ET:
+        # Use already built settings as is
+        if isinstance(settings, ET.ElementTree):
+            return settings
+        if isinstance(settings, ET.Element):
+            return ET.ElementTree(settings)
         try:
             return ET.parse(
-                settings, parser=ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+                DPAMVIFGenerator.get_xml_source(settings),
+                parser=ET.XMLParser(target=ET.TreeBuilder(insert_comments=True)),
             )
         except Exception as e:
             error = (
                 "Error: Invalid DPAM Settings XML file provided at path: {}. {}".format(
-                    settings, e
+                    DPAMVIFGenerator.describe_source(settings), e
                 )
             )
             logging.error(error)
             raise InvalidSettingsXML(error)
 
+    @staticmethod
+    def is_compiled_settings(settings) -> bool:
+        from dpamvifgenerator.compiled import (
+            COMPILED_SETTINGS_EXTENSION,
+            CompiledSettings,
+        )
+
+        if isinstance(settings, CompiledSettings):
+            return True
+        if DPAMVIFGenerator.is_path(settings):
+            return os.fspath(settings).endswith(COMPILED_SETTINGS_EXTENSION)
+        if isinstance(settings, (bytes, bytearray)):
+            return settings.lstrip()[:1] == b"{"
+        return False
+
+    @staticmethod
+    def load_port_settings(
+        settings: XMLSource | ET.ElementTree | ET.Element,
+        fragments: bool = False,
+    ) -> "dict[str, ET.Element] | CompiledSettings":
+        """
+        Load port DPAM settings from a Settings XML or compiled settings. With
+        fragments, compiled settings are returned as is so their pre-serialized
+        content can be spliced in directly.
+        """
+        from dpamvifgenerator.compiled import CompiledSettings
+
+        if DPAMVIFGenerator.is_compiled_settings(settings):
+            compiled = CompiledSettings.load(settings)
+            return compiled if fragments else compiled.get_port_settings()
+        dpam_settings = DPAMVIFGenerator.load_dpam_settings(settings)
+        port_settings = DPAMVIFGenerator.get_port_settings_from_vif(dpam_settings)
+        if not fragments and isinstance(settings, (ET.ElementTree, ET.Element)):
+            # Settings built by the caller may be shared, e.g. between threads,
+            # so insert copies that the output tree can re-indent. Fragments
+            # are only serialized, and settings parsed here are not shared.
+            port_settings = {
+                port_label: copy.deepcopy(opt_content)
+                for port_label, opt_content in port_settings.items()
+            }
+        return port_settings
+
     @staticmethod
     def generate_dpam_vif(input_vif: ET, dpam_settings: ET):
         # Get port DPAM settings from DPAM Settings XML
         port_settings = DPAMVIFGenerator.get_port_settings_from_vif(dpam_settings)
+        DPAMVIFGenerator.insert_port_settings(input_vif, port_settings)
 
-        # Insert DPAM Opt Content blocks on each port
+    @staticmethod
+    def insert_port_settings(
+        input_vif: ET,
+        port_settings: dict[str, ET.Element],
+        progress: GenerationProgress = None,
+    ) -> tuple[int, int]:
+        # Insert DPAM Opt Content blocks on each port, counting ports and merges
+        progress = progress or GenerationProgress()
         prefix_map = DPAMVIFGenerator.get_prefix_map()
-        for port in input_vif.getroot().findall(".//vif:Component", prefix_map):
-            port_name = port.find("vif:Port_Label", prefix_map).text
-            # Check for existing optional content
-            optional_content = port.find("opt:OptionalContent", prefix_map)
-            if optional_content:
-                # Merge DPAM opt content since OptionalContent block already exists
-                optional_content.append(port_settings[port_name])
-            else:
-                # No existing OptionalContent, so use DPAM version as is
-                port.append(ET.Comment("Non-USB Content"))
-                port.append(port_settings[port_name])
+        ports = input_vif.getroot().findall(".//vif:Component", prefix_map)
+        progress.set_total(len(ports))
+        merged = 0
+        for index, port in enumerate(ports, start=1):
+            merged += DPAMVIFGenerator.insert_dpam_content(port, port_settings)
+            if not index % PROGRESS_BATCH_SIZE:
+                progress.advance(PROGRESS_BATCH_SIZE)
+        return len(ports), merged
+
+    @staticmethod
+    def insert_dpam_content(
+        port: ET.Element, port_settings: dict[str, ET.Element]
+    ) -> bool:
+        prefix_map = DPAMVIFGenerator.get_prefix_map()
+        port_name = port.find("vif:Port_Label", prefix_map).text
+        DPAMVIFGenerator.check_port_settings(port_settings, port_name)
+        # Check for existing optional content
+        optional_content = port.find("opt:OptionalContent", prefix_map)
+        dpam_content = port_settings[port_name]
+        if optional_content:
+            # Merge DPAM opt content since OptionalContent block already exists
+            optional_content.append(dpam_content)
+            return True
+        # No existing OptionalContent, so use DPAM version as is
+        port.append(ET.Comment("Non-USB Content"))
+        port.append(dpam_content)
+        return False
+
+    @staticmethod
+    def check_port_settings(
+        port_settings: "dict[str, ET.Element] | CompiledSettings", port_label: str
+    ):
+        # Every port of the input VIF needs DPAM content in the settings
+        if port_label not in port_settings:
+            error = "Error: Missing port {} from DPAM Settings XML file".format(
+                port_label
+            )
+            logging.error(error)
+            raise InvalidSettingsXML(error)
 
     @staticmethod
     def get_port_settings_from_vif(dpam_settings: ET) -> dict[str, ET.Element]:
@@ -188,16 +716,276 @@ class DPAMVIFGenerator:
                 error = "Error: Missing vif:Port_Label from DPAM Settings XML file"
                 logging.error(error)
                 raise InvalidSettingsXML(error)
-            port_settings[port_name] = port.find(".//opt:OptionalContent", prefix_map)
+            dpam_content = DPAMVIFGenerator.get_dpam_content(port)
+            if dpam_content is None:
+                # Settings written without the DPAM identifier
+                dpam_content = port.find(".//opt:OptionalContent", prefix_map)
+            port_settings[port_name] = dpam_content
         return port_settings
 
     @staticmethod
-    def write_output_vif(generated_vif: ET, out_vif: str):
+    def get_dpam_content(port: ET.Element) -> ET.Element | None:
+        """
+        Find a port's DPAM opt:OptionalContent block, which in a generated VIF
+        may be nested in the port's own OptionalContent block
+        """
+        prefix_map = DPAMVIFGenerator.get_prefix_map()
+        for opt_content in port.iterfind(".//opt:OptionalContent", prefix_map):
+            if opt_content.get("identifier") == DPAM_IDENTIFIER:
+                return opt_content
+        return None
+
+    @staticmethod
+    def create_dpam_settings(
+        port_settings: dict[str, ET.Element] = None
+    ) -> ET.ElementTree:
+        """Create a DPAM Settings XML with each port's opt:OptionalContent"""
+        prefix_map = DPAMVIFGenerator.get_prefix_map()
+        vif = "{{{}}}".format(prefix_map["vif"])
+        root = ET.Element(vif + "VIF")
+        ET.SubElement(root, vif + "VIF_Specification").text = SETTINGS_VIF_SPECIFICATION
+        vif_app = ET.SubElement(root, vif + "VIF_App")
+        ET.SubElement(vif_app, vif + "Vendor").text = buildinfo.__company__
+        ET.SubElement(vif_app, vif + "Name").text = buildinfo.__product__
+        ET.SubElement(vif_app, vif + "Version").text = buildinfo.__version__
+        for port_label, opt_content in (port_settings or {}).items():
+            component = ET.SubElement(root, vif + "Component")
+            ET.SubElement(component, vif + "Port_Label").text = port_label
+            component.append(opt_content)
+        return ET.ElementTree(root)
+
+    @staticmethod
+    def write_output_vif(
+        generated_vif: ET,
+        out_vif: XMLDestination,
+        progress: GenerationProgress = None,
+    ):
         ET.indent(generated_vif, space=XML_INDENT, level=0)
-        generated_vif.write(out_vif, encoding="utf8", method="xml")
+        prefixes = DPAMVIFGenerator.get_uri_prefixes()
+        with open_output_text(out_vif, progress) as f:
+            write_document(f.write, generated_vif.getroot(), prefixes)
+
+    @staticmethod
+    def stream_dpam_vif(
+        in_vif: str,
+        port_settings: dict[str, ET.Element] | None,
+        out_vif: XMLDestination,
+        chunk_size: int = STREAMING_CHUNK_SIZE,
+        progress: GenerationProgress = None,
+    ) -> tuple[int, int]:
+        progress = progress or GenerationProgress()
+        try:
+            from dpamvifgenerator.streaming import StreamingVIFTarget
+
+            with open_output_text(out_vif) as f:
+                target = StreamingVIFTarget(f.write, port_settings)
+                parser = ET.XMLParser(target=target)
+                with open(in_vif, "rb") as in_file:
+                    while chunk := in_file.read(chunk_size):
+                        parser.feed(chunk)
+                        progress.advance(len(chunk))
+                parser.close()
+            return target.ports, target.merged
+        except (GenerationCancelled, InvalidSettingsXML):
+            raise
+        except Exception as e:
+            error = (
+                "Error: Invalid Input USBIF VIF XML file "
+                "provided at path: {}. {}".format(in_vif, e)
+            )
+            logging.error(error)
+            raise InvalidInputVIF(error)
+
+    @staticmethod
+    def splice_dpam_vif(
+        in_vif: XMLSource,
+        port_settings: "dict[str, ET.Element] | CompiledSettings",
+        out_vif: XMLDestination,
+        tracer: Tracer = None,
+        progress: GenerationProgress = None,
+    ):
+        from dpamvifgenerator.splice import VIFComponentScanner, write_spliced_vif
+
+        tracer = tracer or Tracer()
+        progress = progress or GenerationProgress()
+        try:
+            with open_input_bytes(in_vif) as data:
+                with tracer.span("scan_input", bytes=len(data)) as span:
+                    progress.stage(20, 50, len(data))
+                    scanner = VIFComponentScanner(data, progress=progress)
+                    span.attributes.update(scanner.get_counts())
+                with tracer.span("merge") as span:
+                    progress.stage(50, 60)
+                    splices = scanner.get_splices(port_settings, progress)
+                    fragment_size = sum(len(fragment) for _, fragment in splices)
+                    span.attributes["bytes"] = fragment_size
+                with tracer.span("write") as span:
+                    progress.stage(60, 100, len(data) + fragment_size)
+                    write_spliced_vif(data, splices, out_vif, progress)
+                    span.attributes["bytes"] = get_size(out_vif)
+        except (OSError, ValueError, expat.ExpatError, InvalidInputVIF) as e:
+            error = (
+                "Error: Invalid Input USBIF VIF XML file "
+                "provided at path: {}. {}".format(
+                    DPAMVIFGenerator.describe_source(in_vif), e
+                )
+            )
+            logging.error(error)
+            raise InvalidInputVIF(error)
+
+    @staticmethod
+    def serialize_dpam_content(
+        opt_content: ET.Element,
+        indent: str,
+        newline: str,
+        prefixes: dict[str, str],
+    ) -> str:
+        # Indent a copy of the DPAM content relative to the insertion point
+        opt_content = copy.deepcopy(opt_content)
+        ET.indent(opt_content, space=XML_INDENT, level=0)
+        for elem in opt_content.iter():
+            if elem.text and not elem.text.strip():
+                elem.text = elem.text.replace("\n", newline + indent)
+            if elem.tail and not elem.tail.strip():
+                elem.tail = elem.tail.replace("\n", newline + indent)
+        opt_content.tail = None
+        return element_to_string(opt_content, prefixes)
+
+
+def hash_source(source) -> str | None:
+    """Hash a document path or bytes, or return None for other sources"""
+    if not isinstance(source, (str, os.PathLike, bytes, bytearray)):
+        return None
+    digest = hashlib.sha256()
+    OutputCache.hash_source(digest, source)
+    return digest.hexdigest()
+
+
+def get_size(source) -> int | None:
+    """Get the size in bytes of a document path, bytes or in-memory file"""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer().nbytes
+    if DPAMVIFGenerator.is_path(source):
+        try:
+            return os.path.getsize(source)
+        except OSError:
+            return None
+    return None
+
+
+@contextmanager
+def open_input_file(in_vif: XMLSource):
+    """Provide the input VIF as a binary file, opening input paths"""
+    if DPAMVIFGenerator.is_path(in_vif):
+        with open(in_vif, "rb") as in_file:
+            yield in_file
+    else:
+        yield DPAMVIFGenerator.get_xml_source(in_vif)
+
+
+@contextmanager
+def open_input_bytes(in_vif: XMLSource):
+    """Provide the input VIF's bytes, memory mapping input files"""
+    if DPAMVIFGenerator.is_path(in_vif):
+        with open(in_vif, "rb") as in_file, mmap.mmap(
+            in_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            yield data
+    elif isinstance(in_vif, (bytes, bytearray)):
+        yield in_vif
+    else:
+        yield in_vif.read()
+
+
+@contextmanager
+def open_output_vif(out_vif: XMLDestination, progress: GenerationProgress = None):
+    """
+    Provide a binary output file, removing partially written output files,
+    e.g. when generation is cancelled. With progress, it advances by the
+    bytes written.
+    """
+    track = progress is not None and progress.active
+    if not DPAMVIFGenerator.is_path(out_vif):
+        yield ProgressWriter(out_vif, progress) if track else out_vif
+        return
+    try:
+        with open(out_vif, "wb") as out_file:
+            yield ProgressWriter(out_file, progress) if track else out_file
+    except BaseException:
+        if os.path.exists(out_vif):
+            os.remove(out_vif)
+        raise
+
+
+@contextmanager
+def open_output_text(out_vif: XMLDestination, progress: GenerationProgress = None):
+    """Open the output VIF for UTF-8 text, see open_output_vif"""
+    with open_output_vif(out_vif, progress) as out_file:
+        f = io.TextIOWrapper(
+            out_file, encoding="utf8", errors="xmlcharrefreplace", newline="\n"
+        )
+        try:
+            yield f
+        finally:
+            # Leave the output file open for its owner
+            f.flush()
+            f.detach()
+
+
+# Documents loaded during this session, e.g. by the GUI's generations
+DOCUMENT_CACHE = DocumentCache()
 
 
 def main(**kwargs):
     # Generate DPAM VIF XML
     generator = DPAMVIFGenerator(**kwargs)
     generator.generate_vif()
+    if generator.cache is not None:
+        generator.cache.evict()
+
+
+def compile_settings(
+    settings: XMLSource | ET.ElementTree | ET.Element, out_path: str | os.PathLike
+):
+    """Compile a DPAM Settings XML into a CompiledSettings JSON artifact"""
+    from dpamvifgenerator.compiled import CompiledSettings
+
+    if settings is None:
+        error = "Error: Compiling settings requires a settings file (-s)"
+        logging.error(error)
+        raise MissingGeneratorArg(error)
+    logging.info(f"Compiling DPAM settings to {out_path}...")
+    CompiledSettings.compile(settings).save(out_path)
+
+
+def generate(
+    in_vif: XMLSource,
+    settings: XMLSource | ET.ElementTree | ET.Element,
+    out_vif: XMLDestination = None,
+    **kwargs,
+) -> bytes | None:
+    """
+    Generate a DPAM VIF without any temporary files.
+    @params:
+        in_vif      - Required  : input USBIF VIF path, bytes or binary file
+        settings    - Required  : DPAM settings path, bytes, binary file,
+                                  an already built ElementTree or Element,
+                                  or compiled settings (see compile_settings)
+        out_vif     - Optional  : output VIF path or binary file. If not
+                                  given, the generated VIF is returned as bytes
+        kwargs      - Optional  : any other DPAMVIFGenerator arguments, e.g.
+                                  progress, a callback given 0-100 as bytes
+                                  are processed, or cancel_token, a
+                                  CancellationToken to stop generation early
+    """
+    output = io.BytesIO() if out_vif is None else out_vif
+    # Library callers get no terminal progress bar unless they ask for one
+    kwargs.setdefault("progress", None)
+    generator = DPAMVIFGenerator(
+        in_vif=in_vif, settings=settings, out_vif=output, **kwargs
+    )
+    generator.generate_vif()
+    if out_vif is None:
+        return output.getvalue()
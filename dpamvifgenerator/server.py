@@ -0,0 +1,234 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import base64
+import binascii
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dpamvifgenerator import LOG_LEVEL_MAP, LOGGING_FORMAT, buildinfo, script
+from dpamvifgenerator.compiled import CompiledSettings
+from dpamvifgenerator.skeleton import VIFSkeleton
+from dpamvifgenerator.utility.lrucache import LRUCache
+
+# Server Consts
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+MAX_REQUEST_SIZE = 256 * 1024 * 1024  # Bytes
+CACHE_ENTRIES = 32
+CACHE_MAX_SIZE = 256 * 1024 * 1024  # Bytes held by each of the caches
+QUEUE_TIMEOUT = 30  # Seconds to wait for a free generation slot
+
+
+# Exception Classes
+class ServerBusy(Exception):
+    pass
+
+
+class InvalidRequest(Exception):
+    pass
+
+
+# Generation Service Class
+class GenerationService:
+    """
+    Generates DPAM VIFs from in-memory payloads, keeping input VIF skeletons
+    and compiled settings warm between requests. Skeletons hold the input
+    serialized once, not its parsed tree. Each cache keeps at most
+    cache_entries entries, and evicts the least recently used once their
+    serialized bytes add up to more than cache_max_size. At most
+    max_concurrent generations run at once, later requests wait for a slot.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = None,
+        cache_entries: int = CACHE_ENTRIES,
+        cache_max_size: int = CACHE_MAX_SIZE,
+    ):
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.skeletons = LRUCache(cache_entries, cache_max_size)
+        self.settings = LRUCache(cache_entries, cache_max_size)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @staticmethod
+    def get_digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def get_settings(self, settings: bytes) -> CompiledSettings:
+        def create():
+            if script.DPAMVIFGenerator.is_compiled_settings(settings):
+                return CompiledSettings.load(settings)
+            return CompiledSettings.compile(settings)
+
+        return self.settings.get(
+            GenerationService.get_digest(settings),
+            create,
+            lambda compiled: sum(
+                len(fragment) for fragment, _ in compiled.ports.values()
+            ),
+        )
+
+    def get_skeleton(self, in_vif: bytes, preserve_formatting: bool) -> VIFSkeleton:
+        key = (GenerationService.get_digest(in_vif), preserve_formatting)
+        return self.skeletons.get(
+            key,
+            lambda: VIFSkeleton(in_vif, preserve_formatting),
+            lambda skeleton: len(skeleton.data),
+        )
+
+    def generate(
+        self, in_vif: bytes, settings: bytes, preserve_formatting: bool = False
+    ) -> bytes:
+        if not self.slots.acquire(timeout=QUEUE_TIMEOUT):
+            raise ServerBusy(
+                "Error: All {} generation slots busy".format(self.max_concurrent)
+            )
+        try:
+            with self.lock:
+                self.requests += 1
+            skeleton = self.get_skeleton(in_vif, preserve_formatting)
+            output = io.BytesIO()
+            skeleton.generate(self.get_settings(settings), output)
+            return output.getvalue()
+        finally:
+            self.slots.release()
+
+    def stats(self) -> dict:
+        with self.lock:
+            requests = self.requests
+        return {
+            "status": "ok",
+            "version": buildinfo.__version__,
+            "max_concurrent": self.max_concurrent,
+            "requests": requests,
+            "skeleton_cache": self.skeletons.stats(),
+            "settings_cache": self.settings.stats(),
+        }
+
+
+# HTTP Request Handler Class
+class GenerationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Local HTTP API:
+        GET  /health    - server status and cache statistics as JSON
+        POST /generate  - JSON body {"in_vif": base64, "settings": base64,
+                          "preserve_formatting": bool}, responds with the
+                          generated VIF XML or a JSON {"error": message}
+    """
+
+    server_version = "{}/{}".format(
+        buildinfo.__product__.replace(" ", ""), buildinfo.__version__
+    )
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error_json(404, "Error: Unknown path: {}".format(self.path))
+            return
+        self.send_json(200, self.server.service.stats())
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self.send_error_json(404, "Error: Unknown path: {}".format(self.path))
+            return
+        try:
+            in_vif, settings, preserve_formatting = self.read_generate_request()
+            output = self.server.service.generate(in_vif, settings, preserve_formatting)
+        except InvalidRequest as e:
+            # The body may not have been read, so the connection can't be reused
+            self.close_connection = True
+            self.send_error_json(400, str(e))
+        except (
+            script.InvalidInputVIF,
+            script.InvalidSettingsXML,
+            script.MissingGeneratorArg,
+        ) as e:
+            self.send_error_json(422, str(e))
+        except ServerBusy as e:
+            self.send_error_json(503, str(e))
+        except Exception as e:
+            logging.exception("Generation request failed")
+            self.send_error_json(500, "Error: {}: {}".format(type(e).__name__, e))
+        else:
+            self.send_body(200, "application/xml", output)
+
+    def read_generate_request(self) -> tuple[bytes, bytes, bool]:
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise InvalidRequest("Error: Missing Content-Length header")
+        if length > MAX_REQUEST_SIZE:
+            raise InvalidRequest(
+                "Error: Request of {} bytes exceeds limit of {} bytes".format(
+                    length, MAX_REQUEST_SIZE
+                )
+            )
+        try:
+            request = json.loads(self.rfile.read(length))
+            in_vif = base64.b64decode(request["in_vif"], validate=True)
+            settings = base64.b64decode(request["settings"], validate=True)
+            preserve_formatting = bool(request.get("preserve_formatting", False))
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            raise InvalidRequest("Error: Invalid generate request. {}".format(e))
+        return in_vif, settings, preserve_formatting
+
+    def send_body(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data: dict):
+        self.send_body(status, "application/json", json.dumps(data).encode("utf8"))
+
+    def send_error_json(self, status: int, error: str):
+        self.send_json(status, {"error": error})
+
+    def log_message(self, format: str, *args):
+        # Per-request lines would dominate the log under load
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+
+# Generation Server Class
+class GenerationServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Allow bursts of clients connecting at once
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], service: GenerationService):
+        super().__init__(address, GenerationRequestHandler)
+        self.service = service
+
+
+def main(port: int = SERVER_PORT, max_concurrent: int = None):
+    # Configure logging
+    logging.basicConfig(
+        level=LOG_LEVEL_MAP["info"], format=LOGGING_FORMAT, datefmt="%H:%M:%S"
+    )
+
+    # Serve generation requests on localhost until interrupted
+    service = GenerationService(max_concurrent)
+    with GenerationServer((SERVER_HOST, port), service) as server:
+        host, port = server.server_address[:2]
+        logging.info(
+            f"Serving DPAM VIF generation on http://{host}:{port} with "
+            f"{service.max_concurrent} concurrent generations, Ctrl-C to stop"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Server stopped")
@@ -0,0 +1,137 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import io
+import logging
+from xml.etree import ElementTree as ET
+from xml.parsers import expat
+
+from dpamvifgenerator import script
+from dpamvifgenerator.compiled import CompiledSettings
+from dpamvifgenerator.splice import VIFComponentScanner, write_spliced_vif
+from dpamvifgenerator.tracing import Tracer
+from dpamvifgenerator.utility import XML_INDENT
+from dpamvifgenerator.utility.xmlwriter import (
+    XML_DECLARATION,
+    get_namespaces,
+    write_element,
+)
+
+
+# Input VIF Skeleton Class
+class VIFSkeleton:
+    """
+    Input VIF parsed once and serialized without DPAM content, so that DPAM
+    content from any number of settings can be spliced into the same bytes.
+    Without preserve_formatting the skeleton is indented the same way as
+    write_output_vif, or as stream_dpam_vif with streaming, which serializes
+    large input VIF files without parsing them in full. Generating from a
+    skeleton is safe from many threads.
+    """
+
+    def __init__(
+        self,
+        in_vif: script.XMLSource,
+        preserve_formatting: bool = False,
+        tracer: Tracer = None,
+        progress: script.GenerationProgress = None,
+        streaming: bool = False,
+    ):
+        self.in_vif = in_vif
+        tracer = tracer or Tracer()
+        with tracer.span("parse_input", bytes=script.get_size(in_vif)) as span:
+            self.load(in_vif, preserve_formatting, progress, streaming)
+            span.attributes.update(self.scanner.get_counts())
+
+    def load(
+        self,
+        in_vif: script.XMLSource,
+        preserve_formatting: bool,
+        progress: script.GenerationProgress = None,
+        streaming: bool = False,
+    ):
+        if preserve_formatting:
+            with script.open_input_bytes(in_vif) as data:
+                self.data = bytes(data)
+        elif streaming:
+            # Keep only the serialized skeleton in memory, not the parsed tree
+            output = io.BytesIO()
+            script.DPAMVIFGenerator.stream_dpam_vif(
+                in_vif, None, output, progress=progress
+            )
+            self.data = output.getvalue()
+        else:
+            input_vif = script.DPAMVIFGenerator.load_input_vif(in_vif, progress)
+            ET.indent(input_vif, space=XML_INDENT, level=0)
+            # Declare the same namespaces as write_output_vif would with DPAM
+            # content, using a placeholder for the first inserted block
+            root = input_vif.getroot()
+            prefix_map = script.DPAMVIFGenerator.get_prefix_map()
+            prefixes = script.DPAMVIFGenerator.get_uri_prefixes()
+            component = root.find(".//vif:Component", prefix_map)
+            placeholder = ET.Element("{{{}}}OptionalContent".format(prefix_map["opt"]))
+            if component is not None:
+                component.append(placeholder)
+            namespaces = get_namespaces(root, prefixes)
+            if component is not None:
+                component.remove(placeholder)
+            skeleton = [XML_DECLARATION]
+            write_element(skeleton.append, root, prefixes, namespaces)
+            self.data = "".join(skeleton).encode("utf8")
+        # Serialized skeletons are UTF-8 even though they declare "utf8"
+        encoding = None if preserve_formatting else "utf-8"
+        try:
+            self.scanner = VIFComponentScanner(self.data, encoding=encoding)
+        except (ValueError, expat.ExpatError, script.InvalidInputVIF) as e:
+            error = (
+                "Error: Invalid Input USBIF VIF XML file "
+                "provided at path: {}. {}".format(
+                    script.DPAMVIFGenerator.describe_source(in_vif), e
+                )
+            )
+            logging.error(error)
+            raise script.InvalidInputVIF(error)
+
+    def generate(
+        self,
+        settings: script.XMLSource | ET.ElementTree | ET.Element,
+        out_vif: script.XMLDestination,
+        tracer: Tracer = None,
+        progress: script.GenerationProgress = None,
+    ):
+        # Skeletons are shared, so spans go to a tracer per generation
+        tracer = tracer or Tracer()
+        progress = progress or script.GenerationProgress()
+        with tracer.span("generate_vif", mode="skeleton"):
+            # Load DPAM Settings XML, keeping compiled settings pre-serialized
+            progress.stage(0, 20)
+            with tracer.span("parse_settings", bytes=script.get_size(settings)) as span:
+                port_settings = script.DPAMVIFGenerator.load_port_settings(
+                    settings, fragments=True
+                )
+                span.attributes["ports"] = len(port_settings)
+            self.write(port_settings, out_vif, tracer, progress)
+
+    def write(
+        self,
+        port_settings: dict[str, ET.Element] | CompiledSettings,
+        out_vif: script.XMLDestination,
+        tracer: Tracer,
+        progress: script.GenerationProgress,
+    ):
+        """Write the skeleton with the loaded port settings spliced in"""
+        with tracer.span("merge", **self.scanner.get_counts()):
+            progress.stage(20, 30)
+            splices = self.scanner.get_splices(port_settings, progress)
+        with tracer.span("write") as span:
+            total = len(self.data) + sum(len(fragment) for _, fragment in splices)
+            progress.stage(30, 100, total)
+            write_spliced_vif(self.data, splices, out_vif, progress)
+            span.attributes["bytes"] = script.get_size(out_vif)
+        progress.set(100)
+        return splices
@@ -0,0 +1,250 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+from typing import NamedTuple
+from xml.etree import ElementTree as ET
+from xml.parsers import expat
+
+from dpamvifgenerator import script
+from dpamvifgenerator.compiled import CompiledSettings
+from dpamvifgenerator.utility import XML_INDENT
+
+# Splice Consts
+SPLICE_ENCODINGS = ("utf-8", "utf8")
+
+
+# Component Splice Point Class
+class SplicePoint(NamedTuple):
+    port_label: str | None
+    offset: int
+    merge: bool
+
+
+# Component Insertion Class
+class Insertion(NamedTuple):
+    port_label: str | None
+    offset: int
+    merge: bool
+    indent: str
+    newline: str
+    suffix: str
+
+
+def get_dpam_fragment(
+    port_settings: dict[str, ET.Element] | CompiledSettings,
+    insertion: Insertion,
+    prefixes: dict[str, str],
+) -> bytes:
+    """Serialize a port's DPAM content to splice in at an insertion"""
+    script.DPAMVIFGenerator.check_port_settings(port_settings, insertion.port_label)
+    if isinstance(port_settings, CompiledSettings):
+        fragment = port_settings.get_fragment(
+            insertion.port_label, insertion.indent, insertion.newline, prefixes
+        )
+    else:
+        fragment = script.DPAMVIFGenerator.serialize_dpam_content(
+            port_settings[insertion.port_label],
+            insertion.indent,
+            insertion.newline,
+            prefixes,
+        )
+    if not insertion.merge:
+        fragment = (
+            "<!--Non-USB Content-->" + insertion.newline + insertion.indent + fragment
+        )
+    return (insertion.newline + insertion.indent + fragment + insertion.suffix).encode(
+        "utf8"
+    )
+
+
+def write_spliced_vif(
+    data: bytes,
+    splices: list,
+    out_vif: script.XMLDestination,
+    progress: script.GenerationProgress = None,
+    chunk_size: int = script.STREAMING_CHUNK_SIZE,
+):
+    """Copy data to out_vif, inserting each (offset, fragment) splice in place"""
+    progress = progress or script.GenerationProgress()
+    with script.open_output_vif(out_vif) as out_file, memoryview(data) as view:
+        position = written = 0
+        for offset, fragment in splices + [(len(data), b"")]:
+            # Copy in chunks so progress and cancellation keep up on large inputs
+            for start in range(position, offset, chunk_size):
+                end = min(start + chunk_size, offset)
+                out_file.write(view[start:end])
+                written += end - start
+            out_file.write(fragment)
+            written += len(fragment)
+            position = offset
+            # Advance once per chunk written rather than for every port
+            if written >= chunk_size:
+                progress.advance(written)
+                written = 0
+        progress.advance(written)
+
+
+# Component Scanner Class
+class VIFComponentScanner:
+    """
+    Scan input VIF bytes with expat, recording the byte offset of the end tag
+    that DPAM content is inserted before on each vif:Component. Mirrors
+    insert_dpam_content: DPAM content merges into an existing, non-empty
+    opt:OptionalContent block, or is otherwise appended to the component.
+    """
+
+    def __init__(
+        self,
+        data: bytes,
+        chunk_size: int = script.STREAMING_CHUNK_SIZE,
+        encoding: str = None,
+        progress: script.GenerationProgress = None,
+    ):
+        progress = progress or script.GenerationProgress()
+        prefix_map = script.DPAMVIFGenerator.get_prefix_map()
+        self.component_tag = prefix_map["vif"] + "}Component"
+        self.port_label_tag = prefix_map["vif"] + "}Port_Label"
+        self.opt_content_tag = prefix_map["opt"] + "}OptionalContent"
+        self.data = data
+        self.encoding = None
+        self.namespaces: dict[str, str] = {}
+        self.points: list[SplicePoint] = []
+        # Current component state
+        self.depth = 0
+        self.component_depth = None
+        self.port_label = None
+        self.opt_content_depth = None
+        self.opt_content_open = False
+        self.opt_content_children = 0
+        self.opt_content_offset = None
+        # Scan
+        self.parser = expat.ParserCreate(encoding, namespace_separator="}")
+        self.parser.buffer_text = True
+        self.parser.XmlDeclHandler = self.xml_decl
+        self.parser.StartNamespaceDeclHandler = self.start_ns
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CommentHandler = self.comment
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start : start + chunk_size]
+            self.parser.Parse(chunk, False)
+            progress.advance(len(chunk))
+        self.parser.Parse(b"", True)
+        self.parser = None
+
+    def xml_decl(self, version: str, encoding: str | None, standalone: int):
+        self.encoding = encoding
+
+    def start_ns(self, prefix: str | None, uri: str):
+        if self.depth == 0:
+            self.namespaces.setdefault(uri, prefix or "")
+
+    def start(self, name: str, attrs: dict[str, str]):
+        self.depth += 1
+        if self.component_depth is None:
+            if name == self.component_tag:
+                self.component_depth = self.depth
+        elif self.depth == self.component_depth + 1:
+            if name == self.port_label_tag and self.port_label is None:
+                self.port_label = []
+                self.parser.CharacterDataHandler = self.port_label.append
+            elif name == self.opt_content_tag and self.opt_content_depth is None:
+                self.opt_content_depth = self.depth
+                self.opt_content_open = True
+        elif self.opt_content_open and self.depth == self.opt_content_depth + 1:
+            self.opt_content_children += 1
+
+    def comment(self, data: str):
+        if self.opt_content_open and self.depth == self.opt_content_depth:
+            self.opt_content_children += 1
+
+    def end(self, name: str):
+        if self.component_depth is not None:
+            if self.depth == self.component_depth + 1:
+                self.parser.CharacterDataHandler = None
+                if self.opt_content_open and self.depth == self.opt_content_depth:
+                    self.opt_content_open = False
+                    self.opt_content_offset = self.parser.CurrentByteIndex
+            elif self.depth == self.component_depth:
+                self.add_point()
+        self.depth -= 1
+
+    def add_point(self):
+        # DPAM content is inserted before the component or OptionalContent end tag
+        merge = self.opt_content_children > 0
+        offset = self.opt_content_offset if merge else self.parser.CurrentByteIndex
+        if self.data[offset : offset + 2] != b"</":
+            raise script.InvalidInputVIF("Empty vif:Component element")
+        if self.port_label is None:
+            raise script.InvalidInputVIF("Missing vif:Port_Label from vif:Component")
+        port_label = "".join(self.port_label) or None
+        self.points.append(SplicePoint(port_label, offset, merge))
+        # Reset component state
+        self.component_depth = None
+        self.port_label = None
+        self.opt_content_depth = None
+        self.opt_content_open = False
+        self.opt_content_children = 0
+        self.opt_content_offset = None
+
+    def get_counts(self) -> dict[str, int]:
+        return {
+            "ports": len(self.points),
+            "merged": sum(point.merge for point in self.points),
+        }
+
+    def get_insertions(self) -> list[Insertion]:
+        """Return where and how DPAM content is inserted on each component"""
+        encoding = (self.encoding or "utf-8").lower()
+        if encoding not in SPLICE_ENCODINGS:
+            raise script.InvalidInputVIF(
+                "Unsupported encoding for splicing: {}".format(self.encoding)
+            )
+        insertions = []
+        for point in self.points:
+            # Find the end tag's indentation and the end of the preceding content
+            line_start = self.data.rfind(b"\n", 0, point.offset) + 1
+            end_indent = self.data[line_start : point.offset]
+            newline = (
+                "\r\n" if self.data[line_start - 2 : line_start] == b"\r\n" else "\n"
+            )
+            if end_indent.strip():
+                # End tag shares a line with content, so indent as that content
+                offset = point.offset
+                indent = end_indent[: len(end_indent) - len(end_indent.lstrip())]
+                indent = indent.decode()
+                suffix = newline + indent.removesuffix(XML_INDENT)
+            else:
+                offset, suffix = line_start - 1, ""
+                while offset > 0 and self.data[offset - 1] in b" \t\r\n":
+                    offset -= 1
+                indent = end_indent.decode() + XML_INDENT
+            insertions.append(
+                Insertion(
+                    point.port_label, offset, point.merge, indent, newline, suffix
+                )
+            )
+        return insertions
+
+    def get_splices(
+        self,
+        port_settings: dict[str, ET.Element] | CompiledSettings,
+        progress: script.GenerationProgress = None,
+    ) -> list:
+        """Return (offset, fragment bytes) pairs to insert into the input VIF"""
+        progress = progress or script.GenerationProgress()
+        progress.set_total(len(self.points))
+        # Serialize DPAM content with the input VIF's own namespace prefixes
+        prefixes = dict(self.namespaces)
+        splices = []
+        for index, insertion in enumerate(self.get_insertions(), start=1):
+            fragment = get_dpam_fragment(port_settings, insertion, prefixes)
+            splices.append((insertion.offset, fragment))
+            if not index % script.PROGRESS_BATCH_SIZE:
+                progress.advance(script.PROGRESS_BATCH_SIZE)
+        return splices
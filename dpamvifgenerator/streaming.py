@@ -0,0 +1,199 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+from dataclasses import dataclass
+from typing import Callable
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator import script
+from dpamvifgenerator.utility import XML_INDENT
+from dpamvifgenerator.utility.xmlwriter import (
+    XML_DECLARATION,
+    XML_WRITE_CHUNK,
+    escape_cdata,
+    write_element,
+    write_start_tag,
+)
+
+
+# Streamed Element Class
+@dataclass
+class StreamedElement:
+    # Element written through by StreamingVIFTarget that has not yet ended
+    tag: str
+    prefixes: dict[str, str]
+    qnames: dict[str, str]
+    children: int = 0
+    # Text since the start tag or the last child, not yet written
+    text: str = ""
+
+
+# Streaming Parser Target Class
+class StreamingVIFTarget:
+    """
+    XMLParser target that writes the input VIF as it is parsed. Only each
+    top level vif:Component is built as a tree, so DPAM content can be
+    inserted into it before it is written and discarded. Every other element
+    is written through as its events arrive, so large vendor sections are
+    never held in memory. Output matches the indentation of write_output_vif.
+    Without port_settings, components are written without DPAM content.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str], object],
+        port_settings: dict[str, ET.Element] | None,
+    ):
+        self.write = write
+        self.port_settings = port_settings
+        self.component_tag = "{{{}}}Component".format(
+            script.DPAMVIFGenerator.get_prefix_map()["vif"]
+        )
+        # Prefer the generator's prefixes, then the input VIF's own
+        self.prefixes = script.DPAMVIFGenerator.get_uri_prefixes()
+        # Qualified names, reused by every top level element written
+        self.qnames: dict[str, str] = {}
+        self.root_namespaces: list[str] = []
+        self.depth = 0
+        self.builder = None
+        # Elements being written through, and output not yet written
+        self.elements: list[StreamedElement] = []
+        self.buffer: list[str] = []
+        self.root_tag = None
+        self.root_text = ""
+        self.root_children = 0
+        self.ports = 0
+        self.merged = 0
+
+    def start_ns(self, prefix: str, uri: str):
+        # Only the root's namespaces are in scope for every element written,
+        # others are declared again by write_start_tag where they are used
+        if self.depth == 0:
+            self.prefixes.setdefault(uri, prefix)
+            self.root_namespaces.append(uri)
+
+    def start(self, tag: str, attrib: dict[str, str]):
+        self.depth += 1
+        if self.depth == 1:
+            self.write(XML_DECLARATION)
+            namespaces = {self.prefixes[uri]: uri for uri in self.root_namespaces}
+            # DPAM content is written with the opt prefix
+            opt = script.DPAMVIFGenerator.get_prefix_map()["opt"]
+            namespaces[self.prefixes[opt]] = opt
+            self.root_tag, _, _ = write_start_tag(
+                self.write, ET.Element(tag, attrib), self.prefixes, namespaces
+            )
+        elif self.builder is not None:
+            self.builder.start(tag, attrib)
+        elif self.depth == 2 and tag == self.component_tag:
+            self.builder = ET.TreeBuilder(insert_comments=True)
+            self.builder.start(tag, attrib)
+        else:
+            if self.elements:
+                parent = self.elements[-1]
+                self.start_nested_child(parent)
+                prefixes, qnames = parent.prefixes, parent.qnames
+            else:
+                self.start_child()
+                prefixes, qnames = self.prefixes, self.qnames
+            tag, prefixes, qnames = write_start_tag(
+                self.buffer.append,
+                ET.Element(tag, attrib),
+                prefixes,
+                qnames=qnames,
+            )
+            self.elements.append(StreamedElement(tag, prefixes, qnames))
+
+    def data(self, data: str):
+        if self.builder is not None:
+            self.builder.data(data)
+        elif self.elements:
+            self.elements[-1].text += data
+        else:
+            self.root_text += data
+
+    def comment(self, text: str):
+        if self.builder is not None:
+            self.builder.comment(text)
+        elif self.elements:
+            self.start_nested_child(self.elements[-1])
+            self.buffer.append("<!--{}-->".format(text))
+        elif self.depth == 1:
+            self.write_child(ET.Comment(text))
+
+    def end(self, tag: str):
+        self.depth -= 1
+        if self.builder is not None:
+            elem = self.builder.end(tag)
+            if self.depth == 1:
+                self.builder.close()
+                self.builder = None
+                self.ports += 1
+                if self.port_settings is not None:
+                    self.merged += script.DPAMVIFGenerator.insert_dpam_content(
+                        elem, self.port_settings
+                    )
+                self.write_child(elem)
+        elif self.elements:
+            self.end_element(self.elements.pop())
+        elif self.root_children:
+            self.write(self.indentation("\n"))
+            self.write("</{}>".format(self.root_tag))
+        elif self.root_text:
+            self.write(">{}</{}>".format(escape_cdata(self.root_text), self.root_tag))
+        else:
+            self.write(" />")
+
+    def close(self):
+        pass
+
+    def indentation(self, default: str) -> str:
+        # Keep text between top level elements, otherwise indent like ET.indent
+        text, self.root_text = self.root_text, ""
+        return escape_cdata(text) if text.strip() else default
+
+    def start_child(self):
+        if not self.root_children:
+            self.write(">")
+        self.root_children += 1
+        self.write(self.indentation("\n" + XML_INDENT))
+
+    def write_child(self, elem: ET.Element):
+        self.start_child()
+        ET.indent(elem, space=XML_INDENT, level=1)
+        # Write each element as one string, since text file writes are costly
+        data: list[str] = []
+        write_element(data.append, elem, self.prefixes, qnames=self.qnames)
+        self.write("".join(data))
+
+    def start_nested_child(self, parent: StreamedElement):
+        # Whitespace before a child is replaced with indentation like ET.indent
+        if not parent.children:
+            self.buffer.append(">")
+        parent.children += 1
+        text, parent.text = parent.text, ""
+        if text.strip():
+            self.buffer.append(escape_cdata(text))
+        else:
+            self.buffer.append("\n" + XML_INDENT * (len(self.elements) + 1))
+
+    def end_element(self, elem: StreamedElement):
+        if elem.children:
+            if elem.text.strip():
+                self.buffer.append(escape_cdata(elem.text))
+            else:
+                self.buffer.append("\n" + XML_INDENT * (len(self.elements) + 1))
+            self.buffer.append("</" + elem.tag + ">")
+        elif elem.text:
+            self.buffer.append(">{}</{}>".format(escape_cdata(elem.text), elem.tag))
+        else:
+            self.buffer.append(" />")
+        # Write in chunks, since text file writes are costly
+        if not self.elements or len(self.buffer) >= XML_WRITE_CHUNK:
+            self.write("".join(self.buffer))
+            self.buffer.clear()
@@ -0,0 +1,115 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+
+# Span Class
+class Span:
+    """A timed stage of a generation, with counts and sizes as attributes"""
+
+    __slots__ = ("name", "attributes", "start", "duration", "pid", "tid")
+
+    def __init__(self, name: str, attributes: dict = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+
+    def end(self):
+        self.duration = time.perf_counter() - self.start
+
+    def describe(self) -> str:
+        attributes = ", ".join(
+            "{}={}".format(key, value) for key, value in self.attributes.items()
+        )
+        return "{} {:.2f} ms{}".format(
+            self.name,
+            self.duration * 1000,
+            " ({})".format(attributes) if attributes else "",
+        )
+
+
+# Tracer Class
+class Tracer:
+    """
+    Records timed spans around each stage of a generation. listener, if
+    given, is called with each span as soon as it ends, from the thread that
+    ran the stage.
+    """
+
+    def __init__(self, listener: Callable[[Span], object] = None):
+        self.listener = listener
+        self.spans: list[Span] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = Span(name, attributes)
+        try:
+            yield span
+        finally:
+            span.end()
+            self.spans.append(span)
+            if self.listener:
+                self.listener(span)
+
+    def add_spans(self, spans: list):
+        # Collect spans recorded in another process, e.g. by a batch worker
+        self.spans.extend(spans)
+
+    def get_trace_events(self) -> list[dict]:
+        """Spans as Chrome trace events, viewable in chrome://tracing or Perfetto"""
+        return [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": span.pid,
+                "tid": span.tid,
+                "args": span.attributes,
+            }
+            for span in sorted(self.spans, key=lambda span: span.start)
+        ]
+
+    def write_trace_json(self, out_path: str | os.PathLike):
+        with open(out_path, "w", encoding="utf8") as out_file:
+            json.dump(
+                {"traceEvents": self.get_trace_events(), "displayTimeUnit": "ms"},
+                out_file,
+            )
+
+    def get_summary(self) -> str:
+        """Total time, call count and share of time per stage, slowest first"""
+        totals: dict[str, list] = {}
+        for span in self.spans:
+            total = totals.setdefault(span.name, [0.0, 0])
+            total[0] += span.duration
+            total[1] += 1
+        # Shares are of total generation time, as generate_vif spans contain
+        # every other stage
+        overall = totals.get("generate_vif", [0.0])[0] or sum(
+            duration for duration, _ in totals.values()
+        )
+        lines = ["Stage timings:"]
+        for name, (duration, count) in sorted(
+            totals.items(), key=lambda item: item[1][0], reverse=True
+        ):
+            share = duration / overall * 100 if overall else 0
+            lines.append(
+                f"  {name:<20} {duration * 1000:10.2f} ms  {count:5d} calls  "
+                f"{share:5.1f}%"
+            )
+        return "\n".join(lines)
@@ -6,15 +6,3 @@
 # IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
 # PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
 ######################################################
-from PySide6.QtCore import QObject, Signal, Slot
-from PySide6.QtWidgets import QProgressBar
-
-
-class Worker(QObject):
-    action = Signal(QProgressBar)
-    finished = Signal()
-
-    @Slot()
-    def run(self, progress: QProgressBar = None):
-        self.action.emit(progress)
-        self.finished.emit()
@@ -7,24 +7,34 @@
 # PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
 ######################################################
 import errno
+import importlib
+import importlib.util
+import logging
 import os
 import platform
 import subprocess
-
-import appdirs
-from PySide6.QtCore import QFile, QIODevice
-from PySide6.QtUiTools import QUiLoader
-from PySide6.QtWidgets import QWidget
+from typing import TYPE_CHECKING
 
 from dpamvifgenerator import buildinfo
 
+if TYPE_CHECKING:
+    from PySide6.QtWidgets import QWidget
+
 # Utility Consts
+# Qt and appdirs are imported where used so batch mode never loads the GUI stack
 XML_INDENT = "  "
+VIF_PREFIX_MAP = {
+    "vif": "http://usb.org/VendorInfoFile.xsd",
+    "xsi": "http://www.w3.org/2001/XMLSchema-instance",
+    "opt": "http://usb.org/VendorInfoFileOptionalContent.xsd",
+}
 
 
 # Utility Functions
 def setup_storage() -> str:
     """Setup local storage for saving files temporarily"""
+    import appdirs
+
     directories = appdirs.AppDirs(buildinfo.__product__, buildinfo.__company__)
     # Create user data dir for storing app persistent data
     user_data_dir = directories.user_data_dir
@@ -49,8 +59,40 @@ def get_data_file_path(dir_name: str, file_name: str) -> str:
     return os.path.join(root, dir_name, file_name)
 
 
-def load_ui_file(ui_file_path: str) -> QWidget:
+def load_compiled_ui(ui_file_path: str) -> "QWidget | None":
+    """Create the form of a Qt UI file from its module compiled by build_ui.py"""
+    name = os.path.splitext(os.path.basename(ui_file_path))[0]
+    spec = importlib.util.find_spec(f"dpamvifgenerator.uifiles.ui_{name}")
+    if spec is None:
+        return None
+    # Fall back to the UI file if it was edited after being compiled
+    if (
+        spec.has_location
+        and os.path.isfile(spec.origin)
+        and os.path.isfile(ui_file_path)
+        and os.path.getmtime(ui_file_path) > os.path.getmtime(spec.origin)
+    ):
+        logging.debug(f"Compiled UI is older than {ui_file_path}, loading UI file")
+        return None
+    module = importlib.import_module(spec.name)
+    window = module.UI_WIDGET_CLASS()
+    form = module.UI_FORM_CLASS()
+    form.setupUi(window)
+    # Expose child widgets as attributes, the same as QUiLoader
+    for widget_name, widget in vars(form).items():
+        setattr(window, widget_name, widget)
+    return window
+
+
+def load_ui_file(ui_file_path: str) -> "QWidget":
     """Load a Qt UI file and return as a QWidget window handle"""
+    window = load_compiled_ui(ui_file_path)
+    if window is not None:
+        return window
+
+    from PySide6.QtCore import QFile, QIODevice
+    from PySide6.QtUiTools import QUiLoader
+
     ui_file = QFile(ui_file_path)
     if not ui_file.open(QIODevice.ReadOnly):
         print(f"Cannot open {ui_file_path}: {ui_file.errorString()}")
@@ -0,0 +1,165 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import itertools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from PySide6.QtCore import QObject, Signal
+
+from dpamvifgenerator.script import CancellationToken, GenerationCancelled
+
+# Job Queue Consts
+JOB_QUEUE_WORKERS = 2  # Generation holds the GIL, so more workers add little
+JOB_QUEUED = "Queued"
+JOB_RUNNING = "Running"
+JOB_COMPLETE = "Complete"
+JOB_CANCELLED = "Cancelled"
+JOB_FAILED = "Failed"
+JOB_FINISHED_STATES = (JOB_COMPLETE, JOB_CANCELLED, JOB_FAILED)
+
+
+# Job Class
+class Job:
+    """
+    An action queued on a JobQueue. The action is called with the job, and
+    reports progress with set_progress and checks cancel_token as it runs.
+    done is resolved once the job has stopped, or will never start.
+    """
+
+    def __init__(self, queue: "JobQueue", action: Callable[["Job"], None], key=None):
+        self.id = next(queue.job_ids)
+        self.queue = queue
+        self.action = action
+        self.key = key
+        self.cancel_token = CancellationToken()
+        self.state = JOB_QUEUED
+        self.future: Future = None
+        self.done = Future()
+
+    def set_progress(self, value: int):
+        self.queue.job_progress.emit(self.id, value)
+
+    def set_state(self, state: str, message: str = ""):
+        self.state = state
+        self.queue.job_state.emit(self.id, state, message)
+
+    def is_finished(self) -> bool:
+        return self.state in JOB_FINISHED_STATES
+
+
+# Job Queue Class
+class JobQueue(QObject):
+    """
+    Runs jobs on a thread pool, at most max_workers at once and the rest in
+    order as workers free up. Progress and state changes of each job are
+    emitted as signals, so they reach the thread owning the queue through
+    its event loop. A job with the same key as an earlier job, e.g. the same
+    output path, cancels that job and only starts once it has stopped, so
+    the two never write the same file at once.
+    """
+
+    # Job id and progress from 0 to 100
+    job_progress = Signal(int, int)
+    # Job id, new state and a message, e.g. the error of a failed job
+    job_state = Signal(int, str, str)
+
+    def __init__(self, max_workers: int = JOB_QUEUE_WORKERS):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self.job_ids = itertools.count(1)
+        self.jobs: dict[int, Job] = {}
+        # Last job submitted with each key, until it has stopped
+        self.keys: dict[object, Job] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, action: Callable[[Job], None], key=None) -> Job:
+        job = Job(self, action, key)
+        job.done.add_done_callback(lambda _: self.release(job))
+        with self.lock:
+            self.jobs[job.id] = job
+            previous = None
+            if key is not None:
+                previous = self.keys.get(key)
+                self.keys[key] = job
+        if previous is None:
+            self.start(job)
+        else:
+            # Replace the previous job with this key once it has stopped
+            self.cancel(previous.id)
+            previous.done.add_done_callback(lambda _: self.start(job))
+        return job
+
+    def start(self, job: Job):
+        if not job.cancel_token.cancelled:
+            try:
+                job.future = self.executor.submit(self.run, job)
+                job.future.add_done_callback(lambda _: job.done.set_result(None))
+                return
+            except RuntimeError:
+                # Queue was shut down while the job waited for an earlier one
+                job.cancel_token.cancel()
+        if not job.is_finished():
+            job.set_state(JOB_CANCELLED)
+        job.done.set_result(None)
+
+    def run(self, job: Job):
+        if job.cancel_token.cancelled:
+            # Cancelled while being handed to a worker
+            if not job.is_finished():
+                job.set_state(JOB_CANCELLED)
+            return
+        job.set_state(JOB_RUNNING)
+        try:
+            job.action(job)
+        except GenerationCancelled:
+            job.set_state(JOB_CANCELLED)
+        except Exception as e:
+            logging.error("Error: Job {} Failed. {}".format(job.id, e))
+            job.set_state(JOB_FAILED, str(e))
+        else:
+            job.set_state(JOB_COMPLETE)
+
+    def release(self, job: Job):
+        with self.lock:
+            if job.key is not None and self.keys.get(job.key) is job:
+                del self.keys[job.key]
+
+    def cancel(self, job_id: int):
+        """Cancel a job, stopping it early if it is already running"""
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished() or job.cancel_token.cancelled:
+            return
+        job.cancel_token.cancel()
+        # Jobs that have not started yet are cancelled straight away
+        if job.future is None or job.future.cancel():
+            job.set_state(JOB_CANCELLED)
+
+    def cancel_all(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def get_active(self) -> list[Job]:
+        return [job for job in self.jobs.values() if not job.is_finished()]
+
+    def remove_finished(self):
+        with self.lock:
+            self.jobs = {
+                job_id: job
+                for job_id, job in self.jobs.items()
+                if not job.is_finished()
+            }
+
+    def shutdown(self):
+        """Cancel every job and wait for running jobs to stop"""
+        self.cancel_all()
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,82 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+# LRU Cache Consts
+LRU_CACHE_ENTRIES = 32
+
+
+# LRU Cache Class
+class LRUCache:
+    """
+    Thread-safe mapping that keeps only the most recently used entries. With
+    max_size, entries are also evicted once the sizes given for them add up
+    to more than max_size, and an entry larger than max_size is not kept.
+    """
+
+    def __init__(self, max_entries: int = LRU_CACHE_ENTRIES, max_size: int = None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.sizes: dict = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, create, size: Callable[[object], int] = None):
+        """
+        Get the entry for key, adding create() on a miss. size, if given, is
+        called with a new entry to get the size it counts against max_size.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        # Create outside the lock so slow entries do not block other requests
+        value = create()
+        entry_size = size(value) if size else 0
+        if self.max_size is not None and entry_size > self.max_size:
+            # Keeping the entry would evict every other entry, and then itself
+            return value
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = value
+            self.sizes[key] = entry_size
+            self.size += entry_size
+            while len(self.entries) > self.max_entries or (
+                self.max_size is not None and self.size > self.max_size
+            ):
+                self.remove(next(iter(self.entries)))
+        return value
+
+    def pop(self, key):
+        with self.lock:
+            self.remove(key)
+
+    def remove(self, key):
+        # Callers hold the lock
+        if key in self.entries:
+            del self.entries[key]
+            self.size -= self.sizes.pop(key)
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+            if self.max_size is not None:
+                stats["size"] = self.size
+            return stats
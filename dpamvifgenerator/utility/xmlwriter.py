@@ -0,0 +1,250 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+from typing import Callable
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator.utility import VIF_PREFIX_MAP
+
+# XML Writer Consts
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+XML_DECLARATION = "<?xml version='1.0' encoding='utf8'?>\n"
+VIF_URI_PREFIXES = {uri: prefix for prefix, uri in VIF_PREFIX_MAP.items()}
+XML_WRITE_CHUNK = 4096  # Strings collected by write_document before writing
+
+
+def escape_cdata(text: str) -> str:
+    """Escape element text the same way ElementTree does"""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attrib(text: str) -> str:
+    """Escape an attribute value the same way ElementTree does"""
+    text = escape_cdata(text)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+def get_known_prefix(uri: str) -> str:
+    """
+    Get the prefix ElementTree would give uri: the VIF prefixes, then the
+    prefixes ElementTree knows by default, such as xs and dc
+    """
+    return VIF_URI_PREFIXES.get(uri) or ET._namespace_map.get(uri)
+
+
+def qualify_name(name: str, prefixes: dict[str, str], declarations: dict) -> str:
+    """
+    Convert an ElementTree "{uri}local" name to "prefix:local". Namespaces
+    without a prefix in scope are given one, preferring the known prefixes, and
+    added to declarations so they can be declared on the element being written.
+    """
+    if name[:1] != "{":
+        return name
+    uri, local = name[1:].split("}", 1)
+    if uri == XML_NAMESPACE:
+        return "xml:" + local
+    prefix = prefixes.get(uri)
+    if prefix is None:
+        prefix = (
+            declarations.get(uri)
+            or get_known_prefix(uri)
+            or "ns{}".format(len(declarations))
+        )
+        declarations[uri] = prefix
+    return "{}:{}".format(prefix, local) if prefix else local
+
+
+def get_qname(
+    name: str, prefixes: dict[str, str], qnames: dict[str, str], declarations: dict
+) -> str:
+    # Names are only cached for the scope when no declaration was needed
+    qname = qnames.get(name)
+    if qname is None:
+        count = len(declarations)
+        qname = qualify_name(name, prefixes, declarations)
+        if len(declarations) == count and (
+            name[:1] != "{" or name[1:].split("}", 1)[0] not in declarations
+        ):
+            qnames[name] = qname
+    return qname
+
+
+def write_start_tag(
+    write: Callable[[str], object],
+    elem: ET.Element,
+    prefixes: dict[str, str],
+    namespaces: dict[str, str] = None,
+    qnames: dict[str, str] = None,
+) -> tuple[str, dict[str, str], dict[str, str]]:
+    """
+    Write an element's start tag without its closing bracket. namespaces maps
+    prefix to uri for any xmlns declarations that belong on this element.
+    qnames caches qualified names for prefixes, and is shared by every
+    element in the same namespace scope. Returns the qualified tag name, and
+    the uri to prefix map and qualified name cache in scope for the element's
+    children, which are only copied if the element declares namespaces.
+    """
+    if namespaces:
+        # Namespaces declared on the element apply to its own names too
+        prefixes = dict(prefixes)
+        prefixes.update({uri: prefix for prefix, uri in namespaces.items()})
+        qnames = {}
+    elif qnames is None:
+        qnames = {}
+    declarations: dict[str, str] = {}
+    tag = qnames.get(elem.tag) or get_qname(elem.tag, prefixes, qnames, declarations)
+    attributes = elem.items()
+    if attributes:
+        attributes = [
+            (get_qname(key, prefixes, qnames, declarations), value)
+            for key, value in attributes
+        ]
+    if declarations:
+        namespaces = dict(namespaces or {})
+        namespaces.update({prefix: uri for uri, prefix in declarations.items()})
+        prefixes = dict(prefixes)
+        prefixes.update(declarations)
+        qnames = {}
+    write("<" + tag)
+    if namespaces:
+        for prefix, uri in sorted(namespaces.items()):
+            xmlns = "xmlns:" + prefix if prefix else "xmlns"
+            write(' {}="{}"'.format(xmlns, escape_attrib(uri)))
+    for key, value in attributes:
+        write(' {}="{}"'.format(key, escape_attrib(value)))
+    return tag, prefixes, qnames
+
+
+def write_element(
+    write: Callable[[str], object],
+    elem: ET.Element,
+    prefixes: dict[str, str],
+    namespaces: dict[str, str] = None,
+    qnames: dict[str, str] = None,
+):
+    """
+    Serialize an element, its children and its tail using the given uri to
+    prefix map instead of ElementTree's global namespace registry. Pass the
+    same qnames to every call with the same prefixes to reuse qualified names
+    across calls, as ElementTree.write does for a document.
+    """
+    tag = elem.tag
+    if tag is ET.Comment:
+        write("<!--{}-->".format(elem.text))
+    elif tag is ET.ProcessingInstruction:
+        write("<?{}?>".format(elem.text))
+    else:
+        tag, prefixes, qnames = write_start_tag(
+            write, elem, prefixes, namespaces, qnames
+        )
+        text = elem.text
+        if text or len(elem):
+            write(">")
+            if text:
+                write(escape_cdata(text))
+            for child in elem:
+                write_element(write, child, prefixes, None, qnames)
+            write("</" + tag + ">")
+        else:
+            write(" />")
+    if elem.tail:
+        write(escape_cdata(elem.tail))
+
+
+def used_namespaces(elem: ET.Element) -> set[str]:
+    """Get the namespace uris used by tags and attributes under elem"""
+    names = set()
+    for node in elem.iter():
+        if isinstance(node.tag, str):
+            names.add(node.tag)
+            names.update(node.keys())
+    return {
+        name[1:].split("}", 1)[0]
+        for name in names
+        if name[:1] == "{" and not name.startswith("{" + XML_NAMESPACE)
+    }
+
+
+def get_namespaces(elem: ET.Element, prefixes: dict[str, str]) -> dict[str, str]:
+    """
+    Get prefix to uri declarations for every namespace used under elem, in
+    document order. Namespaces without a known prefix are named ns0, ns1, ...
+    the same way ElementTree.write names them.
+    """
+    found: dict[str, str] = {}
+    seen: set = set()
+    for node in elem.iter():
+        # Most names repeat, so only check each name's namespace once
+        names = [node.tag] if node.tag not in seen else []
+        if node.attrib:
+            names += [name for name in node.keys() if name not in seen]
+        for name in names:
+            seen.add(name)
+            if not isinstance(name, str) or name[:1] != "{":
+                continue
+            uri = name[1:].split("}", 1)[0]
+            if uri != XML_NAMESPACE and uri not in found:
+                found[uri] = (
+                    prefixes.get(uri)
+                    or get_known_prefix(uri)
+                    or "ns{}".format(len(found))
+                )
+    return {prefix: uri for uri, prefix in found.items()}
+
+
+def write_document(
+    write: Callable[[str], object], elem: ET.Element, prefixes: dict[str, str]
+):
+    """
+    Write an XML declaration and elem the way ElementTree.write does, with
+    every namespace declared on elem, but without ElementTree's global
+    namespace registry. Text is collected and written in chunks of whole
+    top level elements, since each call to a text file's write is costly.
+    """
+    data = [XML_DECLARATION]
+    tag, prefixes, qnames = write_start_tag(
+        data.append, elem, prefixes, get_namespaces(elem, prefixes)
+    )
+    if elem.text or len(elem):
+        data.append(">")
+        if elem.text:
+            data.append(escape_cdata(elem.text))
+        for child in elem:
+            write_element(data.append, child, prefixes, None, qnames)
+            if len(data) >= XML_WRITE_CHUNK:
+                write("".join(data))
+                data.clear()
+        data.append("</" + tag + ">")
+    else:
+        data.append(" />")
+    if elem.tail:
+        data.append(escape_cdata(elem.tail))
+    write("".join(data))
+
+
+def element_to_string(
+    elem: ET.Element, prefixes: dict[str, str], namespaces: dict[str, str] = None
+) -> str:
+    """Serialize an element to a string, see write_element"""
+    data: list[str] = []
+    write_element(data.append, elem, prefixes, namespaces)
+    return "".join(data)
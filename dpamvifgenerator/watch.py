@@ -0,0 +1,221 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import glob
+import logging
+import os
+import time
+from typing import Callable
+
+from dpamvifgenerator import batch, script
+from dpamvifgenerator.batch import BatchJob, InvalidBatchSource
+from dpamvifgenerator.tracing import Tracer
+
+# Watch Consts
+WATCH_POLL_INTERVAL = 0.25  # Seconds between checks for changed files
+WATCH_DEBOUNCE = 0.5  # Seconds without further changes before regenerating
+
+
+def get_signature(path: str) -> tuple[int, int] | None:
+    # Modification time and size of a file, or None if it is missing
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_source_signature(source: str):
+    # Directories and manifests change when edited, globs when files match
+    if os.path.exists(source):
+        return get_signature(source)
+    return tuple(sorted(glob.glob(source)))
+
+
+def get_job_key(job: BatchJob) -> tuple[str, str, str]:
+    return job.in_vif, job.settings, job.out_vif
+
+
+def is_out_of_date(job: BatchJob) -> bool:
+    # Outputs older than their input VIF or settings file need regenerating
+    try:
+        generated = os.path.getmtime(job.out_vif)
+        return generated < max(
+            os.path.getmtime(job.in_vif), os.path.getmtime(job.settings)
+        )
+    except OSError:
+        return True
+
+
+def load_single_job(in_vif: str, settings: str, out_vif: str) -> list:
+    if not in_vif or not settings or not out_vif:
+        error = (
+            "Error: Watch mode requires an input VIF (-i), a settings file (-s) "
+            "and an output VIF (-o), or batch jobs (-j, --fan-out)"
+        )
+        logging.error(error)
+        raise script.MissingGeneratorArg(error)
+    return [BatchJob(*(os.path.abspath(path) for path in (in_vif, settings, out_vif)))]
+
+
+# Watcher Class
+class Watcher:
+    """
+    Regenerates the outputs of batch jobs whenever their input VIF or
+    settings file changes. Files are polled, so no platform file notification
+    support is needed. A burst of saves is regenerated once, after the files
+    have been quiet for the debounce period, and only the jobs using a
+    changed file are regenerated. Input VIFs and settings are kept parsed in
+    the session DocumentCache, so each regeneration only parses the files
+    that changed. If a batch source is given, e.g. a manifest or directory,
+    jobs are reloaded whenever it changes and new jobs are generated.
+    """
+
+    def __init__(
+        self,
+        load_jobs: Callable[[], list],
+        source: str = None,
+        debounce: float = WATCH_DEBOUNCE,
+        poll_interval: float = WATCH_POLL_INTERVAL,
+        tracer: Tracer = None,
+        **options,
+    ):
+        self.load_jobs = load_jobs
+        self.source = source
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.tracer = tracer
+        self.options = dict(options, document_cache=script.DOCUMENT_CACHE)
+        self.source_signature = get_source_signature(source) if source else None
+        self.jobs: list[BatchJob] = load_jobs()
+        self.signatures = {path: get_signature(path) for path in self.get_paths()}
+        # Changed files and new or out of date jobs, waiting to be regenerated
+        self.changed: set[str] = set()
+        self.stale = {get_job_key(job) for job in self.jobs if is_out_of_date(job)}
+        self.changed_at = float("-inf")
+
+    def get_paths(self) -> set[str]:
+        return {path for job in self.jobs for path in (job.in_vif, job.settings)}
+
+    def reload_jobs(self) -> list[BatchJob]:
+        """Reload jobs if the batch source has changed, returning new jobs"""
+        if not self.source:
+            return []
+        signature = get_source_signature(self.source)
+        if signature == self.source_signature:
+            return []
+        self.source_signature = signature
+        try:
+            jobs = self.load_jobs()
+        except (OSError, InvalidBatchSource, script.MissingGeneratorArg):
+            # Keep watching the previous jobs until the source is fixed
+            return []
+        previous = {get_job_key(job) for job in self.jobs}
+        self.jobs = jobs
+        return [job for job in jobs if get_job_key(job) not in previous]
+
+    def poll(self) -> list[BatchJob]:
+        """Check watched files for changes, returning the jobs due to regenerate"""
+        now = time.monotonic()
+        new_jobs = self.reload_jobs()
+        if new_jobs:
+            self.stale.update(get_job_key(job) for job in new_jobs)
+            self.changed_at = now
+        signatures = {}
+        for path in self.get_paths():
+            signatures[path] = get_signature(path)
+            if path in self.signatures and self.signatures[path] != signatures[path]:
+                self.changed.add(path)
+                self.changed_at = now
+        self.signatures = signatures
+        # Wait for a burst of changes to settle before regenerating
+        if not (self.changed or self.stale) or now - self.changed_at < self.debounce:
+            return []
+        jobs = [
+            job
+            for job in self.jobs
+            if get_job_key(job) in self.stale
+            or job.in_vif in self.changed
+            or job.settings in self.changed
+        ]
+        self.changed.clear()
+        self.stale.clear()
+        return jobs
+
+    def regenerate(self, jobs: list) -> list:
+        results = []
+        for job in jobs:
+            result = batch.run_job(job, self.options, self.tracer is not None)
+            results.append(result)
+            if self.tracer is not None:
+                self.tracer.add_spans(result.spans)
+            if result.success:
+                print(f"  [ OK ] {job.out_vif} ({result.duration:.2f}s)")
+            else:
+                print(f"  [FAIL] {job.out_vif}: {result.error}")
+        return results
+
+    def watch(self):
+        """Regenerate outputs as files change, until interrupted with Ctrl-C"""
+        while True:
+            jobs = self.poll()
+            if jobs:
+                print(f"{time.strftime('%H:%M:%S')} Regenerating {len(jobs)} outputs")
+                self.regenerate(jobs)
+            else:
+                time.sleep(self.poll_interval)
+
+
+def main(
+    in_vif: str = None,
+    settings: str = None,
+    out_vif: str = None,
+    jobs: str = None,
+    fan_out: list = None,
+    debounce: float = WATCH_DEBOUNCE,
+    tracer: Tracer = None,
+    **options,
+):
+    # Watch a batch source, fan-out or single job, returning the exit code
+    if jobs:
+        watcher = Watcher(
+            lambda: batch.load_jobs(jobs, settings, out_vif),
+            jobs,
+            debounce,
+            tracer=tracer,
+            **options,
+        )
+    elif fan_out:
+        watcher = Watcher(
+            lambda: batch.load_fan_out_jobs(in_vif, fan_out, out_vif),
+            debounce=debounce,
+            tracer=tracer,
+            **options,
+        )
+    else:
+        watcher = Watcher(
+            lambda: load_single_job(in_vif, settings, out_vif),
+            debounce=debounce,
+            tracer=tracer,
+            **options,
+        )
+    logging.info(
+        f"Watching {len(watcher.get_paths())} files of {len(watcher.jobs)} jobs "
+        "for changes, press Ctrl-C to stop..."
+    )
+    # Each regeneration is reported on one line, so keep generation quiet
+    logging.info = logging.getLogger().info
+    try:
+        watcher.watch()
+    except KeyboardInterrupt:
+        # Partially written outputs are removed as generation unwinds
+        print()
+        print("Stopped watching")
+    if options.get("cache") is not None:
+        options["cache"].evict()
+    return 0
@@ -0,0 +1,119 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import itertools
+import os
+
+import pytest
+
+from dpamvifgenerator import script
+
+# Test Fixture Consts
+VIF_NAMESPACES = (
+    'xmlns:vif="http://usb.org/VendorInfoFile.xsd" '
+    'xmlns:opt="http://usb.org/VendorInfoFileOptionalContent.xsd"'
+)
+PORTS = 3
+# Ports without and with their own OptionalContent for DPAM content to merge into
+INPUT_VIF = """<?xml version="1.0" encoding="utf-8"?>
+<vif:VIF {}>
+  <vif:VIF_Specification>3.19</vif:VIF_Specification>
+  <!-- Ports -->
+  <vif:Component>
+    <vif:Port_Label>0</vif:Port_Label>
+    <vif:Connector_Type value="2">Type-C®</vif:Connector_Type>
+  </vif:Component>
+  <vif:Component>
+    <vif:Port_Label>1</vif:Port_Label>
+    <opt:OptionalContent identifier="Vendor">
+      <opt:Vendor_Field>1</opt:Vendor_Field>
+    </opt:OptionalContent>
+  </vif:Component>
+  <vif:Component>
+    <vif:Port_Label>2</vif:Port_Label>
+    <vif:PD_Port_Type value="4">DRP</vif:PD_Port_Type>
+  </vif:Component>
+</vif:VIF>
+""".format(
+    VIF_NAMESPACES
+)
+SETTINGS_COMPONENT = """  <vif:Component>
+    <vif:Port_Label>{port}</vif:Port_Label>
+    <opt:OptionalContent identifier="DPAM" xml:space="preserve">
+      <!--;DisplayPort Alternate Mode-->
+      <opt:DisplayPort_Capabilities>
+        <opt:Port_Capability value="1">UFP_D</opt:Port_Capability>
+        <opt:Signaling_Rate>{rate} &amp; {port}</opt:Signaling_Rate>
+        <opt:Pin_Assignment_C value="true" />
+      </opt:DisplayPort_Capabilities>
+    </opt:OptionalContent>
+  </vif:Component>
+"""
+
+
+def make_settings(rates: dict = None) -> bytes:
+    """DPAM Settings XML for every port, with a signaling rate per port label"""
+    rates = rates or {}
+    components = "".join(
+        SETTINGS_COMPONENT.format(port=port, rate=rates.get(str(port), "HBR3"))
+        for port in range(PORTS)
+    )
+    document = '<?xml version="1.0" encoding="utf-8"?>\n<vif:VIF {}>\n{}</vif:VIF>\n'
+    return document.format(VIF_NAMESPACES, components).encode("utf8")
+
+
+@pytest.fixture
+def in_vif(tmp_path):
+    path = tmp_path / "input.xml"
+    path.write_bytes(INPUT_VIF.encode("utf8"))
+    return path
+
+
+@pytest.fixture
+def write_settings(tmp_path):
+    """Write settings with the given per port signaling rates, returning the path"""
+
+    def write(rates: dict = None, name: str = "settings.xml"):
+        path = tmp_path / name
+        path.write_bytes(make_settings(rates))
+        return path
+
+    return write
+
+
+@pytest.fixture
+def settings(write_settings):
+    return write_settings()
+
+
+@pytest.fixture
+def generate(tmp_path):
+    """Generate a DPAM VIF to a new file with the given options, returning it"""
+    outputs = itertools.count()
+
+    def generate(in_vif, settings, **options) -> bytes:
+        out_vif = tmp_path / "output{}.xml".format(next(outputs))
+        script.DPAMVIFGenerator(
+            in_vif=os.fspath(in_vif),
+            settings=os.fspath(settings),
+            out_vif=os.fspath(out_vif),
+            progress=lambda value: None,
+            **options,
+        ).generate_vif()
+        return out_vif.read_bytes()
+
+    return generate
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """Qt application for GUI component tests, without a display"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,210 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import os
+
+import pytest
+
+from dpamvifgenerator import batch, script
+
+
+@pytest.fixture
+def vif_dir(in_vif, tmp_path):
+    """Directory of input VIFs, plus a file that is not a VIF"""
+    path = tmp_path / "vifs"
+    path.mkdir()
+    for name in ("b.xml", "a.xml", "c.xml"):
+        (path / name).write_bytes(in_vif.read_bytes())
+    (path / "notes.txt").write_text("Not a VIF")
+    return path
+
+
+def test_load_directory_jobs(vif_dir, settings, tmp_path):
+    jobs = batch.load_jobs(str(vif_dir), str(settings), str(tmp_path / "out"))
+    assert jobs == [
+        batch.BatchJob(str(vif_dir / name), str(settings), str(tmp_path / "out" / name))
+        for name in ("a.xml", "b.xml", "c.xml")
+    ]
+
+
+def test_load_glob_jobs(vif_dir, settings, tmp_path):
+    jobs = batch.load_jobs(
+        str(vif_dir / "[ab].xml"), str(settings), str(tmp_path / "out")
+    )
+    assert [job.in_vif for job in jobs] == [
+        str(vif_dir / "a.xml"),
+        str(vif_dir / "b.xml"),
+    ]
+
+
+def test_load_manifest_jobs(vif_dir, tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        "# input,settings,output\n"
+        "\n"
+        "vifs/a.xml, a_settings.xml, out/a.xml\n"
+        "vifs/b.xml,b_settings.xml,out/b.xml\n"
+    )
+    jobs = batch.load_jobs(str(manifest))
+    assert jobs == [
+        batch.BatchJob(
+            str(vif_dir / name),
+            str(tmp_path / "{}_settings.xml".format(name[0])),
+            str(tmp_path / "out" / name),
+        )
+        for name in ("a.xml", "b.xml")
+    ]
+
+
+@pytest.mark.parametrize(
+    "rows", ["vifs/a.xml,settings.xml\n", "# Only a comment\n"], ids=["row", "empty"]
+)
+def test_invalid_manifest(tmp_path, rows):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(rows)
+    with pytest.raises(batch.InvalidBatchSource):
+        batch.load_jobs(str(manifest))
+
+
+def test_invalid_batch_sources(vif_dir, settings, tmp_path):
+    with pytest.raises(batch.InvalidBatchSource):
+        batch.load_jobs(str(tmp_path / "*.missing"), str(settings), str(tmp_path))
+    with pytest.raises(script.MissingGeneratorArg):
+        batch.load_jobs(str(vif_dir), None, str(tmp_path / "out"))
+    with pytest.raises(batch.InvalidBatchSource):
+        # Outputs would overwrite their inputs
+        batch.load_jobs(str(vif_dir), str(settings), str(vif_dir))
+
+
+def test_failed_jobs_are_summarized(vif_dir, settings, tmp_path, capsys):
+    (vif_dir / "b.xml").write_text("<vif:VIF")
+    out_dir = tmp_path / "out"
+    exit_code = batch.main(str(vif_dir), str(settings), str(out_dir), workers=2)
+    summary = capsys.readouterr().out
+    assert exit_code == 1
+    assert "[FAIL] {}: Error: Invalid Input USBIF VIF".format(vif_dir / "b.xml") in (
+        summary
+    )
+    assert "2 succeeded, 1 failed, 3 total" in summary
+    # Other jobs still run
+    assert sorted(os.listdir(out_dir)) == ["a.xml", "c.xml"]
+
+
+def test_successful_batch(vif_dir, settings, tmp_path, capsys):
+    out_dir = tmp_path / "out"
+    assert batch.main(str(vif_dir), str(settings), str(out_dir), workers=2) == 0
+    assert "3 succeeded, 0 failed, 3 total" in capsys.readouterr().out
+    expected = tmp_path / "expected.xml"
+    script.DPAMVIFGenerator(
+        in_vif=str(vif_dir / "a.xml"),
+        settings=str(settings),
+        out_vif=str(expected),
+        progress=lambda value: None,
+    ).generate_vif()
+    for name in ("a.xml", "b.xml", "c.xml"):
+        assert (out_dir / name).read_bytes() == expected.read_bytes()
+
+
+def test_batch_options_reach_jobs(vif_dir, settings, tmp_path):
+    out_dir = tmp_path / "out"
+    options = {"preserve_formatting": True}
+    assert batch.main(str(vif_dir), str(settings), str(out_dir), **options) == 0
+    expected = tmp_path / "expected.xml"
+    script.DPAMVIFGenerator(
+        in_vif=str(vif_dir / "a.xml"),
+        settings=str(settings),
+        out_vif=str(expected),
+        progress=lambda value: None,
+        **options,
+    ).generate_vif()
+    assert (out_dir / "a.xml").read_bytes() == expected.read_bytes()
+
+
+def test_load_fan_out_jobs(in_vif, write_settings, tmp_path):
+    settings = [str(write_settings(name=name)) for name in ("p1.xml", "p2.xml")]
+    jobs = batch.load_fan_out_jobs(str(in_vif), settings, str(tmp_path / "out"))
+    assert jobs == [
+        batch.BatchJob(str(in_vif), path, str(tmp_path / "out" / f"input_{name}"))
+        for path, name in zip(settings, ("p1.xml", "p2.xml"))
+    ]
+    other = tmp_path / "other"
+    other.mkdir()
+    duplicate = other / "p1.xml"
+    duplicate.write_bytes(b"")
+    with pytest.raises(batch.InvalidBatchSource):
+        batch.load_fan_out_jobs(
+            str(in_vif), settings + [str(duplicate)], str(tmp_path / "out")
+        )
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_fan_out_matches_single_runs(
+    in_vif, write_settings, generate, tmp_path, capsys, preserve_formatting
+):
+    rates = ("HBR", "HBR2", "HBR3")
+    settings = [write_settings({"0": rate}, name=f"{rate}.xml") for rate in rates]
+    out_dir = tmp_path / "out"
+    code = batch.fan_out_main(
+        str(in_vif),
+        [str(path) for path in settings],
+        str(out_dir),
+        workers=2,
+        preserve_formatting=preserve_formatting,
+    )
+    assert code == 0
+    assert "3 succeeded, 0 failed, 3 total" in capsys.readouterr().out
+    for rate, path in zip(rates, settings):
+        expected = generate(in_vif, path, preserve_formatting=preserve_formatting)
+        assert (out_dir / f"input_{rate}.xml").read_bytes() == expected
+
+
+def test_fan_out_failures_are_summarized(in_vif, settings, tmp_path, capsys):
+    broken = tmp_path / "broken.xml"
+    broken.write_text("<vif:VIF")
+    code = batch.fan_out_main(
+        str(in_vif), [str(settings), str(broken)], str(tmp_path / "out")
+    )
+    assert code == 1
+    output = capsys.readouterr().out
+    assert f"[FAIL] {in_vif}: Error: Invalid DPAM Settings XML" in output
+    assert str(broken) in output
+    assert "1 succeeded, 1 failed, 2 total" in output
+    assert (tmp_path / "out" / "input_settings.xml").exists()
+    assert not (tmp_path / "out" / "input_broken.xml").exists()
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_fan_out_invalid_input_is_summarized(
+    in_vif, write_settings, tmp_path, capsys, preserve_formatting
+):
+    in_vif.write_text("<vif:VIF")
+    settings = [str(write_settings(name=f"{name}.xml")) for name in ("a", "b")]
+    code = batch.fan_out_main(
+        str(in_vif),
+        settings,
+        str(tmp_path / "out"),
+        preserve_formatting=preserve_formatting,
+    )
+    assert code == 1
+    output = capsys.readouterr().out
+    assert output.count(f"[FAIL] {in_vif}: Error: Invalid Input USBIF VIF") == 2
+    assert "0 succeeded, 2 failed, 2 total" in output
+    assert not (tmp_path / "out").exists()
+
+
+def test_fan_out_streams_large_input(
+    in_vif, write_settings, generate, tmp_path, monkeypatch
+):
+    settings = [str(write_settings({"0": "RBR"}, "RBR.xml"))]
+    jobs = batch.load_fan_out_jobs(str(in_vif), settings, str(tmp_path / "out"))
+    expected = generate(in_vif, settings[0])
+    # Input VIFs above the streaming threshold are not parsed in full
+    monkeypatch.setattr(script.DPAMVIFGenerator, "load_input_vif", None)
+    results = batch.run_fan_out(str(in_vif), jobs, streaming_threshold=0)
+    assert [result.success for result in results] == [True]
+    assert (tmp_path / "out" / "input_RBR.xml").read_bytes() == expected
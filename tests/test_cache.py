@@ -0,0 +1,138 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import os
+import time
+
+import pytest
+
+from dpamvifgenerator import buildinfo, cache, script
+from dpamvifgenerator.utility.lrucache import LRUCache
+
+
+@pytest.fixture
+def output_cache(tmp_path):
+    return cache.OutputCache(str(tmp_path / "cache"))
+
+
+def add_entry(output_cache, name: str, size: int, age: float) -> str:
+    """Add a cache entry of the given size, last used age seconds ago"""
+    path = output_cache.get_path(name * 64)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+def test_key_matches_same_content(in_vif, settings):
+    key = cache.OutputCache.get_key(str(in_vif), str(settings), {})
+    assert key == cache.OutputCache.get_key(
+        in_vif.read_bytes(), settings.read_bytes(), {}
+    )
+    assert cache.OutputCache.get_key(str(in_vif), object(), {}) is None
+
+
+def test_key_changes_with_inputs(in_vif, settings, write_settings, monkeypatch):
+    def get_key(settings=settings, options=None):
+        return cache.OutputCache.get_key(str(in_vif), str(settings), options or {})
+
+    key = get_key()
+    assert get_key(write_settings({"1": "UHBR10"}, name="other.xml")) != key
+    assert get_key(options={"preserve_formatting": True}) != key
+    monkeypatch.setattr(buildinfo, "__version__", "0.0.0")
+    assert get_key() != key
+    monkeypatch.undo()
+    monkeypatch.setattr(buildinfo, "__dpam_vif_spec_version__", "0.0")
+    assert get_key() != key
+
+
+def test_evict_by_age(output_cache):
+    old = add_entry(output_cache, "a", 10, cache.CACHE_MAX_AGE + 60)
+    new = add_entry(output_cache, "b", 10, 60)
+    assert output_cache.evict() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+
+def test_evict_by_size(output_cache):
+    output_cache.max_size = 25
+    paths = [
+        add_entry(output_cache, name, 10, age) for name, age in zip("abc", (30, 10, 20))
+    ]
+    assert output_cache.evict() == 1
+    # Least recently used entry goes first
+    assert [os.path.exists(path) for path in paths] == [False, True, True]
+    assert output_cache.evict() == 0
+
+
+def test_generator_uses_cache(generate, in_vif, settings, output_cache, monkeypatch):
+    expected = generate(in_vif, settings)
+    assert generate(in_vif, settings, cache=output_cache) == expected
+    assert len(output_cache.get_entries()) == 1
+
+    def load_input_vif(*args):
+        raise AssertionError("Cached output was regenerated")
+
+    monkeypatch.setattr(script.DPAMVIFGenerator, "load_input_vif", load_input_vif)
+    assert generate(in_vif, settings, cache=output_cache) == expected
+
+
+def test_lru_cache_evicts_by_size():
+    lru_cache = LRUCache(max_entries=10, max_size=10)
+    for key, size in (("a", 4), ("b", 4), ("a", 4), ("c", 4)):
+        lru_cache.get(key, lambda: key.upper(), lambda value: size)
+    # Least recently used entries go first once the sizes pass max_size
+    assert list(lru_cache.entries) == ["a", "c"]
+    assert lru_cache.stats() == {"entries": 2, "hits": 1, "misses": 3, "size": 8}
+    lru_cache.pop("a")
+    assert lru_cache.stats()["size"] == 4
+    # An entry larger than max_size is returned but not kept, and evicts nothing
+    assert lru_cache.get("d", lambda: "D", lambda value: 11) == "D"
+    assert list(lru_cache.entries) == ["c"]
+    assert lru_cache.stats()["size"] == 4
+
+
+def test_document_cache_reloads_changed_files(tmp_path):
+    path = tmp_path / "document.txt"
+    path.write_text("first")
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        with open(path, encoding="utf8") as document:
+            return document.read()
+
+    document_cache = cache.DocumentCache()
+    assert document_cache.get(path, "text", load) == "first"
+    assert document_cache.get(str(path), "text", load) == "first"
+    assert len(loads) == 1
+    # Documents of another kind are loaded separately
+    assert document_cache.get(path, "length", lambda path: len(load(path))) == 5
+    assert len(loads) == 2
+    path.write_text("second!")
+    assert document_cache.get(path, "text", load) == "second!"
+    assert len(loads) == 3
+    # The stale document was dropped
+    assert document_cache.stats()["entries"] == 2
+
+
+def test_document_cache_evicts_by_file_size(tmp_path):
+    document_cache = cache.DocumentCache(max_size=10)
+    paths = []
+    for name in ("a", "b", "c"):
+        paths.append(tmp_path / name)
+        paths[-1].write_text(name * 4)
+        document_cache.get(paths[-1], "text", lambda path: path)
+    assert document_cache.stats() == {
+        "entries": 2,
+        "hits": 0,
+        "misses": 3,
+        "size": 8,
+    }
@@ -0,0 +1,100 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import io
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree as ET
+
+from dpamvifgenerator import script
+from dpamvifgenerator.skeleton import VIFSkeleton
+
+# Concurrency Test Consts
+THREADS = 8
+REPEATS = 5
+SETTINGS_RATES = ({}, {"1": "HBR2"}, {"0": "UHBR10", "2": "RBR"})
+MODES = {
+    "tree": {},
+    "streaming": {"streaming_threshold": 0},
+    "splice": {"preserve_formatting": True},
+}
+
+
+def make_jobs(in_vif, write_settings, tmp_path) -> dict:
+    """Build named generation jobs covering every mode and settings source"""
+    input_bytes = in_vif.read_bytes()
+    jobs = {}
+    for variant, rates in enumerate(SETTINGS_RATES):
+        settings_path = write_settings(rates, "settings{}.xml".format(variant))
+        compiled_path = tmp_path / "settings{}.json".format(variant)
+        script.compile_settings(settings_path, compiled_path)
+        sources = {
+            "path": (in_vif, settings_path),
+            "bytes": (input_bytes, settings_path.read_bytes()),
+            # Built settings are shared by every thread, like the GUI's settings
+            "tree": (input_bytes, ET.parse(settings_path)),
+            "compiled": (in_vif, compiled_path),
+        }
+        for source_name, (in_source, settings_source) in sources.items():
+            for mode_name, options in MODES.items():
+                # Streaming only applies to input VIF files
+                if mode_name == "streaming" and source_name in ("bytes", "tree"):
+                    continue
+                name = "{}-{}-{}".format(mode_name, source_name, variant)
+                jobs[name] = (in_source, settings_source, options)
+    return jobs
+
+
+def run_job(job: tuple) -> bytes:
+    in_source, settings_source, options = job
+    output = io.BytesIO()
+    script.DPAMVIFGenerator(
+        in_vif=in_source,
+        settings=settings_source,
+        out_vif=output,
+        progress=lambda value: None,
+        **options,
+    ).generate_vif()
+    return output.getvalue()
+
+
+def test_threaded_generation_matches_sequential(in_vif, write_settings, tmp_path):
+    jobs = make_jobs(in_vif, write_settings, tmp_path)
+    expected = {name: run_job(job) for name, job in jobs.items()}
+    # Run every job repeatedly in interleaved order across the thread pool
+    names = [name for _ in range(REPEATS) for name in jobs]
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        outputs = list(pool.map(lambda name: run_job(jobs[name]), names))
+    mismatches = sorted(
+        {name for name, output in zip(names, outputs) if output != expected[name]}
+    )
+    assert not mismatches
+
+
+def test_threaded_skeleton_matches_sequential(in_vif, write_settings):
+    # One skeleton shared by every thread, as in fan-out and the server
+    skeleton = VIFSkeleton(in_vif)
+    settings = [
+        write_settings(rates, "settings{}.xml".format(variant))
+        for variant, rates in enumerate(SETTINGS_RATES)
+    ]
+    expected = [run_job((in_vif, path, {})) for path in settings]
+
+    def generate(path) -> bytes:
+        output = io.BytesIO()
+        skeleton.generate(path, output)
+        return output.getvalue()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        outputs = list(pool.map(generate, settings * REPEATS))
+    assert outputs == expected * REPEATS
+
+
+def test_generation_does_not_register_namespaces(in_vif, settings):
+    registered = dict(ET._namespace_map)
+    script.generate(in_vif, settings)
+    assert ET._namespace_map == registered
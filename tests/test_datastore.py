@@ -0,0 +1,104 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import json
+import os
+import shelve
+
+import pytest
+
+# DataStore Test Consts
+FLUSH_DELAY = 20  # Milliseconds
+
+
+@pytest.fixture
+def datastore(qapp):
+    from dpamvifgenerator.gui import datastore
+
+    return datastore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "store.json")
+
+
+def wait(milliseconds: int):
+    """Run the Qt event loop for a while, so timers can fire"""
+    from PySide6.QtCore import QEventLoop, QTimer
+
+    loop = QEventLoop()
+    QTimer.singleShot(milliseconds, loop.quit)
+    loop.exec()
+
+
+def read_store(path: str) -> dict:
+    with open(path, encoding="utf8") as store_file:
+        return json.load(store_file)
+
+
+def test_debounced_flush(datastore, store_path, monkeypatch):
+    saves = []
+    replace = os.replace
+    monkeypatch.setattr(
+        os, "replace", lambda *args: saves.append(args) or replace(*args)
+    )
+    store = datastore.DataStore(store_path, flush_delay=FLUSH_DELAY)
+    for value in range(5):
+        store["rate"] = value
+    store["lanes"] = 4
+    assert not os.path.exists(store_path)
+    wait(FLUSH_DELAY * 5)
+    # A burst of changes is saved in one batch
+    assert len(saves) == 1
+    assert read_store(store_path) == {"rate": 4, "lanes": 4}
+    # Setting an unchanged value does not save again
+    store["lanes"] = 4
+    wait(FLUSH_DELAY * 5)
+    assert len(saves) == 1
+
+
+def test_close_flushes_pending_changes(datastore, store_path):
+    store = datastore.DataStore(store_path, flush_delay=60 * 1000)
+    store["rate"] = "HBR3"
+    store.close()
+    assert read_store(store_path) == {"rate": "HBR3"}
+    assert datastore.DataStore(store_path)["rate"] == "HBR3"
+
+
+def test_failed_save_keeps_previous_file(datastore, store_path, tmp_path):
+    store = datastore.DataStore(store_path)
+    store["rate"] = "HBR3"
+    store.flush()
+    # A value that cannot be saved fails part way through writing
+    store["port"] = object()
+    store.flush()
+    assert store.dirty
+    assert read_store(store_path) == {"rate": "HBR3"}
+    assert os.listdir(tmp_path) == ["store.json"]
+
+
+def test_shelve_migration(datastore, store_path, tmp_path):
+    legacy_path = str(tmp_path / "legacy.db")
+    with shelve.open(legacy_path) as legacy:
+        legacy["rate"] = "HBR2"
+        legacy["lanes"] = 2
+    store = datastore.DataStore(store_path, legacy_path=legacy_path)
+    assert store.data == {"rate": "HBR2", "lanes": 2}
+    # The JSON store takes priority once it exists
+    store["rate"] = "HBR3"
+    store.close()
+    store = datastore.DataStore(store_path, legacy_path=legacy_path)
+    assert store.data == {"rate": "HBR3", "lanes": 2}
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", "{not json"])
+def test_invalid_store_is_ignored(datastore, store_path, content):
+    with open(store_path, "w", encoding="utf8") as store_file:
+        store_file.write(content)
+    assert datastore.DataStore(store_path).data == {}
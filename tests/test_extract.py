@@ -0,0 +1,114 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import tracemalloc
+
+import pytest
+
+from dpamvifgenerator import extract, script
+from dpamvifgenerator.batch import InvalidBatchSource
+
+
+def export_settings(settings, out_path):
+    """Write settings as the GUI exports them, with the VIF header"""
+    generator = script.DPAMVIFGenerator
+    port_settings = generator.get_port_settings_from_vif(
+        generator.load_dpam_settings(str(settings))
+    )
+    generator.write_output_vif(generator.create_dpam_settings(port_settings), out_path)
+    return out_path
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"streaming_threshold": 0}, {"preserve_formatting": True}]
+)
+def test_round_trip(generate, in_vif, write_settings, tmp_path, options):
+    # Settings extracted from a generated VIF are the settings it was
+    # generated from, and regenerate the same VIF
+    settings = export_settings(
+        write_settings({"0": "UHBR10", "2": "RBR"}), tmp_path / "exported.xml"
+    )
+    generated = tmp_path / "generated.xml"
+    generated.write_bytes(generate(in_vif, settings, **options))
+    extracted = tmp_path / "extracted.xml"
+    result = extract.extract_settings(
+        extract.ExtractJob(str(generated), str(extracted))
+    )
+    assert (result.success, result.ports) == (True, 3)
+    assert extracted.read_bytes() == settings.read_bytes()
+    assert generate(in_vif, extracted, **options) == generated.read_bytes()
+
+
+def test_vendor_content_is_left_out(in_vif, tmp_path):
+    # Port 1 has only its own vendor optional content
+    assert extract.extract_port_settings(str(in_vif)) == {}
+    result = extract.extract_settings(
+        extract.ExtractJob(str(in_vif), str(tmp_path / "out" / "input.xml"))
+    )
+    assert (result.success, result.ports) == (True, 0)
+    assert not (tmp_path / "out").exists()
+
+
+def test_extract_memory_is_flat(tmp_path):
+    # Components are dropped from the tree once read, not kept as empty elements
+    component = (
+        "  <vif:Component>\n    <vif:Port_Label>{}</vif:Port_Label>\n"
+        '    <vif:Connector_Type value="2">Type-C</vif:Connector_Type>\n'
+        "  </vif:Component>\n"
+    )
+    document = '<vif:VIF xmlns:vif="http://usb.org/VendorInfoFile.xsd">\n{}</vif:VIF>'
+    in_vif = tmp_path / "input.xml"
+    peaks = []
+    for ports in (500, 5000):
+        components = "".join(component.format(port) for port in range(ports))
+        in_vif.write_text(document.format(components))
+        tracemalloc.start()
+        try:
+            assert extract.extract_port_settings(str(in_vif)) == {}
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 1.5
+
+
+def test_load_extract_jobs(tmp_path):
+    vifs = tmp_path / "vifs"
+    (vifs / "dock").mkdir(parents=True)
+    for path in (vifs / "a.xml", vifs / "dock" / "b.xml", vifs / "notes.txt"):
+        path.write_text("")
+    out_dir = vifs / "settings"
+    out_dir.mkdir()
+    # Settings from an earlier extraction into the VIF directory are skipped
+    (out_dir / "a.xml").write_text("")
+    jobs = extract.load_extract_jobs(str(vifs), str(out_dir))
+    assert jobs == [
+        extract.ExtractJob(str(vifs / "a.xml"), str(out_dir / "a.xml")),
+        extract.ExtractJob(
+            str(vifs / "dock" / "b.xml"), str(out_dir / "dock" / "b.xml")
+        ),
+    ]
+    jobs = extract.load_extract_jobs(str(vifs / "d*" / "*.xml"), str(tmp_path / "out"))
+    assert [job.out_settings for job in jobs] == [str(tmp_path / "out" / "b.xml")]
+    with pytest.raises(InvalidBatchSource):
+        extract.load_extract_jobs(str(tmp_path / "missing"), str(out_dir))
+    with pytest.raises(script.MissingGeneratorArg):
+        extract.load_extract_jobs(str(vifs), None)
+
+
+def test_extract_main(generate, in_vif, settings, tmp_path, capsys):
+    vifs = tmp_path / "vifs"
+    vifs.mkdir()
+    (vifs / "generated.xml").write_bytes(generate(in_vif, settings))
+    (vifs / "plain.xml").write_bytes(in_vif.read_bytes())
+    (vifs / "broken.xml").write_text("<vif:VIF")
+    out_dir = tmp_path / "settings"
+    assert extract.main(str(vifs), str(out_dir)) == 1
+    output = capsys.readouterr().out
+    assert f"[FAIL] {vifs / 'broken.xml'}: Error: Invalid Input USBIF VIF" in output
+    assert "1 extracted, 1 without DPAM content, 1 failed, 3 total" in output
+    assert sorted(path.name for path in out_dir.iterdir()) == ["generated.xml"]
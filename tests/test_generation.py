@@ -0,0 +1,395 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import io
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from dpamvifgenerator import portlabels, script
+from dpamvifgenerator.cache import DocumentCache
+from dpamvifgenerator.compiled import CompiledSettings
+from dpamvifgenerator.skeleton import VIFSkeleton
+
+# Generation Test Consts
+VENDOR_DATA = (
+    '<vendor:Data xmlns:vendor="urn:example:vendor" vendor:id="1">'
+    "<vendor:Name>Vendor &amp; Co</vendor:Name></vendor:Data>\n  "
+)
+
+
+def test_streaming_matches_tree(generate, in_vif, settings):
+    tree = generate(in_vif, settings)
+    assert generate(in_vif, settings, streaming_threshold=0) == tree
+
+
+def test_small_input_is_not_streamed(generate, in_vif, settings, monkeypatch):
+    def stream(*args):
+        raise AssertionError("Input VIF below the threshold was streamed")
+
+    monkeypatch.setattr(script.DPAMVIFGenerator, "stream_dpam_vif", stream)
+    generate(in_vif, settings)
+
+
+def test_streaming_memory_is_flat(in_vif, settings, tmp_path):
+    # Elements outside components are written through, not built as trees
+    original = in_vif.read_text("utf8")
+    field = '    <opt:Vendor_Field value="1">Vendor</opt:Vendor_Field>\n'
+    peaks = []
+    for fields in (1000, 10000):
+        vendor = "<opt:Vendor>\n" + field * fields + "  </opt:Vendor>\n  "
+        in_vif.write_text(
+            original.replace(
+                "<vif:VIF_Specification>", vendor + "<vif:VIF_Specification>", 1
+            ),
+            "utf8",
+        )
+        tracemalloc.start()
+        try:
+            run_with_progress(
+                in_vif,
+                settings,
+                tmp_path / "output.xml",
+                lambda value: None,
+                streaming_threshold=0,
+            )
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 1.5
+
+
+def canonical(output: bytes, **options) -> str:
+    """Canonical XML of generated output, which declares an expat unknown encoding"""
+    return ET.canonicalize(output.decode("utf8"), **options)
+
+
+def test_splicing_matches_tree(generate, in_vif, settings):
+    tree = generate(in_vif, settings)
+    spliced = generate(in_vif, settings, preserve_formatting=True)
+    assert canonical(spliced) == canonical(tree)
+
+
+def test_splicing_preserves_input_formatting(generate, in_vif, settings):
+    # Unusual line endings and tag whitespace survive a splice untouched
+    original = in_vif.read_bytes().replace(b"\n", b"\r\n")
+    original = original.replace(
+        b"</vif:VIF_Specification>", b"</vif:VIF_Specification >"
+    )
+    in_vif.write_bytes(original)
+    spliced = generate(in_vif, settings, preserve_formatting=True)
+    head, _, _ = original.partition(b"  <vif:Component>")
+    assert spliced.startswith(head)
+    assert b"\n" not in spliced.replace(b"\r\n", b"")
+    tree = generate(in_vif, settings)
+    assert canonical(spliced, strip_text=True) == canonical(tree, strip_text=True)
+
+
+def test_splicing_rejects_unsupported_encoding(generate, in_vif, settings, tmp_path):
+    latin = in_vif.read_text("utf8").replace('encoding="utf-8"', 'encoding="latin-1"')
+    in_vif.write_bytes(latin.encode("latin-1"))
+    with pytest.raises(script.InvalidInputVIF, match="Unsupported encoding"):
+        generate(in_vif, settings, preserve_formatting=True)
+    assert not (tmp_path / "output0.xml").exists()
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"streaming_threshold": 0}, {"preserve_formatting": True}]
+)
+def test_in_memory_api_matches_files(generate, in_vif, settings, options):
+    expected = generate(in_vif, settings, **options)
+    in_bytes = in_vif.read_bytes()
+    assert script.generate(in_bytes, settings.read_bytes(), **options) == expected
+    # Keep the settings comments, as a file parse by the generator does
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    tree = ET.parse(settings, parser)
+    assert script.generate(in_bytes, tree, **options) == expected
+    assert script.generate(in_bytes, tree.getroot(), **options) == expected
+    output = io.BytesIO()
+    with open(in_vif, "rb") as in_file, open(settings, "rb") as settings_file:
+        assert script.generate(in_file, settings_file, output, **options) is None
+    assert output.getvalue() == expected
+
+
+@pytest.mark.parametrize("rate", ["HBR3", "HBR3\n  UHBR10"])
+@pytest.mark.parametrize(
+    "options", [{}, {"streaming_threshold": 0}, {"preserve_formatting": True}]
+)
+def test_compiled_settings_match_xml(
+    generate, in_vif, write_settings, tmp_path, rate, options
+):
+    # Multi-line text cannot be re-indented and falls back to a parse
+    settings = write_settings({"1": rate})
+    compiled = tmp_path / "settings.json"
+    script.compile_settings(settings, compiled)
+    ports = CompiledSettings.load(str(compiled)).ports
+    assert ports["1"][1] == ("\n" not in rate)
+    expected = generate(in_vif, settings, **options)
+    assert generate(in_vif, compiled, **options) == expected
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_compiled_settings_fan_out(
+    generate, in_vif, settings, tmp_path, preserve_formatting
+):
+    compiled = tmp_path / "settings.json"
+    script.compile_settings(settings, compiled)
+    skeleton = VIFSkeleton(str(in_vif), preserve_formatting)
+    skeleton.generate(str(compiled), str(tmp_path / "fan_out.xml"))
+    expected = generate(in_vif, settings, preserve_formatting=preserve_formatting)
+    assert (tmp_path / "fan_out.xml").read_bytes() == expected
+
+
+def add_vendor_data(in_vif):
+    """Add a vendor section that declares its own namespace below the root"""
+    in_vif.write_text(
+        in_vif.read_text("utf8").replace(
+            "<vif:VIF_Specification>", VENDOR_DATA + "<vif:VIF_Specification>", 1
+        ),
+        "utf8",
+    )
+
+
+def test_skeleton_vendor_namespace_matches_tree(generate, in_vif, settings):
+    # Vendor namespaces are declared on the root, as write_output_vif does
+    add_vendor_data(in_vif)
+    output = io.BytesIO()
+    VIFSkeleton(str(in_vif)).generate(str(settings), output)
+    assert output.getvalue() == generate(in_vif, settings)
+
+
+@pytest.mark.parametrize(
+    "options", [{"streaming_threshold": 0}, {"preserve_formatting": True}]
+)
+def test_namespace_below_root_matches_tree(generate, in_vif, settings, options):
+    # Namespaces declared below the root are declared again where they are used
+    add_vendor_data(in_vif)
+    tree = generate(in_vif, settings)
+    output = generate(in_vif, settings, **options)
+    assert canonical(output, rewrite_prefixes=True, strip_text=True) == (
+        canonical(tree, rewrite_prefixes=True, strip_text=True)
+    )
+
+
+KNOWN_NAMESPACE_DATA = (
+    '<dc:title xmlns:dc="http://purl.org/dc/elements/1.1/"'
+    ' xmlns:xs="http://www.w3.org/2001/XMLSchema" xs:type="string">'
+    '<vendor:Name xmlns:vendor="urn:example:vendor" />'
+    "</dc:title>\n  "
+)
+
+
+def test_known_namespaces_match_element_tree(generate, in_vif, settings):
+    # ElementTree names the namespaces it knows, such as dc and xs, not ns0
+    in_vif.write_text(
+        in_vif.read_text("utf8").replace(
+            "<vif:VIF_Specification>",
+            KNOWN_NAMESPACE_DATA + "<vif:VIF_Specification>",
+            1,
+        ),
+        "utf8",
+    )
+    output = generate(in_vif, settings)
+    registered = dict(ET._namespace_map)
+    try:
+        for prefix, uri in script.DPAMVIFGenerator.get_prefix_map().items():
+            ET.register_namespace(prefix, uri)
+        expected = io.BytesIO()
+        parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+        tree = ET.ElementTree(ET.fromstring(output.decode("utf8"), parser))
+        tree.write(expected, encoding="utf8", method="xml")
+    finally:
+        ET._namespace_map.clear()
+        ET._namespace_map.update(registered)
+    assert b'xmlns:dc="' in output
+    assert output == expected.getvalue()
+    skeleton = io.BytesIO()
+    VIFSkeleton(str(in_vif)).generate(str(settings), skeleton)
+    assert skeleton.getvalue() == output
+    # Streaming declares namespaces where they are used, with the same prefixes
+    streamed = generate(in_vif, settings, streaming_threshold=0)
+    assert b'<dc:title xmlns:dc="' in streamed
+
+
+MODES = {
+    "tree": {},
+    "streaming": {"streaming_threshold": 0},
+    "splice": {"preserve_formatting": True},
+}
+
+
+def run_with_progress(in_vif, settings, out_vif, progress, **options):
+    script.DPAMVIFGenerator(
+        in_vif=str(in_vif),
+        settings=str(settings),
+        out_vif=str(out_vif),
+        progress=progress,
+        **options,
+    ).generate_vif()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_progress_is_monotonic(in_vif, settings, tmp_path, mode):
+    updates = []
+    run_with_progress(
+        in_vif, settings, tmp_path / "output.xml", updates.append, **MODES[mode]
+    )
+    assert updates[0] == 0 and updates[-1] == 100
+    # The callback only sees whole percentage changes
+    assert all(a < b for a, b in zip(updates, updates[1:]))
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("written", [False, True])
+def test_cancel_removes_output(in_vif, settings, tmp_path, mode, written):
+    # Enough vendor content that the output is written over several updates
+    field = "      <opt:Vendor_Field>1</opt:Vendor_Field>\n"
+    in_vif.write_text(in_vif.read_text("utf8").replace(field, field * 20000), "utf8")
+    out_vif = tmp_path / "output.xml"
+    cancel_token = script.CancellationToken()
+
+    def progress(value):
+        # Cancel before any output is written, or once it is partly written
+        if value > 0 and out_vif.exists() == written:
+            cancel_token.cancel()
+
+    with pytest.raises(script.GenerationCancelled):
+        run_with_progress(
+            in_vif,
+            settings,
+            out_vif,
+            progress,
+            cancel_token=cancel_token,
+            **MODES[mode],
+        )
+    assert not out_vif.exists()
+
+
+@pytest.mark.parametrize(
+    "options",
+    list(MODES.values()) + [{"incremental": True}],
+    ids=[*MODES, "incremental"],
+)
+@pytest.mark.parametrize("compiled", [False, True])
+def test_port_missing_from_settings(in_vif, settings, tmp_path, options, compiled):
+    if compiled:
+        CompiledSettings.compile(str(settings)).save(tmp_path / "settings.json")
+        settings = tmp_path / "settings.json"
+    in_vif.write_text(
+        in_vif.read_text("utf8").replace("<vif:Port_Label>2</", "<vif:Port_Label>9</"),
+        "utf8",
+    )
+    out_vif = tmp_path / "output.xml"
+    with pytest.raises(script.InvalidSettingsXML, match="Missing port 9 from"):
+        run_with_progress(in_vif, settings, out_vif, lambda value: None, **options)
+    assert not out_vif.exists()
+
+
+# Tags the port label scan must not be confused by: comments, CDATA, other
+# namespaces with the same local names, nested labels and another vif prefix
+EDGE_CASE_VIF = """<?xml version="1.0" encoding="{encoding}"?>
+<v:VIF xmlns:v="http://usb.org/VendorInfoFile.xsd" xmlns:o="urn:example:other">
+  <!-- <v:Component><v:Port_Label>comment</v:Port_Label></v:Component> -->
+  <o:Component><o:Port_Label>other</o:Port_Label></o:Component>
+  <v:Component >
+    <v:Port_Label>A</v:Port_Label >
+    <v:Vendor><![CDATA[</v:Port_Label></v:Component><v:Component>]]></v:Vendor>
+    <o:Port_Label>ignored</o:Port_Label>
+  </v:Component>
+  <Component xmlns="http://usb.org/VendorInfoFile.xsd">
+    <Nested><Port_Label>nested</Port_Label></Nested>
+    <Port_Label>B &amp; C</Port_Label>
+    <Component_Note/>
+  </Component>
+  <v:Component><v:Port_Label/></v:Component>
+</v:VIF>
+"""
+
+
+def full_parse_port_labels(data: bytes) -> list[str]:
+    root = ET.fromstring(data)
+    namespaces = script.DPAMVIFGenerator.get_prefix_map()
+    return [
+        component.find("vif:Port_Label", namespaces).text or ""
+        for component in root.iter("{{{}}}Component".format(namespaces["vif"]))
+    ]
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16"])
+@pytest.mark.parametrize("chunk_size", [7, script.STREAMING_CHUNK_SIZE])
+def test_port_labels_match_full_parse(in_vif, encoding, chunk_size):
+    data = EDGE_CASE_VIF.format(encoding=encoding).encode(encoding)
+    expected = full_parse_port_labels(data)
+    assert expected == ["A", "B & C", ""]
+    assert portlabels.PortLabelScanner(data, chunk_size).port_labels == expected
+    in_data = in_vif.read_bytes()
+    assert portlabels.PortLabelScanner(in_data, chunk_size).port_labels == (
+        full_parse_port_labels(in_data)
+    )
+
+
+@pytest.mark.parametrize(
+    "component",
+    ["<vif:Component/>", "<vif:Component><vif:Other/></vif:Component>"],
+)
+def test_missing_port_label(in_vif, component):
+    data = in_vif.read_bytes().replace(b"<!-- Ports -->", component.encode("utf8"), 1)
+    with pytest.raises(script.InvalidInputVIF, match="Missing vif:Port_Label"):
+        script.DPAMVIFGenerator.load_port_labels(data)
+
+
+def test_malformed_input_port_labels(in_vif):
+    data = in_vif.read_bytes().replace(b"</vif:Connector_Type>", b"", 1)
+    with pytest.raises(script.InvalidInputVIF):
+        script.DPAMVIFGenerator.load_port_labels(data)
+
+
+def test_port_labels_are_cached(in_vif, monkeypatch):
+    expected = script.DPAMVIFGenerator.load_port_labels(str(in_vif))
+
+    def scan_port_labels(in_vif):
+        raise AssertionError("Unchanged input VIF was scanned again")
+
+    monkeypatch.setattr(portlabels, "scan_port_labels", scan_port_labels)
+    assert script.DPAMVIFGenerator.load_port_labels(str(in_vif)) == expected
+    # A modified file is scanned again
+    in_vif.write_bytes(in_vif.read_bytes() + b"\n")
+    with pytest.raises(script.InvalidInputVIF):
+        script.DPAMVIFGenerator.load_port_labels(str(in_vif))
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_document_cache_matches_uncached(
+    generate, in_vif, write_settings, preserve_formatting
+):
+    document_cache = DocumentCache()
+    # Later generations reuse the skeleton and settings parsed by the first
+    variants = [write_settings(), write_settings({"1": "HBR2"}, "settings1.xml")]
+    for settings in variants + variants[:1]:
+        expected = generate(in_vif, settings, preserve_formatting=preserve_formatting)
+        assert expected == generate(
+            in_vif,
+            settings,
+            preserve_formatting=preserve_formatting,
+            document_cache=document_cache,
+        )
+    assert document_cache.stats()["hits"] == 3
+
+
+def test_root_vendor_attribute_is_declared_once(generate, in_vif, settings):
+    in_vif.write_text(
+        in_vif.read_text("utf8").replace(
+            "<vif:VIF ", '<vif:VIF xmlns:vendor="urn:example:vendor" vendor:id="1" ', 1
+        ),
+        "utf8",
+    )
+    output = generate(in_vif, settings)
+    assert output.count(b'"urn:example:vendor"') == 1
+    root = ET.fromstring(output.decode("utf8"))
+    assert root.get("{urn:example:vendor}id") == "1"
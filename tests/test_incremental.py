@@ -0,0 +1,131 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import os
+
+import pytest
+
+from dpamvifgenerator import script
+from dpamvifgenerator.manifest import OutputManifest
+from dpamvifgenerator.tracing import Span, Tracer
+
+
+@pytest.fixture
+def out_vif(tmp_path):
+    return tmp_path / "output.xml"
+
+
+def generate_incremental(in_vif, settings, out_vif, **options) -> Tracer:
+    """Generate incrementally, returning the tracer with each stage's spans"""
+    tracer = Tracer()
+    script.generate(
+        in_vif, settings, out_vif, incremental=True, tracer=tracer, **options
+    )
+    return tracer
+
+
+def get_span(tracer: Tracer, name: str) -> Span | None:
+    return next((span for span in tracer.spans if span.name == name), None)
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_full_generation_matches(in_vif, settings, out_vif, preserve_formatting):
+    generate_incremental(
+        in_vif, settings, out_vif, preserve_formatting=preserve_formatting
+    )
+    assert out_vif.read_bytes() == script.generate(
+        in_vif, settings, preserve_formatting=preserve_formatting
+    )
+    assert os.path.exists(OutputManifest.get_path(out_vif))
+
+
+def test_unchanged_settings_keep_output(in_vif, settings, out_vif):
+    generate_incremental(in_vif, settings, out_vif)
+    expected = out_vif.read_bytes()
+    tracer = generate_incremental(in_vif, settings, out_vif)
+    assert get_span(tracer, "parse_input") is None
+    assert get_span(tracer, "patch").attributes["ports"] == 0
+    assert out_vif.read_bytes() == expected
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+@pytest.mark.parametrize(
+    "rates",
+    [
+        # Same size, so the changed block is overwritten in place
+        {"1": "HBR2"},
+        # Longer and shorter blocks, so later blocks move
+        {"0": "UHBR10"},
+        {"0": "RBR", "2": "UHBR20"},
+    ],
+)
+def test_patch_matches_full_generation(
+    in_vif, write_settings, out_vif, rates, preserve_formatting
+):
+    generate_incremental(
+        in_vif, write_settings(), out_vif, preserve_formatting=preserve_formatting
+    )
+    settings = write_settings(rates)
+    tracer = generate_incremental(
+        in_vif, settings, out_vif, preserve_formatting=preserve_formatting
+    )
+    assert get_span(tracer, "parse_input") is None
+    assert get_span(tracer, "patch").attributes["ports"] == len(rates)
+    assert out_vif.read_bytes() == script.generate(
+        in_vif, settings, preserve_formatting=preserve_formatting
+    )
+
+
+def test_patches_after_resize_match_full_generation(in_vif, write_settings, out_vif):
+    # Each patch starts from block offsets moved by the one before it
+    generate_incremental(in_vif, write_settings(), out_vif)
+    for rates in ({"0": "UHBR10"}, {"1": "HBR2"}, {"0": "RBR", "2": "UHBR20"}):
+        settings = write_settings(rates)
+        tracer = generate_incremental(in_vif, settings, out_vif)
+        assert get_span(tracer, "parse_input") is None
+        assert out_vif.read_bytes() == script.generate(in_vif, settings)
+
+
+def test_modified_output_generates_in_full(in_vif, write_settings, out_vif):
+    generate_incremental(in_vif, write_settings(), out_vif)
+    out_vif.write_bytes(out_vif.read_bytes() + b"\n")
+    settings = write_settings({"1": "HBR2"})
+    tracer = generate_incremental(in_vif, settings, out_vif)
+    assert get_span(tracer, "parse_input") is not None
+    assert out_vif.read_bytes() == script.generate(in_vif, settings)
+
+
+def test_changed_input_generates_in_full(in_vif, settings, out_vif):
+    generate_incremental(in_vif, settings, out_vif)
+    in_vif.write_bytes(in_vif.read_bytes().replace(b"DRP", b"Source"))
+    tracer = generate_incremental(in_vif, settings, out_vif)
+    assert get_span(tracer, "parse_input") is not None
+    assert out_vif.read_bytes() == script.generate(in_vif, settings)
+
+
+def test_changed_options_generate_in_full(in_vif, settings, out_vif):
+    generate_incremental(in_vif, settings, out_vif)
+    tracer = generate_incremental(in_vif, settings, out_vif, preserve_formatting=True)
+    assert get_span(tracer, "patch") is None
+    assert out_vif.read_bytes() == script.generate(
+        in_vif, settings, preserve_formatting=True
+    )
+
+
+def test_large_input_is_streamed(in_vif, write_settings, out_vif, monkeypatch):
+    # Input VIFs above the streaming threshold are not parsed in full
+    settings = write_settings()
+    expected = script.generate(in_vif, settings, streaming_threshold=0)
+    monkeypatch.setattr(script.DPAMVIFGenerator, "load_input_vif", None)
+    generate_incremental(in_vif, settings, out_vif, streaming_threshold=0)
+    assert out_vif.read_bytes() == expected
+    settings = write_settings({"0": "UHBR10"})
+    generate_incremental(in_vif, settings, out_vif, streaming_threshold=0)
+    assert out_vif.read_bytes() == script.generate(
+        in_vif, settings, streaming_threshold=0
+    )
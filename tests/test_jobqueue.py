@@ -0,0 +1,97 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import threading
+
+import pytest
+
+from dpamvifgenerator.utility import jobqueue
+
+# Job Queue Test Consts
+TIMEOUT = 5  # Seconds
+
+
+@pytest.fixture
+def queue():
+    queue = jobqueue.JobQueue(max_workers=2)
+    yield queue
+    queue.shutdown()
+
+
+def wait_for(job: jobqueue.Job):
+    job.done.result(timeout=TIMEOUT)
+
+
+def blocking_action(started: threading.Event, events: list, name: str):
+    """Action that runs until cancelled, as a long generation would"""
+
+    def action(job: jobqueue.Job):
+        events.append(name + " started")
+        started.set()
+        try:
+            while True:
+                job.cancel_token.check()
+                threading.Event().wait(0.001)
+        finally:
+            events.append(name + " stopped")
+
+    return action
+
+
+def test_same_key_cancels_previous(queue):
+    events = []
+    started = threading.Event()
+    first = queue.submit(blocking_action(started, events, "first"), key="out.xml")
+    assert started.wait(TIMEOUT)
+    second = queue.submit(lambda job: events.append("second ran"), key="out.xml")
+    wait_for(second)
+    assert first.state == jobqueue.JOB_CANCELLED
+    assert second.state == jobqueue.JOB_COMPLETE
+    # The replacement only starts once the earlier job has stopped
+    assert events == ["first started", "first stopped", "second ran"]
+    assert queue.keys == {}
+
+
+def test_other_keys_run_alongside(queue):
+    events = []
+    started = threading.Event()
+    first = queue.submit(blocking_action(started, events, "first"), key="a.xml")
+    assert started.wait(TIMEOUT)
+    second = queue.submit(lambda job: events.append("second ran"), key="b.xml")
+    wait_for(second)
+    assert first.state == jobqueue.JOB_RUNNING
+    queue.cancel(first.id)
+    wait_for(first)
+    assert first.state == jobqueue.JOB_CANCELLED
+
+
+def test_queued_job_cancels_before_start(queue):
+    events = []
+    started = threading.Event()
+    running = [
+        queue.submit(blocking_action(started, events, str(index))) for index in range(2)
+    ]
+    queued = queue.submit(lambda job: events.append("queued ran"))
+    queue.cancel(queued.id)
+    assert queued.state == jobqueue.JOB_CANCELLED
+    queue.shutdown()
+    assert all(job.state == jobqueue.JOB_CANCELLED for job in running)
+    assert "queued ran" not in events
+
+
+def test_failed_job(queue):
+    def fail(job):
+        job.set_progress(50)
+        raise ValueError("Error: Bad input")
+
+    job = queue.submit(fail)
+    wait_for(job)
+    assert job.state == jobqueue.JOB_FAILED
+    assert queue.get_active() == []
+    queue.remove_finished()
+    assert queue.jobs == {}
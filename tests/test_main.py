@@ -0,0 +1,65 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Test Consts
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Run the command line in a fresh interpreter and report any Qt modules it loaded
+HEADLESS_RUN = """
+import sys
+from dpamvifgenerator import main
+sys.argv = ["dpamvifgenerator"] + sys.argv[1:]
+try:
+    main.main()
+finally:
+    print(sorted(name for name in sys.modules if name.startswith("PySide6")))
+"""
+
+
+def run_headless(*args) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", HEADLESS_RUN, *args],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.splitlines()[-1]
+
+
+@pytest.mark.parametrize("jobs", [False, True])
+def test_batch_does_not_load_qt(jobs, in_vif, settings, tmp_path):
+    if jobs:
+        args = ["--jobs", str(tmp_path / "input*.xml"), "-o", str(tmp_path / "out")]
+    else:
+        args = ["-i", str(in_vif), "-o", str(tmp_path / "out.xml")]
+    assert run_headless("--batch", "-s", str(settings), *args) == "[]"
+
+
+@pytest.mark.parametrize("option", ["--jobs", "--fan-out", "--compile-settings"])
+def test_batch_options_imply_batch(option, in_vif, settings, tmp_path):
+    # Options only used in batch mode run it without --batch
+    out_dir = tmp_path / "out"
+    if option == "--jobs":
+        args = ["-s", str(settings), "--jobs", str(tmp_path / "input*.xml")]
+        args += ["-o", str(out_dir)]
+        expected = out_dir / "input.xml"
+    elif option == "--fan-out":
+        args = ["-i", str(in_vif), "--fan-out", str(settings), "-o", str(out_dir)]
+        expected = out_dir / "input_settings.xml"
+    else:
+        expected = tmp_path / "settings.json"
+        args = ["-s", str(settings), "--compile-settings", str(expected)]
+    assert run_headless(*args) == "[]"
+    assert expected.exists()
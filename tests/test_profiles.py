@@ -0,0 +1,152 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import sqlite3
+from xml.etree import ElementTree as ET
+
+import pytest
+
+from dpamvifgenerator import profiles, script
+
+# Profile Store Test Consts
+NO_DPAM_SETTINGS = """<?xml version="1.0" encoding="utf-8"?>
+<vif:VIF xmlns:vif="http://usb.org/VendorInfoFile.xsd">
+  <vif:Component><vif:Port_Label>0</vif:Port_Label></vif:Component>
+</vif:VIF>
+"""
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "profiles.db")
+
+
+@pytest.fixture
+def store(store_path):
+    store = profiles.ProfileStore(store_path)
+    yield store
+    store.close()
+
+
+def save(store, product: str, name: str, settings) -> profiles.Profile:
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    return store.save_profile(product, name, ET.parse(settings, parser))
+
+
+def test_schema_creation(store, store_path, settings):
+    connection = sqlite3.connect(store_path)
+    tables = {
+        name
+        for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    assert tables == {"profiles", "settings"}
+    assert connection.execute("PRAGMA user_version").fetchone() == (
+        profiles.PROFILE_STORE_VERSION,
+    )
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    connection.close()
+    # Reopening an existing store keeps its profiles
+    profile = save(store, "Dock", "Default", settings)
+    store.close()
+    reopened = profiles.ProfileStore(store_path)
+    assert reopened.search() == [profile]
+    reopened.close()
+
+
+def test_unsupported_store(store_path, tmp_path):
+    connection = sqlite3.connect(store_path)
+    connection.execute(
+        "PRAGMA user_version = {}".format(profiles.PROFILE_STORE_VERSION + 1)
+    )
+    connection.close()
+    with pytest.raises(profiles.InvalidProfileStore, match="version"):
+        profiles.ProfileStore(store_path)
+    not_database = tmp_path / "not_database.db"
+    not_database.write_bytes(b"Not a database" * 100)
+    with pytest.raises(profiles.InvalidProfileStore):
+        profiles.ProfileStore(str(not_database))
+
+
+def test_save_and_load_profile(store, settings, write_settings, tmp_path):
+    profile = save(store, "Dock", "Default", settings)
+    assert (profile.product, profile.name, profile.ports) == ("Dock", "Default", 3)
+    # Saved settings generate the same VIF as the original file
+    assert ET.canonicalize(store.get_settings(profile.id)) == ET.canonicalize(
+        from_file=str(settings)
+    )
+    assert sorted(store.load_profile(profile.id)) == ["0", "1", "2"]
+    # Saving with the same names in another case replaces the profile
+    updated = save(store, "DOCK", "default", write_settings({"0": "RBR"}, "rbr.xml"))
+    assert updated.id == profile.id
+    assert b"RBR" in store.get_settings(profile.id)
+    store.delete_profile(profile.id)
+    assert store.search() == []
+    assert store.get_settings(profile.id) is None
+
+
+def test_search(store, settings):
+    for product, name in (
+        ("Dock", "Default"),
+        ("dock", "100%_Power"),
+        ("Monitor", "Docked"),
+        ("Monitor", "Standard"),
+    ):
+        save(store, product, name, settings)
+
+    def search(text: str, **kwargs) -> list[tuple[str, str]]:
+        return [
+            (profile.product, profile.name) for profile in store.search(text, **kwargs)
+        ]
+
+    # Either name matches, ignoring case, ordered by product then name
+    assert search("DOCK") == [
+        ("dock", "100%_Power"),
+        ("Dock", "Default"),
+        ("Monitor", "Docked"),
+    ]
+    assert search("dock", limit=1) == [("dock", "100%_Power")]
+    # Wildcards in the search text match themselves
+    assert search("0%_") == [("dock", "100%_Power")]
+    assert search("_") == [("dock", "100%_Power")]
+    assert len(search("")) == 4
+
+
+def test_import_directory(store, settings, tmp_path):
+    directory = tmp_path / "profiles"
+    (directory / "Dock" / "USB4").mkdir(parents=True)
+    for path in (
+        directory / "Monitor.xml",
+        directory / "Dock" / "Default.xml",
+        directory / "Dock" / "USB4" / "Fast.xml",
+    ):
+        path.write_bytes(settings.read_bytes())
+    (directory / "Dock" / "Broken.xml").write_text("<vif:VIF")
+    (directory / "Dock" / "Empty.xml").write_text(NO_DPAM_SETTINGS)
+    (directory / "Dock" / "notes.txt").write_text("Not a profile")
+    imported, failed = store.import_directory(str(directory))
+    assert [(profile.product, profile.name) for profile in imported] == [
+        ("Dock", "Default"),
+        ("Dock/USB4", "Fast"),
+        ("Monitor", "Monitor"),
+    ]
+    assert failed == [
+        str(directory / "Dock" / "Broken.xml"),
+        str(directory / "Dock" / "Empty.xml"),
+    ]
+    assert store.search() == sorted(imported, key=lambda p: (p.product, p.name))
+    # Imported settings are the original file bytes
+    assert store.get_settings(imported[0].id) == settings.read_bytes()
+
+
+def test_generate_from_profile(store, in_vif, settings):
+    profile = save(store, "Dock", "Default", settings)
+    assert script.generate(in_vif, store.get_settings(profile.id)) == (
+        script.generate(in_vif, settings)
+    )
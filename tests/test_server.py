@@ -0,0 +1,136 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import base64
+import http.client
+import json
+import threading
+
+import pytest
+
+from dpamvifgenerator import script
+from dpamvifgenerator.server import (
+    SERVER_HOST,
+    GenerationServer,
+    GenerationService,
+    LRUCache,
+)
+from dpamvifgenerator.skeleton import VIFSkeleton
+
+
+@pytest.fixture
+def server():
+    """Generation server on a free localhost port, returning a request function"""
+    with GenerationServer((SERVER_HOST, 0), GenerationService(2)) as server:
+        thread = threading.Thread(
+            target=server.serve_forever, args=(0.01,), daemon=True
+        )
+        thread.start()
+
+        def request(method: str, path: str, body: bytes = None):
+            connection = http.client.HTTPConnection(*server.server_address[:2])
+            try:
+                connection.request(method, path, body)
+                response = connection.getresponse()
+                return response.status, response.read()
+            finally:
+                connection.close()
+
+        yield request
+        server.shutdown()
+        thread.join()
+
+
+def make_request(in_vif: bytes, settings: bytes, **options) -> bytes:
+    request = {
+        "in_vif": base64.b64encode(in_vif).decode("ascii"),
+        "settings": base64.b64encode(settings).decode("ascii"),
+        **options,
+    }
+    return json.dumps(request).encode("utf8")
+
+
+def test_generate_matches_tree(in_vif, settings):
+    service = GenerationService(1)
+    expected = script.generate(in_vif, settings)
+    for _ in range(2):
+        assert service.generate(in_vif.read_bytes(), settings.read_bytes()) == (
+            expected
+        )
+    assert service.stats()["skeleton_cache"]["hits"] == 1
+
+
+def test_caches_evict_by_size(in_vif, write_settings):
+    input_bytes = in_vif.read_bytes()
+    settings = [write_settings({"0": rate}).read_bytes() for rate in ("RBR", "HBR")]
+    # Room for the skeletons of both formatting options, but one settings file
+    max_size = sum(
+        len(VIFSkeleton(input_bytes, preserve_formatting).data)
+        for preserve_formatting in (False, True)
+    )
+    service = GenerationService(1, cache_max_size=max_size)
+    for preserve_formatting in (False, True):
+        for settings_bytes in settings:
+            service.generate(input_bytes, settings_bytes, preserve_formatting)
+    stats = service.stats()
+    assert stats["skeleton_cache"]["entries"] == 2
+    assert stats["settings_cache"]["entries"] == 1
+    assert stats["settings_cache"]["size"] <= max_size
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    for key in ("a", "b", "a", "c"):
+        cache.get(key, lambda: key.upper())
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_http_generate(server, in_vif, settings, preserve_formatting):
+    body = make_request(
+        in_vif.read_bytes(),
+        settings.read_bytes(),
+        preserve_formatting=preserve_formatting,
+    )
+    status, output = server("POST", "/generate", body)
+    assert status == 200
+    assert output == script.generate(
+        in_vif, settings, preserve_formatting=preserve_formatting
+    )
+    status, health = server("GET", "/health")
+    assert status == 200
+    assert json.loads(health)["requests"] == 1
+
+
+@pytest.mark.parametrize(
+    "path, body, expected",
+    [
+        ("/generate", b"not json", 400),
+        ("/generate", b'{"in_vif": "!", "settings": ""}', 400),
+        ("/generate", make_request(b"<vif:VIF", b""), 422),
+        ("/unknown", b"{}", 404),
+    ],
+)
+def test_http_errors(server, path, body, expected):
+    status, response = server("POST", path, body)
+    assert status == expected
+    assert json.loads(response)["error"].startswith("Error: ")
+
+
+@pytest.mark.parametrize("preserve_formatting", [False, True])
+def test_http_port_mismatch(server, in_vif, settings, preserve_formatting):
+    in_vif_bytes = in_vif.read_bytes().replace(
+        b"<vif:Port_Label>2</", b"<vif:Port_Label>9</"
+    )
+    body = make_request(
+        in_vif_bytes, settings.read_bytes(), preserve_formatting=preserve_formatting
+    )
+    status, response = server("POST", "/generate", body)
+    assert status == 422
+    assert "Missing port 9 from" in json.loads(response)["error"]
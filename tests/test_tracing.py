@@ -0,0 +1,128 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import json
+import logging
+import sys
+
+import pytest
+
+from dpamvifgenerator import batch, main, script
+from dpamvifgenerator.tracing import Tracer
+
+# Tracing Test Consts
+TREE_STAGES = ["parse_input", "parse_settings", "merge", "write", "generate_vif"]
+
+
+def contains(outer: dict, inner: dict) -> bool:
+    """Whether a Chrome trace event lies within another on the same thread"""
+    return (
+        outer["tid"] == inner["tid"]
+        and outer["ts"] <= inner["ts"]
+        and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    )
+
+
+def test_span_nesting():
+    ended = []
+    tracer = Tracer(ended.append)
+    with tracer.span("outer", ports=2) as outer:
+        with tracer.span("inner"):
+            pass
+        outer.attributes["merged"] = 1
+    # Spans are reported as they end, innermost first
+    assert [span.name for span in ended] == ["inner", "outer"]
+    assert ended == tracer.spans
+    assert ended[1].attributes == {"ports": 2, "merged": 1}
+    inner, outer = tracer.get_trace_events()[::-1]
+    assert contains(outer, inner)
+
+
+def test_span_ends_on_error():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("failed"):
+            raise ValueError()
+    assert [span.name for span in tracer.spans] == ["failed"]
+
+
+def test_generation_spans(in_vif, settings, tmp_path):
+    tracer = Tracer()
+    script.DPAMVIFGenerator(
+        in_vif=str(in_vif),
+        settings=str(settings),
+        out_vif=str(tmp_path / "output.xml"),
+        progress=lambda value: None,
+        tracer=tracer,
+    ).generate_vif()
+    assert [span.name for span in tracer.spans] == TREE_STAGES
+    spans = {span.name: span for span in tracer.spans}
+    assert spans["generate_vif"].attributes == {"mode": "tree"}
+    # Only port 1 has its own OptionalContent for DPAM content to merge into
+    assert spans["merge"].attributes == {"ports": 3, "merged": 1}
+    assert (
+        spans["write"].attributes["bytes"] == (tmp_path / "output.xml").stat().st_size
+    )
+
+
+def test_trace_json(in_vif, settings, tmp_path):
+    tracer = Tracer()
+    script.generate(in_vif, settings, tracer=tracer)
+    trace_path = tmp_path / "trace.json"
+    tracer.write_trace_json(trace_path)
+    with open(trace_path, encoding="utf8") as trace_file:
+        trace = json.load(trace_file)
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == TREE_STAGES[-1:] + TREE_STAGES[:-1]
+    for event in events:
+        assert set(event) == {"name", "ph", "ts", "dur", "pid", "tid", "args"}
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0
+        assert contains(events[0], event)
+    assert events[0]["args"] == {"mode": "tree"}
+
+
+def test_profile_output(in_vif, settings, tmp_path, monkeypatch, capsys):
+    trace_path = tmp_path / "trace.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "dpamvifgenerator",
+            "--batch",
+            "-i",
+            str(in_vif),
+            "-s",
+            str(settings),
+            "-o",
+            str(tmp_path / "output.xml"),
+            "--profile",
+            "--trace-json",
+            str(trace_path),
+        ],
+    )
+    # Batch mode redirects logging to print
+    monkeypatch.setattr(logging, "info", logging.info)
+    with pytest.raises(SystemExit) as exit_info:
+        main.main()
+    assert exit_info.value.code == 0
+    summary = capsys.readouterr().out.split("Stage timings:\n")[1].splitlines()
+    assert sorted(line.split()[0] for line in summary) == sorted(TREE_STAGES)
+    assert summary[0].split()[0] == "generate_vif"
+    assert summary[0].endswith("100.0%")
+    with open(trace_path, encoding="utf8") as trace_file:
+        assert len(json.load(trace_file)["traceEvents"]) == len(TREE_STAGES)
+
+
+def test_batch_worker_spans(in_vif, settings, tmp_path):
+    # Spans recorded in worker processes are returned to the parent tracer
+    tracer = Tracer()
+    jobs = str(tmp_path / "input*.xml")
+    assert batch.main(jobs, str(settings), str(tmp_path / "out"), tracer=tracer) == 0
+    assert [span.name for span in tracer.spans] == TREE_STAGES
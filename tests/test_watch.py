@@ -0,0 +1,167 @@
+######################################################
+# Copyright (c) VESA. All rights reserved.
+# This code is licensed under the MIT License (MIT).
+# THIS CODE IS PROVIDED *AS IS* WITHOUT WARRANTY OF
+# ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING ANY
+# IMPLIED WARRANTIES OF FITNESS FOR A PARTICULAR
+# PURPOSE, MERCHANTABILITY, OR NON-INFRINGEMENT.
+######################################################
+import logging
+import os
+
+import pytest
+
+from dpamvifgenerator import batch, watch
+
+# Watch Test Consts
+DEBOUNCE = 0.5  # Seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock for the watcher that only moves when advanced"""
+
+    class Clock:
+        now = 1000.0
+
+        def advance(self, seconds: float):
+            self.now += seconds
+
+    clock = Clock()
+    monkeypatch.setattr(watch.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def touch(path, content: bytes = None, offset: int = 10):
+    """Rewrite a file and move its mtime on, so the change is always seen"""
+    if content is not None:
+        path.write_bytes(content)
+    stat = os.stat(path)
+    mtime = stat.st_mtime_ns + offset * 10**9
+    os.utime(path, ns=(mtime, mtime))
+
+
+def get_outputs(jobs: list) -> list[str]:
+    return [os.path.basename(job.out_vif) for job in jobs]
+
+
+@pytest.fixture
+def watcher(in_vif, write_settings, tmp_path, clock):
+    """Watcher over two jobs sharing an input VIF, with their outputs generated"""
+    jobs = [
+        batch.BatchJob(str(in_vif), str(write_settings(name=name)), str(tmp_path / out))
+        for name, out in (("a.xml", "out_a.xml"), ("b.xml", "out_b.xml"))
+    ]
+    watcher = watch.Watcher(lambda: jobs, debounce=DEBOUNCE)
+    # Missing outputs are generated straight away
+    assert get_outputs(watcher.poll()) == ["out_a.xml", "out_b.xml"]
+    assert all(result.success for result in watcher.regenerate(jobs))
+    assert watcher.poll() == []
+    return watcher
+
+
+def test_up_to_date_outputs_are_kept(watcher, clock):
+    fresh = watch.Watcher(lambda: watcher.jobs, debounce=DEBOUNCE)
+    assert fresh.poll() == []
+    # Outputs older than their settings are generated straight away
+    touch(watcher.jobs[0].settings)
+    assert get_outputs(watch.Watcher(lambda: watcher.jobs).poll()) == ["out_a.xml"]
+
+
+def test_changes_are_debounced(watcher, clock, write_settings):
+    for _ in range(3):
+        touch(write_settings({"0": "UHBR10"}, "a.xml"))
+        assert watcher.poll() == []
+        clock.advance(DEBOUNCE / 2)
+    # A burst of saves is regenerated once, after it has been quiet
+    clock.advance(DEBOUNCE / 2)
+    assert get_outputs(watcher.poll()) == ["out_a.xml"]
+    assert watcher.poll() == []
+
+
+def test_changed_input_regenerates_every_job(watcher, clock, in_vif, generate):
+    touch(in_vif, in_vif.read_bytes().replace(b"DRP", b"Source"))
+    assert watcher.poll() == []
+    clock.advance(DEBOUNCE)
+    jobs = watcher.poll()
+    assert get_outputs(jobs) == ["out_a.xml", "out_b.xml"]
+    watcher.regenerate(jobs)
+    for job in jobs:
+        assert open(job.out_vif, "rb").read() == generate(in_vif, job.settings)
+
+
+def test_changed_settings_are_regenerated(
+    watcher, clock, write_settings, tmp_path, generate
+):
+    settings = write_settings({"2": "UHBR20"}, "b.xml")
+    touch(settings)
+    assert watcher.poll() == []
+    clock.advance(DEBOUNCE)
+    jobs = watcher.poll()
+    assert get_outputs(jobs) == ["out_b.xml"]
+    (result,) = watcher.regenerate(jobs)
+    assert result.success
+    output = (tmp_path / "out_b.xml").read_bytes()
+    assert b"UHBR20" in output
+    assert output == generate(jobs[0].in_vif, settings)
+
+
+def test_jobs_reload_when_source_changes(in_vif, settings, tmp_path, clock):
+    vifs = tmp_path / "vifs"
+    vifs.mkdir()
+    (vifs / "a.xml").write_bytes(in_vif.read_bytes())
+    out_dir = tmp_path / "out"
+    watcher = watch.Watcher(
+        lambda: batch.load_jobs(str(vifs), str(settings), str(out_dir)),
+        str(vifs),
+        DEBOUNCE,
+    )
+    watcher.regenerate(watcher.poll())
+    assert watcher.poll() == []
+    (vifs / "b.xml").write_bytes(in_vif.read_bytes())
+    touch(vifs)
+    assert watcher.poll() == []
+    clock.advance(DEBOUNCE)
+    assert get_outputs(watcher.poll()) == ["b.xml"]
+
+
+def test_broken_manifest_keeps_jobs(in_vif, settings, tmp_path, clock):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(f"{in_vif},{settings},{tmp_path / 'out.xml'}\n")
+    watcher = watch.Watcher(
+        lambda: batch.load_jobs(str(manifest), None, None), str(manifest), DEBOUNCE
+    )
+    jobs = watcher.jobs
+    touch(manifest, b"not,a valid row\n")
+    clock.advance(DEBOUNCE)
+    watcher.poll()
+    assert watcher.jobs == jobs
+
+
+def test_watch_main(in_vif, write_settings, tmp_path, monkeypatch, capsys):
+    # Poll in real time with a short interval, editing settings once the
+    # output is first generated, and stopping once it is regenerated
+    settings = write_settings()
+    out_vif = tmp_path / "output.xml"
+    sleep = watch.time.sleep
+    polls = []
+
+    def poll_sleep(seconds):
+        polls.append(seconds)
+        if out_vif.exists() and b"UHBR10" in out_vif.read_bytes():
+            raise KeyboardInterrupt()
+        if len(polls) == 1:
+            touch(write_settings({"0": "UHBR10"}))
+        assert len(polls) < 1000, "Changed settings were not regenerated"
+        sleep(seconds)
+
+    monkeypatch.setattr(watch.time, "sleep", poll_sleep)
+    # Watch mode quiets generation logging
+    monkeypatch.setattr(logging, "info", logging.info)
+    code = watch.main(
+        str(in_vif), str(settings), str(out_vif), debounce=0.05, poll_interval=0.01
+    )
+    assert code == 0
+    output = capsys.readouterr().out
+    assert output.count("Regenerating 1 outputs") == 2
+    assert output.endswith("Stopped watching\n")